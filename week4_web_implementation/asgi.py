@@ -0,0 +1,5 @@
+from website import create_app
+from website.async_api import create_asgi_app
+
+# ASGI entry point: uvicorn asgi:app
+app = create_asgi_app(create_app())
@@ -0,0 +1,172 @@
+# Concurrent API throughput: WSGI (sync workers) vs ASGI (uvicorn workers).
+#
+#   python benchmarks/bench_asgi.py [--workers 2] [--concurrency 8,32,128] [--duration 5]
+#
+# Both servers run the same code against the same synthetic SQLite file
+# (DATABASE_URL), under gunicorn with the same number of worker processes:
+# main:app on sync workers, asgi:app on uvicorn workers. asyncio clients
+# mix the async endpoints: a student's history, activity detail and the
+# catalog.
+# A sync worker serves one request at a time, so extra clients queue; the
+# async workers interleave them while queries are in flight.
+#
+# Needs: pip install gunicorn uvicorn starlette aiosqlite greenlet asgiref
+
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(__file__))
+
+from sqlalchemy import func, select  # noqa: E402
+
+from synthetic import SCALES, generate  # noqa: E402
+from website import create_app, db  # noqa: E402
+from website.api import create_token  # noqa: E402
+from website.models import Participation, Students  # noqa: E402
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def setup(scale):
+    uri = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+    app = create_app({"SQLALCHEMY_DATABASE_URI": uri})
+    with app.app_context():
+        generate(**SCALES[scale])
+        student_id = db.session.execute(
+            select(Participation.studentID).group_by(Participation.studentID)
+            .order_by(func.count().desc()).limit(1)
+        ).scalar()
+        token = create_token(db.session.get(Students, student_id))
+    return uri, student_id, token
+
+
+SERVERS = {
+    "wsgi": lambda port, workers: ["gunicorn", "--workers", str(workers), "--bind", f"127.0.0.1:{port}",
+                                   "--log-level", "warning", "main:app"],
+    "asgi": lambda port, workers: ["gunicorn", "--workers", str(workers), "--bind", f"127.0.0.1:{port}",
+                                   "--log-level", "warning", "--worker-class", "uvicorn.workers.UvicornWorker",
+                                   "asgi:app"],
+}
+
+
+def start(kind, workers, uri):
+    port = free_port()
+    env = dict(os.environ, DATABASE_URL=uri)
+    proc = subprocess.Popen(SERVERS[kind](port, workers), cwd=ROOT, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return proc, port
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    sys.exit(f"{kind} server did not start")
+
+
+class Client:
+    # Minimal HTTP/1.1 keep-alive client. httpx's pool costs more CPU than
+    # the servers under test once there are ~100 connections on one machine.
+    def __init__(self, host, port, headers):
+        self.host, self.port = host, port
+        self.extra = "".join(f"{k}: {v}\r\n" for k, v in headers.items())
+        self.reader = self.writer = None
+
+    async def get(self, path):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        self.writer.write(f"GET {path} HTTP/1.1\r\nHost: {self.host}\r\n{self.extra}\r\n".encode())
+        status = int((await self.reader.readline()).split()[1])
+        length, close = 0, False
+        while (line := await self.reader.readline()) not in (b"\r\n", b""):
+            name, _, value = line.decode().partition(":")
+            name = name.lower()
+            if name == "content-length":
+                length = int(value)
+            elif name == "connection" and value.strip().lower() == "close":
+                close = True
+        await self.reader.readexactly(length)
+        if close:
+            # gunicorn's sync workers don't keep connections alive
+            self.writer.close()
+            self.writer = None
+        return status
+
+
+async def load(port, headers, student_id, concurrency, duration):
+    paths = [
+        f"/api/v1/students/{student_id}/activities?limit=20",
+        "/api/v1/activities/{n}",
+        "/api/v1/activities?limit=50",
+    ]
+    latencies = []
+    errors = [0]
+    stop = time.perf_counter() + duration
+
+    async def client(n):
+        http = Client("127.0.0.1", port, headers)
+        i = n
+        while time.perf_counter() < stop:
+            path = paths[i % len(paths)].format(n=i % 40 + 1)
+            start = time.perf_counter()
+            try:
+                ok = await http.get(path) == 200
+            except (OSError, asyncio.IncompleteReadError, IndexError, ValueError):
+                ok = False
+                http.writer = None
+            latencies.append(time.perf_counter() - start)
+            errors[0] += not ok
+            i += concurrency
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(n) for n in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return (len(latencies) / elapsed, statistics.median(latencies) * 1000,
+            latencies[int(len(latencies) * 0.99)] * 1000, errors[0])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--concurrency", default="8,32,128")
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--scale", choices=SCALES, default="small")
+    args = parser.parse_args()
+
+    uri, student_id, token = setup(args.scale)
+    headers = {"Authorization": f"Bearer {token}"}
+    levels = [int(c) for c in args.concurrency.split(",")]
+
+    print(f"workers={args.workers} duration={args.duration}s scale={args.scale}")
+    print(f"{'server':<6} {'clients':>8} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for kind in SERVERS:
+        proc, port = start(kind, args.workers, uri)
+        try:
+            # warm both workers' caches and connection pools
+            asyncio.run(load(port, headers, student_id, 4, 1.0))
+            for concurrency in levels:
+                rate, p50, p99, errors = asyncio.run(load(port, headers, student_id, concurrency, args.duration))
+                print(f"{kind:<6} {concurrency:>8} {rate:>9.1f} {p50:>8.1f} {p99:>8.1f} {errors:>7}")
+        finally:
+            proc.terminate()
+            proc.wait()
+
+
+if __name__ == "__main__":
+    main()
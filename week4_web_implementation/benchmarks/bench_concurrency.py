@@ -0,0 +1,103 @@
+# Mixed read/write throughput on SQLite: default journaling vs tuned engine.
+#
+#   python benchmarks/bench_concurrency.py [--writers 4] [--readers 8] [--duration 5]
+#
+# Writer threads submit applications (POST /api/v1/participations) while
+# reader threads page through the same student's history. "default" runs
+# with no pragmas (rollback journal, synchronous=FULL); "tuned" uses the
+# engine settings from website/engine.py. Failed requests are mostly
+# "database is locked" errors surfacing as HTTP 500. A student can only
+# apply once per activity, so --rows should exceed the writes per run.
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from website import create_app, db  # noqa: E402
+from website.api import create_token  # noqa: E402
+from website.models import Activity, Students  # noqa: E402
+
+MODES = {
+    "default": {"SQLITE_PRAGMAS": {}},
+    "tuned": {},
+}
+
+
+def setup(mode, rows):
+    tmp = tempfile.mkdtemp()
+    app = create_app(dict(MODES[mode], SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp}/bench.db"))
+    app.logger.setLevel(logging.CRITICAL)
+    with app.app_context():
+        student = Students(studentFirstName="Bench", studentLastName="Student",
+                           studentEmail="bench@example.com", studentPassword="x")
+        db.session.add(student)
+        db.session.add_all(Activity(activityName=f"Activity {i}") for i in range(rows))
+        db.session.commit()
+        token = create_token(student)
+        journal = db.session.execute(db.text("PRAGMA journal_mode")).scalar()
+    return app, {"Authorization": f"Bearer {token}"}, journal
+
+
+def run(app, headers, writers, readers, duration, rows):
+    counts = {"writes": 0, "reads": 0, "errors": 0}
+    latencies = []
+    lock = threading.Lock()
+    stop = time.perf_counter() + duration
+
+    def writer(n):
+        client = app.test_client()
+        i = n
+        while time.perf_counter() < stop:
+            start = time.perf_counter()
+            r = client.post("/api/v1/participations", json={"activityID": i % rows + 1}, headers=headers)
+            elapsed = time.perf_counter() - start
+            with lock:
+                counts["writes" if r.status_code == 201 else "errors"] += 1
+                latencies.append(elapsed)
+            i += writers
+
+    def reader():
+        client = app.test_client()
+        while time.perf_counter() < stop:
+            r = client.get("/api/v1/students/1/activities?limit=100", headers=headers)
+            with lock:
+                counts["reads" if r.status_code == 200 else "errors"] += 1
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+    threads += [threading.Thread(target=reader) for _ in range(readers)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0.0
+    return counts["writes"] / elapsed, counts["reads"] / elapsed, counts["errors"], p99
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--rows", type=int, default=5000)
+    args = parser.parse_args()
+
+    print(f"writers={args.writers} readers={args.readers} duration={args.duration}s")
+    print(f"{'mode':<8} {'journal':<8} {'writes/s':>9} {'reads/s':>9} {'errors':>7} {'write p99 ms':>13}")
+    for mode in MODES:
+        app, headers, journal = setup(mode, args.rows)
+        writes, reads, errors, p99 = run(app, headers, args.writers, args.readers, args.duration, args.rows)
+        print(f"{mode:<8} {journal:<8} {writes:>9.1f} {reads:>9.1f} {errors:>7} {p99:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
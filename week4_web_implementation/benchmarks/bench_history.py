@@ -0,0 +1,98 @@
+# Latency of GET /students/<id>/activities as a student's history grows.
+#
+#   python benchmarks/bench_history.py
+#
+# Runs against a throwaway SQLite file; compares the joined, paginated
+# endpoint with the old per-row Activity lookup loop.
+
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import event
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from website import create_app, db  # noqa: E402
+from website.api import create_token  # noqa: E402
+from website.models import Activity, Participation, Students  # noqa: E402
+
+LENGTHS = [10, 100, 1000, 5000]
+REPEAT = 20
+
+
+def seed(student, n):
+    activities = [
+        Activity(activityName=f"Activity {i}", activityCategory="Club", activityLocation="Campus")
+        for i in range(n)
+    ]
+    db.session.add_all(activities)
+    db.session.flush()
+    db.session.add_all(
+        Participation(
+            studentID=student.studentID,
+            activityID=a.activityID,
+            applicationStatus="Approved" if i % 3 else "Pending",
+            dateApplied=date(2025, 1, 1) + timedelta(days=i % 365),
+        )
+        for i, a in enumerate(activities)
+    )
+    db.session.commit()
+
+
+def naive_history(student_id):
+    # The pre-rewrite implementation: one Activity query per participation
+    rows = []
+    for p in Participation.query.filter_by(studentID=student_id).all():
+        activity = Activity.query.get(p.activityID)
+        rows.append((p.participationID, activity.activityName))
+    return rows
+
+
+def timed(fn):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        fn()
+    return (time.perf_counter() - start) / REPEAT * 1000
+
+
+def main():
+    tmp = tempfile.mkdtemp()
+    app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp}/bench.db"})
+    client = app.test_client()
+
+    queries = [0]
+    with app.app_context():
+        event.listen(
+            db.engine, "before_cursor_execute",
+            lambda *a: queries.__setitem__(0, queries[0] + 1),
+        )
+
+    print(f"{'history':>8} {'endpoint ms':>12} {'queries':>8} {'old loop ms':>12} {'queries':>8}")
+    for n in LENGTHS:
+        with app.app_context():
+            student = Students(studentFirstName="Bench", studentLastName="User",
+                               studentEmail=f"bench{n}@example.com", studentPassword="x")
+            db.session.add(student)
+            db.session.commit()
+            seed(student, n)
+            student_id = student.studentID
+            headers = {"Authorization": f"Bearer {create_token(student)}"}
+
+        url = f"/api/v1/students/{student_id}/activities?limit=200&status=approved"
+        queries[0] = 0
+        endpoint_ms = timed(lambda: client.get(url, headers=headers))
+        endpoint_queries = queries[0] // REPEAT
+
+        with app.app_context():
+            queries[0] = 0
+            naive_ms = timed(lambda: naive_history(student_id))
+            naive_queries = queries[0] // REPEAT
+
+        print(f"{n:>8} {endpoint_ms:>12.2f} {endpoint_queries:>8} {naive_ms:>12.2f} {naive_queries:>8}")
+
+
+if __name__ == "__main__":
+    main()
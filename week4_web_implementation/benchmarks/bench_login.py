@@ -0,0 +1,83 @@
+# Logins per second through POST /auth/login under concurrent clients.
+#
+#   python benchmarks/bench_login.py [--method pbkdf2:sha256:600000] [--workers N]
+#
+# Each client thread logs in and out repeatedly against a throwaway SQLite
+# file. Requests rejected by the password pool's backpressure are counted
+# separately from successful logins.
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from website import create_app, db  # noqa: E402
+from website.models import Students  # noqa: E402
+from website.passwords import hash_password  # noqa: E402
+
+
+def run(app, clients, duration):
+    ok = [0]
+    busy = [0]
+    lock = threading.Lock()
+    stop = time.perf_counter() + duration
+
+    def worker(n):
+        client = app.test_client()
+        while time.perf_counter() < stop:
+            r = client.post("/auth/login", data={"email": f"bench{n}@example.com", "password": "secret"})
+            with lock:
+                if r.status_code == 302 and "dashboard" in r.headers.get("Location", ""):
+                    ok[0] += 1
+                else:
+                    busy[0] += 1
+            client.get("/auth/logout")
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    return ok[0] / elapsed, busy[0]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--method", default="pbkdf2:sha256:600000")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--clients", default="1,2,4,8,16")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp}/bench.db",
+        "PASSWORD_HASH_METHOD": args.method,
+        "PASSWORD_HASH_WORKERS": args.workers,
+    })
+    levels = [int(c) for c in args.clients.split(",")]
+
+    with app.app_context():
+        hashed = hash_password("secret")
+        db.session.add_all(
+            Students(studentFirstName="Bench", studentLastName=str(n),
+                     studentEmail=f"bench{n}@example.com", studentPassword=hashed)
+            for n in range(max(levels))
+        )
+        db.session.commit()
+
+    print(f"method={args.method} hash workers={args.workers}")
+    print(f"{'clients':>8} {'logins/s':>10} {'busy':>6}")
+    for clients in levels:
+        rate, busy = run(app, clients, args.duration)
+        print(f"{clients:>8} {rate:>10.1f} {busy:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+# Requests per second for each read route of the /api/v1 JSON API.
+#
+#   python benchmarks/loadtest_api.py [--clients 4] [--duration 3] [--rows 2000]
+#
+# Seeds a throwaway SQLite file, then hammers every route with threaded test
+# clients. Each route is measured twice: plain GETs, and revalidations that
+# send the ETag from the first response back as If-None-Match (expect 304s).
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from website import create_app, db  # noqa: E402
+from website.api import create_token  # noqa: E402
+from website.models import Activity, Advisor, Participation, Students  # noqa: E402
+
+# (label, url, whose token)
+ROUTES = [
+    ("students", "/api/v1/students?limit=50", "admin"),
+    ("students sorted", "/api/v1/students?limit=50&sort=-lastName", "admin"),
+    ("advisors", "/api/v1/advisors?limit=50", "student"),
+    ("activities", "/api/v1/activities?limit=50", "student"),
+    ("activity detail", "/api/v1/activities/1", "student"),
+    ("activity search", "/api/v1/activities/search?keyword=robot&limit=20", "student"),
+    ("participations", "/api/v1/participations", "student"),
+    ("history", "/api/v1/students/1/activities?limit=50", "student"),
+]
+
+
+def seed(rows):
+    advisors = [
+        Advisor(advisorName=f"Advisor {i}", advisorEmail=f"adv{i}@example.com",
+                advisorRole="Coach", officeLocation=f"Room {i}", status="Approved")
+        for i in range(max(rows // 100, 1))
+    ]
+    db.session.add_all(advisors)
+    db.session.flush()
+
+    students = [
+        Students(studentFirstName=f"First{i}", studentLastName=f"Last{i}",
+                 studentEmail=f"s{i}@example.com", studentPassword="x")
+        for i in range(rows)
+    ]
+    activities = [
+        Activity(activityName=f"{'Robotics' if i % 10 == 0 else 'Club'} {i}",
+                 activityCategory="Club", activityLocation="Campus",
+                 activityDetails="Weekly meeting", activityStartDate=date(2025, 1, 1),
+                 advisorID=advisors[i % len(advisors)].advisorID)
+        for i in range(rows // 4)
+    ]
+    db.session.add_all(students + activities)
+    db.session.flush()
+
+    db.session.add_all(
+        Participation(studentID=students[0].studentID, activityID=a.activityID,
+                      advisorID=a.advisorID, applicationStatus="Approved",
+                      dateApplied=date(2025, 1, 1) + timedelta(days=i % 365))
+        for i, a in enumerate(activities[:200])
+    )
+    db.session.commit()
+    return students[0]
+
+
+def run(app, url, headers, clients, duration):
+    done = [0]
+    statuses = set()
+    lock = threading.Lock()
+    stop = time.perf_counter() + duration
+
+    def worker():
+        client = app.test_client()
+        n = 0
+        while time.perf_counter() < stop:
+            r = client.get(url, headers=headers)
+            statuses.add(r.status_code)
+            n += 1
+        with lock:
+            done[0] += n
+
+    threads = [threading.Thread(target=worker) for _ in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return done[0] / (time.perf_counter() - start), statuses
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=3.0)
+    parser.add_argument("--rows", type=int, default=2000)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp}/bench.db"})
+    with app.app_context():
+        tokens = {
+            "student": create_token(seed(args.rows)),
+            "admin": create_token(Advisor.query.filter_by(is_admin=True).first()),
+        }
+
+    print(f"clients={args.clients} duration={args.duration}s rows={args.rows}")
+    print(f"{'route':<18} {'req/s':>9} {'304 req/s':>10}  status")
+    for label, url, role in ROUTES:
+        auth = {"Authorization": f"Bearer {tokens[role]}"}
+        etag = app.test_client().get(url, headers=auth).headers.get("ETag")
+        rate, statuses = run(app, url, auth, args.clients, args.duration)
+        cached, cached_statuses = run(
+            app, url, dict(auth, **{"If-None-Match": etag}), args.clients, args.duration
+        )
+        codes = ",".join(str(c) for c in sorted(statuses | cached_statuses))
+        print(f"{label:<18} {rate:>9.1f} {cached:>10.1f}  {codes}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+# Benchmark suite over every blueprint, with a JSON baseline for regressions.
+#
+#   python benchmarks/run_suite.py [--scale small] [--iterations 50] [--output results.json]
+#   python benchmarks/run_suite.py --compare benchmarks/baseline.json [--tolerance 0.25]
+#
+# A throwaway SQLite file is filled by benchmarks/synthetic.py, then each
+# scenario drives the Flask test client as a logged-in student, advisor or
+# admin: login, dashboards, catalog and search, applying, advisor approval,
+# admin listings and the JSON API. For every scenario we record the
+# median/p95/mean latency and the number of SQL statements per request.
+#
+# --output writes the results as JSON; benchmarks/baseline.json is the
+# committed one (small scale, default seed). --compare exits non-zero when a
+# scenario's median is more than --tolerance slower than the baseline, or it
+# issues more queries. Query counts don't depend on the machine, so they are
+# the more reliable signal, and tests/test_suite.py checks them on every
+# pytest run; timings are only compared here.
+#
+# Passwords are hashed with a cheap method by default so "login" measures
+# the app rather than PBKDF2; pass --hash-method to change that. The
+# background job workers are off, so their queries aren't counted against
+# whichever request happens to be running; jobs are still queued.
+
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import event, func, select  # noqa: E402
+
+from synthetic import PASSWORD, add_arguments, counts, generate  # noqa: E402
+from website import create_app, db  # noqa: E402
+from website.api import create_token  # noqa: E402
+from website.models import Activity, Advisor, Participation, Students  # noqa: E402
+
+SEARCH_TERMS = ["robotics", "club", "music", "team", "community", "chess", "evening"]
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+class ScenarioError(RuntimeError):
+    pass
+
+
+class Suite:
+    def __init__(self, app):
+        self.app = app
+        self.queries = 0
+        self.scenarios = {}
+        with app.app_context():
+            event.listen(db.engine, "after_cursor_execute", self._count)
+            self._pick_users()
+        self.student = self._login(self.student_email)
+        self.advisor = self._login(self.advisor_email)
+        self.admin = self._login("atmin@anjay.com", "atmindatang")
+        self.anonymous = app.test_client()
+        self.api_headers = {"Authorization": f"Bearer {self.token}"}
+
+    def _count(self, *args):
+        self.queries += 1
+
+    def _pick_users(self):
+        # The busiest student and the advisor with the longest pending queue
+        student_id = db.session.execute(
+            select(Participation.studentID).group_by(Participation.studentID)
+            .order_by(func.count().desc()).limit(1)
+        ).scalar()
+        student = db.session.get(Students, student_id)
+        self.student_id = student_id
+        self.student_email = student.studentEmail
+        self.token = create_token(student)
+
+        applied = select(Participation.activityID).where(Participation.studentID == student_id)
+        self.open_activities = db.session.scalars(
+            select(Activity.activityID).where(Activity.activityID.not_in(applied)).order_by(Activity.activityID)
+        ).all()
+
+        advisor_id = db.session.execute(
+            select(Participation.advisorID).where(Participation.applicationStatus == "Pending")
+            .group_by(Participation.advisorID).order_by(func.count().desc()).limit(1)
+        ).scalar()
+        self.advisor_id = advisor_id
+        self.advisor_email = db.session.get(Advisor, advisor_id).advisorEmail
+        self.pending = db.session.scalars(
+            select(Participation.participationID)
+            .where(Participation.advisorID == advisor_id, Participation.applicationStatus == "Pending")
+        ).all()
+
+    def _login(self, email, password=PASSWORD):
+        client = self.app.test_client()
+        r = client.post("/auth/login", data={"email": email, "password": password})
+        if r.status_code != 302:
+            raise ScenarioError(f"login failed for {email}")
+        return client
+
+    def scenario(self, name, expect=(200,)):
+        def register(fn):
+            self.scenarios[name] = (fn, expect)
+            return fn
+        return register
+
+    def measure(self, name, iterations, warmup):
+        fn, expect = self.scenarios[name]
+        for i in range(warmup):
+            fn(i)
+        timings, queries = [], []
+        for i in range(warmup, warmup + iterations):
+            self.queries = 0
+            start = time.perf_counter()
+            r = fn(i)
+            timings.append(time.perf_counter() - start)
+            queries.append(self.queries)
+            if r.status_code not in expect:
+                raise ScenarioError(f"{name}: unexpected HTTP {r.status_code}")
+        timings.sort()
+        return {
+            "median_ms": statistics.median(timings) * 1000,
+            "p95_ms": timings[min(len(timings) - 1, int(len(timings) * 0.95))] * 1000,
+            "mean_ms": statistics.fmean(timings) * 1000,
+            "queries": statistics.median(queries),
+            "ops_per_sec": len(timings) / sum(timings),
+        }
+
+    def run(self, iterations, warmup, only=None):
+        results = {}
+        for name in self.scenarios:
+            if only and name not in only:
+                continue
+            results[name] = self.measure(name, iterations, warmup)
+            print(f"{name:<22} {results[name]['median_ms']:>9.2f} {results[name]['p95_ms']:>9.2f} "
+                  f"{results[name]['queries']:>8.0f}")
+        return results
+
+
+def build(suite):
+    s = suite
+
+    @s.scenario("login", expect=(302,))
+    def login(i):
+        client = s.app.test_client()
+        return client.post("/auth/login", data={"email": s.student_email, "password": PASSWORD})
+
+    @s.scenario("student_dashboard")
+    def student_dashboard(i):
+        return s.student.get("/dashboard")
+
+    @s.scenario("activity_catalog")
+    def activity_catalog(i):
+        return s.student.get("/activities")
+
+    @s.scenario("activity_search")
+    def activity_search(i):
+        return s.student.get(f"/activities?q={SEARCH_TERMS[i % len(SEARCH_TERMS)]}")
+
+    @s.scenario("activity_history")
+    def activity_history(i):
+        return s.student.get("/activity-history")
+
+    @s.scenario("participate", expect=(302,))
+    def participate(i):
+        # a fresh activity each time; once they run out, repeats take the duplicate path
+        activity_id = s.open_activities[i % len(s.open_activities)]
+        return s.student.post(f"/participate/{activity_id}", data={"advisor_id": s.advisor_id})
+
+    @s.scenario("advisor_dashboard")
+    def advisor_dashboard(i):
+        return s.advisor.get("/advisor/dashboard")
+
+    @s.scenario("advisor_approve", expect=(302,))
+    def advisor_approve(i):
+        # cycles through the queue, approving on even passes and reopening on odd ones
+        pid = s.pending[i % len(s.pending)]
+        status = "Approved" if (i // len(s.pending)) % 2 == 0 else "Pending"
+        return s.advisor.post(f"/advisor/participation/{pid}/update", data={"status": status, "feedback": ""})
+
+    @s.scenario("admin_home")
+    def admin_home(i):
+        return s.admin.get("/admin/")
+
+    @s.scenario("admin_students")
+    def admin_students(i):
+        return s.admin.get("/admin/students")
+
+    @s.scenario("admin_activities")
+    def admin_activities(i):
+        return s.admin.get("/admin/activities")
+
+    @s.scenario("admin_participations")
+    def admin_participations(i):
+        return s.admin.get("/admin/participations")
+
+    @s.scenario("api_activities")
+    def api_activities(i):
+        return s.anonymous.get("/api/v1/activities", headers=s.api_headers)
+
+    @s.scenario("api_history")
+    def api_history(i):
+        return s.anonymous.get(f"/api/v1/students/{s.student_id}/activities", headers=s.api_headers)
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True, cwd=os.path.dirname(__file__)).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, tolerance):
+    failures = []
+    print(f"\n{'scenario':<22} {'base ms':>9} {'now ms':>9} {'change':>8} {'queries':>10}")
+    for name, now in results.items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        change = now["median_ms"] / base["median_ms"] - 1 if base["median_ms"] else 0.0
+        queries = f"{base['queries']:.0f}->{now['queries']:.0f}"
+        print(f"{name:<22} {base['median_ms']:>9.2f} {now['median_ms']:>9.2f} {change:>+8.0%} {queries:>10}")
+        if change > tolerance:
+            failures.append(f"{name} is {change:.0%} slower")
+        if now["queries"] > base["queries"]:
+            failures.append(f"{name} issues {queries} queries")
+    return failures
+
+
+def create(database_uri, hash_method="pbkdf2:sha256:1000", seed=1, **scale):
+    # -> (suite with every scenario registered, rows created)
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": database_uri,
+        "PASSWORD_HASH_METHOD": hash_method,
+        "JOBS_RUNNER": False,
+    })
+    with app.app_context():
+        created = generate(seed=seed, **scale)
+    suite = Suite(app)
+    build(suite)
+    return suite, created
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    add_arguments(parser)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--only", help="comma-separated scenario names")
+    parser.add_argument("--hash-method", default="pbkdf2:sha256:1000")
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--compare", help="baseline JSON to check against")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    suite, created = create(f"sqlite:///{tmp}/bench.db", args.hash_method, args.seed, **counts(args))
+    print(", ".join(f"{n} {name}" for name, n in created.items()))
+
+    print(f"\n{'scenario':<22} {'median ms':>9} {'p95 ms':>9} {'queries':>8}")
+    results = suite.run(args.iterations, args.warmup, args.only.split(",") if args.only else None)
+
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "scale": args.scale,
+            "counts": created,
+            "seed": args.seed,
+            "iterations": args.iterations,
+            "warmup": args.warmup,
+            "hash_method": args.hash_method,
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "machine": platform.machine(),
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print(f"\nWrote {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            failures = compare(results, json.load(f), args.tolerance)
+        if failures:
+            print("REGRESSION: " + "; ".join(failures))
+            return 1
+        print("No regressions.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
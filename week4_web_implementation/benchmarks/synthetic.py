@@ -0,0 +1,215 @@
+# Reproducible synthetic data for benchmarks and local load tests.
+#
+#   python benchmarks/synthetic.py --db /tmp/synthetic.db [--scale medium] [--seed 1]
+#
+# Counts come from a --scale preset and can be overridden one by one
+# (--students, --advisors, --activities, --per-student). The same seed
+# always produces the same rows.
+#
+# The data is skewed the way real usage is: activity popularity follows a
+# Zipf-like curve, the number of applications per student is exponential
+# (most apply to a few activities, some to many), some activities have a
+# capacity and fill up (the overflow is Waitlisted), and statuses are mostly
+# Approved/Pending. Every user's password is "secret".
+#
+# Rows are written with executemany INSERTs; participation_summary and
+# activity.seatsTaken are rebuilt at the end.
+
+import argparse
+import os
+import random
+import sys
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import insert  # noqa: E402
+
+from website import create_app, db  # noqa: E402
+from website.applications import recount_seats  # noqa: E402
+from website.models import Activity, Advisor, Participation, Students  # noqa: E402
+from website.passwords import hash_password  # noqa: E402
+from website.stats import rebuild  # noqa: E402
+
+SCALES = {
+    "small": {"students": 200, "advisors": 10, "activities": 50, "per_student": 3},
+    "medium": {"students": 2000, "advisors": 40, "activities": 300, "per_student": 4},
+    "large": {"students": 20000, "advisors": 200, "activities": 2000, "per_student": 5},
+}
+PASSWORD = "secret"
+CHUNK_SIZE = 1000
+
+FIRST_NAMES = ["Aris", "Budi", "Citra", "Dewi", "Eka", "Fajar", "Gita", "Hadi", "Intan", "Joko",
+               "Kirana", "Lestari", "Made", "Nadia", "Oka", "Putri", "Rizky", "Sari", "Tono", "Wulan"]
+LAST_NAMES = ["Pratama", "Santoso", "Wijaya", "Halim", "Saputra", "Kusuma", "Hartono", "Nugroho",
+              "Siregar", "Tan", "Lim", "Gunawan", "Setiawan", "Putra", "Salim"]
+CATEGORIES = ["Sports", "Music", "Arts", "Technology", "Volunteering", "Academic", "Culture", "Debate"]
+TOPICS = ["Basketball", "Choir", "Robotics", "Photography", "Chess", "Football", "Theatre", "Coding",
+          "Badminton", "Dance", "Journalism", "Film", "Gardening", "Esports", "Orchestra", "Hiking"]
+KINDS = ["Club", "Team", "Society", "Workshop", "League", "Circle"]
+LOCATIONS = ["Main Hall", "Gym", "Library", "Lab 2", "Auditorium", "Field", "Room 101", "Studio"]
+FREQUENCIES = ["Weekly", "Biweekly", "Monthly", "Daily"]
+WORDS = ["practice", "training", "beginner", "advanced", "friendly", "competition", "community",
+         "project", "weekend", "evening", "team", "creative", "outdoor", "campus", "mentoring"]
+# share of applications per status; Approved ones may turn into Waitlisted
+STATUS_WEIGHTS = {"Approved": 55, "Pending": 25, "Rejected": 15, "Withdrawn": 5}
+TODAY = date(2026, 1, 1)
+
+
+def _chunks(rows):
+    for i in range(0, len(rows), CHUNK_SIZE):
+        yield rows[i:i + CHUNK_SIZE]
+
+
+def _write(conn, model, rows):
+    for chunk in _chunks(rows):
+        conn.execute(insert(model), chunk)
+
+
+def _students(rng, n, password):
+    return [
+        {
+            "studentFirstName": rng.choice(FIRST_NAMES),
+            "studentLastName": rng.choice(LAST_NAMES),
+            "studentEmail": f"student{i}@example.com",
+            "studentPassword": password,
+            "studentYear": rng.randint(1, 4),
+            "studentAddress": f"{rng.randint(1, 200)} Campus Road",
+            "phoneNumber": rng.randint(10**8, 10**9 - 1),
+        }
+        for i in range(1, n + 1)
+    ]
+
+
+def _advisors(rng, n, password):
+    return [
+        {
+            "advisorName": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "advisorEmail": f"advisor{i}@example.com",
+            "advisorRole": rng.choice(["Teacher", "Coach", "Counselor"]),
+            "officeLocation": rng.choice(LOCATIONS),
+            "advisorPassword": password,
+            "status": "Approved",
+            "is_admin": False,
+        }
+        for i in range(1, n + 1)
+    ]
+
+
+def _activities(rng, n, advisor_ids):
+    rows = []
+    for i in range(1, n + 1):
+        start = TODAY - timedelta(days=rng.randint(0, 300))
+        rows.append({
+            "activityName": f"{rng.choice(TOPICS)} {rng.choice(KINDS)} {i}",
+            "activityCategory": rng.choice(CATEGORIES),
+            "activityLocation": rng.choice(LOCATIONS),
+            "activityDetails": " ".join(rng.choices(WORDS, k=12)).capitalize() + ".",
+            "activityStartDate": start,
+            "activityEndDate": start + timedelta(days=rng.randint(30, 365)),
+            "activityFrequency": rng.choice(FREQUENCIES),
+            "advisorID": rng.choice(advisor_ids),
+            "capacity": rng.randint(5, 60) if rng.random() < 0.3 else None,
+        })
+    return rows
+
+
+def _participations(rng, student_ids, activities, per_student):
+    # Popularity: the k-th activity is chosen with weight 1 / k^1.1
+    activity_ids = list(range(1, len(activities) + 1))
+    rng.shuffle(activity_ids)
+    weights = [1 / (rank + 1) ** 1.1 for rank in range(len(activity_ids))]
+    statuses, status_weights = zip(*STATUS_WEIGHTS.items())
+    seats = {}
+
+    rows = []
+    for student_id in student_ids:
+        wanted = min(len(activity_ids), 1 + int(rng.expovariate(1 / per_student)))
+        chosen = set()
+        while len(chosen) < wanted:
+            chosen.update(rng.choices(activity_ids, weights=weights, k=wanted - len(chosen)))
+
+        for activity_id in sorted(chosen):
+            activity = activities[activity_id - 1]
+            applied = TODAY - timedelta(days=rng.randint(0, 365))
+            status = rng.choices(statuses, weights=status_weights)[0]
+            if status == "Approved":
+                capacity = activity["capacity"]
+                if capacity is not None and seats.get(activity_id, 0) >= capacity:
+                    status = "Waitlisted"
+                else:
+                    seats[activity_id] = seats.get(activity_id, 0) + 1
+            rows.append({
+                "studentID": student_id,
+                "activityID": activity_id,
+                "advisorID": activity["advisorID"],
+                "applicationStatus": status,
+                "dateApplied": applied,
+                "approvalDate": applied + timedelta(days=rng.randint(0, 14))
+                if status in ("Approved", "Rejected") else None,
+                "waitlistedAt": datetime.combine(applied, datetime.min.time()) if status == "Waitlisted" else None,
+                "advisorFeedback": rng.choice(WORDS).capitalize() if status == "Rejected" else None,
+                "achievements": None,
+            })
+    return rows
+
+
+def generate(students, advisors, activities, per_student, seed=1):
+    # Call inside an app context on an empty database (the admin may exist)
+    rng = random.Random(seed)
+    password = hash_password(PASSWORD)
+    with db.engine.begin() as conn:
+        first_student = conn.execute(db.select(db.func.count()).select_from(Students)).scalar() + 1
+        first_advisor = conn.execute(db.select(db.func.count()).select_from(Advisor)).scalar() + 1
+
+        _write(conn, Students, _students(rng, students, password))
+        _write(conn, Advisor, _advisors(rng, advisors, password))
+        advisor_ids = list(range(first_advisor, first_advisor + advisors))
+        activity_rows = _activities(rng, activities, advisor_ids)
+        _write(conn, Activity, activity_rows)
+
+        student_ids = range(first_student, first_student + students)
+        participation_rows = _participations(rng, student_ids, activity_rows, per_student)
+        _write(conn, Participation, participation_rows)
+
+        rebuild(conn)
+        recount_seats(conn)
+    return {
+        "students": students,
+        "advisors": advisors,
+        "activities": activities,
+        "participations": len(participation_rows),
+    }
+
+
+def add_arguments(parser):
+    parser.add_argument("--scale", choices=SCALES, default="small")
+    parser.add_argument("--seed", type=int, default=1)
+    for name in SCALES["small"]:
+        parser.add_argument(f"--{name.replace('_', '-')}", type=int, dest=name)
+
+
+def counts(args):
+    values = dict(SCALES[args.scale])
+    for name in values:
+        if getattr(args, name) is not None:
+            values[name] = getattr(args, name)
+    return values
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db", required=True, help="SQLite file to create")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    if os.path.exists(args.db):
+        sys.exit(f"{args.db} already exists")
+    app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.abspath(args.db)}"})
+    with app.app_context():
+        created = generate(seed=args.seed, **counts(args))
+    print(", ".join(f"{n} {name}" for name, n in created.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from synthetic import PASSWORD, generate
+from website import create_app, db
+
+
+@pytest.fixture
+def make_app(tmp_path):
+    # Each app gets its own SQLite file; cheap hashing, no job workers
+    def make(**config):
+        path = tmp_path / f"test{len(list(tmp_path.glob('*.db')))}.db"
+        return create_app({
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}",
+            "PASSWORD_HASH_METHOD": "pbkdf2:sha256:1000",
+            "JOBS_RUNNER": False,
+            "SECRET_KEY": "test-secret-key-that-is-long-enough-for-hs256",
+            "IMPORT_FOLDER": str(tmp_path / "imports"),
+            **config,
+        })
+    return make
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
+
+
+def seed(app, **scale):
+    with app.app_context():
+        return generate(**scale)
+
+
+def login(app, email, password=PASSWORD):
+    client = app.test_client()
+    r = client.post("/auth/login", data={"email": email, "password": password})
+    assert r.status_code == 302, f"login failed for {email}"
+    return client
+
+
+@contextmanager
+def count_queries(app):
+    # yields a list that ends up holding every SQL statement executed
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "after_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "after_cursor_execute", record)
@@ -0,0 +1,154 @@
+import pytest
+from sqlalchemy import select
+
+from conftest import seed
+from website import db
+from website.models import Advisor, Participation, Students
+from website.passwords import hash_password
+
+ADMIN = ("atmin@anjay.com", "atmindatang")
+
+
+@pytest.fixture
+def api(app):
+    seed(app, students=5, advisors=2, activities=5, per_student=2)
+    return app.test_client()
+
+
+def token(api, email, password="secret"):
+    r = api.post("/api/v1/login", json={"email": email, "password": password})
+    assert r.status_code == 200, r.get_json()
+    return {"Authorization": f"Bearer {r.get_json()['token']}"}
+
+
+def ids(app, model, pk, *where):
+    with app.app_context():
+        return db.session.scalars(select(pk).where(*where).order_by(pk)).all()
+
+
+def test_tokens_carry_the_role(api):
+    for email, password, role in [("student1@example.com", "secret", "student"),
+                                  ("advisor1@example.com", "secret", "advisor"),
+                                  (*ADMIN, "admin")]:
+        me = api.get("/api/v1/me", headers=token(api, email, password)).get_json()
+        assert me["role"] == role
+        assert me["email"] == email
+
+
+def test_pending_advisor_gets_no_token(app, api):
+    with app.app_context():
+        db.session.add(Advisor(advisorName="New", advisorEmail="new@example.com",
+                               advisorPassword=hash_password("secret"), status="Pending"))
+        db.session.commit()
+    r = api.post("/api/v1/login", json={"email": "new@example.com", "password": "secret"})
+    assert r.status_code == 403
+
+
+@pytest.mark.parametrize("method, url", [
+    ("get", "/api/v1/students"),
+    ("post", "/api/v1/students"),
+    ("put", "/api/v1/students/2"),
+    ("delete", "/api/v1/students/2"),
+    ("get", "/api/v1/students/2/activities"),
+    ("post", "/api/v1/activities"),
+    ("put", "/api/v1/activities/1"),
+    ("delete", "/api/v1/activities/1"),
+    ("put", "/api/v1/participations/1"),
+    ("delete", "/api/v1/participations/1"),
+    ("post", "/api/v1/advisors"),
+    ("put", "/api/v1/advisors/1"),
+    ("delete", "/api/v1/advisors/1"),
+])
+def test_student_token_is_refused(app, api, method, url):
+    headers = token(api, "student1@example.com")
+    r = getattr(api, method)(url, json={}, headers=headers)
+    assert r.status_code == 403
+    with app.app_context():
+        assert Advisor.query.filter_by(is_admin=True).count() == 1
+        assert db.session.get(Students, 2) is not None
+
+
+def test_student_manages_only_themselves(app, api):
+    headers = token(api, "student1@example.com")
+    assert api.get("/api/v1/students/1/activities", headers=headers).status_code == 200
+    assert api.put("/api/v1/students/1", json={"address": "Home"}, headers=headers).status_code == 200
+    with app.app_context():
+        assert db.session.get(Students, 1).studentAddress == "Home"
+
+
+@pytest.mark.parametrize("url", ["/api/v1/sync", "/api/v1/notifications", "/api/v1/notifications/unread-count"])
+def test_student_only_routes_refuse_advisors(api, url):
+    assert api.get(url, headers=token(api, "advisor1@example.com")).status_code == 403
+
+
+def test_advisor_handles_only_their_requests(app, api):
+    with app.app_context():
+        advisor_id = Advisor.query.filter_by(advisorEmail="advisor1@example.com").one().advisorID
+    mine = ids(app, Participation, Participation.participationID, Participation.advisorID == advisor_id)
+    other = ids(app, Participation, Participation.participationID, Participation.advisorID != advisor_id)
+    headers = token(api, "advisor1@example.com")
+
+    listed = api.get("/api/v1/participations", headers=headers).get_json()
+    assert sorted(p["participationID"] for p in listed) == mine
+    assert api.put(f"/api/v1/participations/{mine[0]}", json={"feedback": "ok"}, headers=headers).status_code == 200
+    assert api.put(f"/api/v1/participations/{other[0]}", json={"feedback": "no"}, headers=headers).status_code == 403
+    assert api.delete(f"/api/v1/participations/{other[0]}", headers=headers).status_code == 403
+    assert api.post("/api/v1/participations", json={"activityID": 1}, headers=headers).status_code == 403
+
+
+def test_admin_can_use_crud(app, api):
+    headers = token(api, *ADMIN)
+    assert api.get("/api/v1/students", headers=headers).status_code == 200
+    assert api.delete("/api/v1/students/2", headers=headers).status_code == 200
+    assert api.put("/api/v1/participations/1", json={"feedback": "ok"}, headers=headers).status_code == 200
+
+
+def test_asgi_routes_check_roles(app, api):
+    pytest.importorskip("aiosqlite")
+    from starlette.testclient import TestClient
+    from website.async_api import create_asgi_app
+
+    student = token(api, "student1@example.com")
+    advisor = token(api, "advisor1@example.com")
+    with TestClient(create_asgi_app(app)) as client:
+        assert client.get("/api/v1/students/1/activities", headers=student).status_code == 200
+        assert client.get("/api/v1/students/2/activities", headers=student).status_code == 403
+        assert client.get("/api/v1/students/2/activities", headers=advisor).status_code == 200
+        assert client.post("/api/v1/participations", json={"activityID": 1}, headers=advisor).status_code == 403
+        assert client.get("/api/v1/me", headers=advisor).json()["role"] == "advisor"
+
+
+def set_advisor(app, email, **values):
+    with app.app_context():
+        advisor = Advisor.query.filter_by(advisorEmail=email).one()
+        for key, value in values.items():
+            setattr(advisor, key, value)
+        db.session.commit()
+
+
+def test_revoked_admin_loses_admin_routes(app, api):
+    headers = token(api, *ADMIN)
+    assert api.get("/api/v1/students", headers=headers).status_code == 200  # cached from here on
+    set_advisor(app, ADMIN[0], is_admin=False)
+    assert api.post("/api/v1/activities", json={"name": "X"}, headers=headers).status_code == 403
+    assert api.get("/api/v1/students", headers=headers).status_code == 200  # still an advisor
+    assert api.get("/api/v1/me", headers=headers).get_json()["role"] == "advisor"
+
+
+def test_deactivated_advisor_token_is_revoked(app, api):
+    headers = token(api, "advisor1@example.com")
+    assert api.get("/api/v1/students", headers=headers).status_code == 200
+    set_advisor(app, "advisor1@example.com", status="Rejected")
+    r = api.get("/api/v1/students", headers=headers)
+    assert r.status_code == 401 and r.get_json() == {"error": "Token revoked"}
+
+    set_advisor(app, "advisor1@example.com", status="Approved")
+    assert api.get("/api/v1/students", headers=headers).status_code == 200
+
+    pytest.importorskip("aiosqlite")
+    from starlette.testclient import TestClient
+    from website.async_api import create_asgi_app
+
+    set_advisor(app, "advisor1@example.com", status="Pending")
+    with TestClient(create_asgi_app(app)) as client:
+        assert client.get("/api/v1/students/1/activities", headers=headers).status_code == 401
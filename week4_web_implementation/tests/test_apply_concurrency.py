@@ -0,0 +1,60 @@
+# Concurrent duplicate submissions must yield exactly one active application.
+
+import threading
+from collections import Counter
+
+import pytest
+from sqlalchemy import func
+
+from website import db
+from website.api import create_token
+from website.models import Activity, Participation, Students
+from website.stats import counts_for
+
+THREADS = 8
+ACTIVITIES = 5
+
+
+def submit_together(app, headers, activity_id):
+    # THREADS clients released by a barrier POST the same application at once
+    statuses = Counter()
+    lock = threading.Lock()
+    barrier = threading.Barrier(THREADS)
+
+    def submit():
+        client = app.test_client()
+        barrier.wait()
+        r = client.post("/api/v1/participations", json={"activityID": activity_id}, headers=headers)
+        with lock:
+            statuses[r.status_code] += 1
+
+    threads = [threading.Thread(target=submit) for _ in range(THREADS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return statuses
+
+
+@pytest.fixture
+def student(app):
+    with app.app_context():
+        student = Students(studentFirstName="Stress", studentLastName="Test",
+                           studentEmail="stress@example.com", studentPassword="x")
+        db.session.add(student)
+        db.session.add_all(Activity(activityName=f"Activity {i}") for i in range(ACTIVITIES))
+        db.session.commit()
+        return {"Authorization": f"Bearer {create_token(student)}"}
+
+
+def test_one_application_wins(app, student):
+    for activity_id in range(1, ACTIVITIES + 1):
+        assert submit_together(app, student, activity_id) == {201: 1, 409: THREADS - 1}
+
+    with app.app_context():
+        worst = db.session.query(func.count()).select_from(Participation).group_by(
+            Participation.studentID, Participation.activityID
+        ).order_by(func.count().desc()).limit(1).scalar()
+        assert worst == 1
+        # the summary counters saw one insert per activity
+        assert counts_for("all").get("Pending", 0) == ACTIVITIES
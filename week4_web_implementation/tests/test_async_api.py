@@ -0,0 +1,46 @@
+import asyncio
+
+import pytest
+
+from conftest import seed
+
+pytest.importorskip("aiosqlite")
+from starlette.testclient import TestClient  # noqa: E402
+
+from website.async_api import create_asgi_app  # noqa: E402
+
+
+@pytest.fixture
+def app(app):
+    seed(app, students=3, advisors=1, activities=5, per_student=1)
+    return app
+
+
+def headers(app):
+    r = app.test_client().post("/api/v1/login", json={"email": "student1@example.com", "password": "secret"})
+    return {"Authorization": f"Bearer {r.get_json()['token']}"}
+
+
+def test_cache_calls_stay_off_the_event_loop(app):
+    backend = app.extensions["response_cache"]
+    calls = []
+
+    class Recording:
+        def __getattr__(self, name):
+            def call(*args, **kwargs):
+                try:
+                    asyncio.get_running_loop()
+                    calls.append((name, "event loop"))
+                except RuntimeError:
+                    calls.append((name, "thread"))
+                return getattr(backend, name)(*args, **kwargs)
+            return call
+
+    app.extensions["response_cache"] = Recording()
+    auth = headers(app)
+    with TestClient(create_asgi_app(app)) as client:
+        for path in ("/api/v1/activities", "/api/v1/activities", "/api/v1/activities/1", "/api/v1/activities/1"):
+            r = client.get(path, headers=auth)
+            assert r.status_code == 200
+            assert r.content == app.test_client().get(path, headers=auth).data
+    assert calls and {where for _, where in calls} == {"thread"}
@@ -0,0 +1,72 @@
+import pytest
+
+from conftest import seed
+from website import db
+from website.api import create_token
+from website.models import Advisor, Participation, Students
+
+
+@pytest.fixture
+def setup(app):
+    seed(app, students=10, advisors=2, activities=5, per_student=3)
+    with app.app_context():
+        advisor = Advisor.query.filter_by(advisorEmail="advisor1@example.com").one()
+        headers = {
+            "student": create_token(Students.query.first()),
+            "advisor": create_token(advisor),
+            "admin": create_token(Advisor.query.filter_by(is_admin=True).one()),
+        }
+        pending = Participation.query.filter_by(applicationStatus="Pending")
+        mine = [p.participationID for p in pending.filter_by(advisorID=advisor.advisorID)]
+        other = [p.participationID for p in pending.filter(Participation.advisorID != advisor.advisorID)]
+    client = app.test_client()
+    return client, {k: {"Authorization": f"Bearer {v}"} for k, v in headers.items()}, mine, other
+
+
+def status(app, pid):
+    with app.app_context():
+        return db.session.get(Participation, pid).applicationStatus
+
+
+def test_students_cannot_batch_update(app, setup):
+    client, headers, mine, _ = setup
+    r = client.patch("/api/v1/participations", json=[{"id": mine[0], "status": "Approved"}],
+                     headers=headers["student"])
+    assert r.status_code == 403
+    assert status(app, mine[0]) == "Pending"
+
+
+def test_advisor_batch_is_limited_to_their_requests(app, setup):
+    client, headers, mine, other = setup
+    r = client.patch("/api/v1/participations", json=[
+        {"id": mine[0], "status": "Approved"},
+        {"id": other[0], "status": "Rejected"},
+    ], headers=headers["advisor"])
+    assert r.status_code == 200
+    results = r.get_json()["results"]
+    assert results[0]["ok"] and results[0]["status"] in ("Approved", "Waitlisted")
+    assert results[1] == {"id": other[0], "ok": False, "error": "Participation not found"}
+    assert status(app, other[0]) == "Pending"
+
+
+def test_admin_batch_covers_every_advisor(app, setup):
+    client, headers, mine, other = setup
+    r = client.patch("/api/v1/participations", json=[{"id": other[0], "status": "Rejected"}],
+                     headers=headers["admin"])
+    assert r.get_json()["updated"] == 1
+    assert status(app, other[0]) == "Rejected"
+
+
+def test_duplicate_ids_are_rejected(app, setup):
+    client, headers, mine, _ = setup
+    r = client.patch("/api/v1/participations", json=[
+        {"id": mine[0], "status": "Rejected"},
+        {"id": mine[0], "status": "Approved"},
+    ], headers=headers["advisor"])
+    body = r.get_json()
+    assert body["updated"] == 1
+    assert body["results"] == [
+        {"id": mine[0], "ok": True, "status": "Rejected"},
+        {"id": mine[0], "ok": False, "error": "Duplicate id in this batch"},
+    ]
+    assert status(app, mine[0]) == "Rejected"
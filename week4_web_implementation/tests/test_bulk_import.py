@@ -0,0 +1,111 @@
+import io
+import json
+import threading
+import time
+
+from werkzeug.security import check_password_hash
+
+from conftest import login
+from website import bulk_import, db, passwords
+from website.bulk_import import import_rows, read_rows
+from website.jobs import run_next
+from website.models import Job, Students
+
+
+def upload(client, entity, name, data):
+    return client.post("/admin/import", data={
+        "entity": entity,
+        "file": (io.BytesIO(data), name),
+    }, content_type="multipart/form-data")
+
+
+def drain(app):
+    with app.app_context():
+        while run_next() is not None:
+            pass
+
+
+def student(i):
+    return {"firstName": "Imported", "lastName": str(i), "email": f"imported{i}@example.com", "password": "pw"}
+
+
+def import_via_upload(app, name, data):
+    # -> the report page once the queued job has run
+    client = login(app, "atmin@anjay.com", "atmindatang")
+    r = upload(client, "students", name, data)
+    assert r.status_code == 302
+    assert client.get(r.location).data.count(b"Importing") == 1
+    drain(app)
+    return client.get(r.location)
+
+
+def test_upload_imports_rows(app):
+    rows = "\n".join(json.dumps(student(i)) for i in range(3)).encode()
+    r = import_via_upload(app, "students.jsonl", rows)
+    assert b"students: 3 imported, 0 rejected" in r.data
+    with app.app_context():
+        assert Students.query.count() == 3
+        assert Job.query.filter_by(name="import.file").one().status == "done"
+
+
+def test_malformed_csv_is_reported(app):
+    data = ("firstName,lastName,email,password\n"
+            "Ok,Row,ok@example.com,pw\n"
+            'Bad,Row,bad@example.com,"' + "x" * 200000 + '"\n').encode()
+    r = import_via_upload(app, "students.csv", data)
+    assert b"malformed CSV" in r.data
+    with app.app_context():
+        assert Students.query.count() == 1
+
+
+def test_malformed_json_stops_without_buffering_the_file(app, monkeypatch):
+    monkeypatch.setattr(bulk_import, "MAX_JSON_ROW_SIZE", 1000)
+    data = ("[" + json.dumps(student(1)) + ", {broken, " + json.dumps(student(2)) * 5000 + "]").encode()
+    read = []
+
+    class Stream(io.BytesIO):
+        def read1(self, size=-1):
+            chunk = super().read1(size)
+            read.append(len(chunk))
+            return chunk
+
+    with app.app_context():
+        report = import_rows("students", read_rows(Stream(data), "json"), workers=0)
+        assert read and sum(read) < len(data)
+        assert report.inserted == 1
+        assert report.errors == [(None, "stopped reading: row 2: not valid JSON within 1000 characters")]
+        assert db.session.query(Students).count() == 1
+
+
+def test_upload_at_production_hash_cost(make_app, monkeypatch):
+    # the default pbkdf2:sha256:600000: the request only stores the file,
+    # and the job hashes on the password service's threads
+    app = make_app(PASSWORD_HASH_METHOD=passwords.DEFAULTS["PASSWORD_HASH_METHOD"], PASSWORD_HASH_WORKERS=2)
+    threads = []
+    hash_password = passwords.generate_password_hash
+
+    def recording(*args, **kwargs):
+        threads.append(threading.current_thread().name)
+        return hash_password(*args, **kwargs)
+
+    monkeypatch.setattr(passwords, "generate_password_hash", recording)
+    with app.app_context():
+        start = time.perf_counter()
+        passwords.hash_password("pw")
+        one_hash = time.perf_counter() - start
+    threads.clear()
+
+    client = login(app, "atmin@anjay.com", "atmindatang")
+    rows = "\n".join(json.dumps(student(i)) for i in range(4)).encode()
+    start = time.perf_counter()
+    r = upload(client, "students", "students.jsonl", rows)
+    assert r.status_code == 302
+    assert time.perf_counter() - start < one_hash
+    assert threads == []
+
+    drain(app)
+    assert b"students: 4 imported, 0 rejected" in client.get(r.location).data
+    assert len(threads) == 4 and all(name.startswith("pwhash") for name in threads)
+    with app.app_context():
+        stored = Students.query.filter_by(studentEmail="imported0@example.com").one().studentPassword
+    assert stored.startswith("pbkdf2:sha256:600000$") and check_password_hash(stored, "pw")
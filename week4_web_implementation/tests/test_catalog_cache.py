@@ -0,0 +1,112 @@
+import pytest
+from sqlalchemy import select
+
+from conftest import login, seed
+from website import db
+from website.models import Activity
+
+ADMIN = ("atmin@anjay.com", "atmindatang")
+
+
+def token(client, email, password="secret"):
+    r = client.post("/api/v1/login", json={"email": email, "password": password})
+    return {"Authorization": f"Bearer {r.get_json()['token']}"}
+
+
+class Catalog:
+    # what a student sees: the HTML table, the JSON listing and one JSON detail
+    def __init__(self, app):
+        self.html = login(app, "student1@example.com")
+        self.api = app.test_client()
+        self.headers = token(self.api, "student1@example.com")
+
+    def names(self):
+        page = self.html.get("/activities").text
+        items = self.api.get("/api/v1/activities", headers=self.headers).get_json()["items"]
+        return page, [a["name"] for a in items]
+
+    def detail(self, activity_id):
+        return self.api.get(f"/api/v1/activities/{activity_id}", headers=self.headers)
+
+
+class AdminPages:
+    def __init__(self, app):
+        self.client = login(app, *ADMIN)
+
+    def create(self, name):
+        self.client.post("/admin/activities/add", data={"name": name, "category": "Club"})
+
+    def update(self, activity_id, name):
+        self.client.post(f"/admin/activities/edit/{activity_id}", data={"name": name, "category": "Club"})
+
+    def delete(self, activity_id):
+        self.client.get(f"/admin/activities/delete/{activity_id}")
+
+
+class AdminApi:
+    def __init__(self, app):
+        self.client = app.test_client()
+        self.headers = token(self.client, *ADMIN)
+
+    def create(self, name):
+        r = self.client.post("/api/v1/activities", json={"name": name, "category": "Club"}, headers=self.headers)
+        assert r.status_code == 201
+
+    def update(self, activity_id, name):
+        r = self.client.put(f"/api/v1/activities/{activity_id}", json={"name": name}, headers=self.headers)
+        assert r.status_code == 200
+
+    def delete(self, activity_id):
+        r = self.client.delete(f"/api/v1/activities/{activity_id}", headers=self.headers)
+        assert r.status_code == 200
+
+
+@pytest.fixture(params=[AdminPages, AdminApi], ids=["admin", "api"])
+def writer(request, app):
+    seed(app, students=2, advisors=1, activities=3, per_student=1)
+    return request.param(app)
+
+
+def activity_id(app, name):
+    with app.app_context():
+        return db.session.scalar(select(Activity.activityID).where(Activity.activityName == name))
+
+
+def test_create_shows_up_in_cached_catalog(app, writer):
+    catalog = Catalog(app)
+    page, names = catalog.names()  # warm the cache
+    assert "Brand New" not in page and "Brand New" not in names
+
+    writer.create("Brand New")
+    page, names = catalog.names()
+    assert "Brand New" in page
+    assert "Brand New" in names
+
+
+def test_update_replaces_cached_catalog_and_detail(app, writer):
+    catalog = Catalog(app)
+    writer.create("Old Name")
+    target = activity_id(app, "Old Name")
+    catalog.names()
+    assert catalog.detail(target).get_json()["name"] == "Old Name"
+
+    writer.update(target, "New Name")
+    page, names = catalog.names()
+    assert "New Name" in page and "Old Name" not in page
+    assert "New Name" in names and "Old Name" not in names
+    assert catalog.detail(target).get_json()["name"] == "New Name"
+
+
+def test_delete_drops_cached_catalog_and_detail(app, writer):
+    catalog = Catalog(app)
+    writer.create("Short Lived")
+    target = activity_id(app, "Short Lived")
+    page, names = catalog.names()
+    assert "Short Lived" in page and "Short Lived" in names
+    assert catalog.detail(target).status_code == 200
+
+    writer.delete(target)
+    page, names = catalog.names()
+    assert "Short Lived" not in page
+    assert "Short Lived" not in names
+    assert catalog.detail(target).status_code == 404
@@ -0,0 +1,247 @@
+import json
+import threading
+
+from sqlalchemy.dialects import postgresql
+
+from conftest import login, seed
+from website import changes, db
+from website.models import Activity, Participation, Students
+
+
+class Recorder:
+    # stands in for a PostgreSQL connection; keeps the DDL it is given
+    dialect = postgresql.dialect()
+
+    def __init__(self):
+        self.statements = []
+
+    def exec_driver_sql(self, sql):
+        self.statements.append(sql)
+
+
+def test_postgresql_trigger_locks_before_drawing_a_seq():
+    conn = Recorder()
+    changes.create_triggers(conn)
+    functions = [sql for sql in conn.statements if sql.startswith("CREATE OR REPLACE FUNCTION")]
+    assert len(functions) == len(changes.LOGGED)
+    for sql in functions:
+        lock = sql.index(f"pg_advisory_xact_lock({changes.SEQ_LOCK})")
+        assert lock < sql.index("INSERT INTO")
+
+
+def test_readers_never_skip_a_seq_under_concurrent_writers(app):
+    # each activity is logged exactly once, so a reader that moved past a
+    # seq before its transaction committed would never see that activity
+    with app.app_context():
+        start = changes.latest_seq()
+
+    done = threading.Event()
+    seen = set()
+
+    def writer(w):
+        with app.app_context():
+            for n in range(25):
+                db.session.add(Activity(activityName=f"W{w}-{n}"))
+                db.session.commit()
+
+    def reader():
+        after = start
+        with app.app_context():
+            while True:
+                finished = done.is_set()
+                page = changes.sync(1, after, 1000)
+                seen.update(c["id"] for c in page["changes"] if c["entity"] == "activity")
+                after = page["next"]
+                db.session.remove()
+                if finished:
+                    return
+
+    writers = [threading.Thread(target=writer, args=(w,)) for w in range(4)]
+    read = threading.Thread(target=reader)
+    read.start()
+    for t in writers:
+        t.start()
+    for t in writers:
+        t.join()
+    done.set()
+    read.join()
+
+    with app.app_context():
+        assert seen == set(db.session.scalars(db.select(Activity.activityID)))
+        assert len(seen) == 100
+
+
+# ---------------- SYNC API ---------------- #
+
+def sync_client(app):
+    seed(app, students=2, advisors=1, activities=3, per_student=1)
+    client = app.test_client()
+    r = client.post("/api/v1/login", json={"email": "student1@example.com", "password": "secret"})
+    headers = {"Authorization": f"Bearer {r.get_json()['token']}"}
+
+    def get(since=None, **params):
+        if since is not None:
+            params["since"] = since
+        return client.get("/api/v1/sync", query_string=params, headers=headers)
+    return get
+
+
+def change(app, fn):
+    with app.app_context():
+        fn()
+        db.session.commit()
+
+
+def test_sync_bootstrap_returns_only_the_cursor(app):
+    get = sync_client(app)
+    with app.app_context():
+        latest = changes.latest_seq()
+    assert latest > 0
+    assert get().get_json() == {"changes": [], "next": latest, "more": False}
+    assert get(latest).get_json() == {"changes": [], "next": latest, "more": False}
+
+
+def test_sync_collapses_repeated_changes(app):
+    get = sync_client(app)
+    since = get().get_json()["next"]
+
+    def rename():
+        activity = db.session.get(Activity, 1)
+        activity.activityName = "First"
+        db.session.flush()
+        activity.activityName = "Second"
+    change(app, rename)
+    change(app, lambda: setattr(db.session.get(Activity, 1), "activityName", "Third"))
+
+    body = get(since).get_json()
+    assert [(c["entity"], c["id"], c["op"]) for c in body["changes"]] == [("activity", 1, "upsert")]
+    assert body["changes"][0]["data"]["name"] == "Third"
+    assert body["changes"][0]["seq"] == body["next"]
+
+
+def test_sync_sends_tombstones_for_deleted_rows(app):
+    get = sync_client(app)
+    since = get().get_json()["next"]
+    change(app, lambda: db.session.add(Activity(activityName="Short lived")))
+    with app.app_context():
+        activity_id = db.session.scalar(db.select(db.func.max(Activity.activityID)))
+    change(app, lambda: db.session.delete(db.session.get(Activity, activity_id)))
+
+    body = get(since).get_json()
+    assert [(c["entity"], c["id"], c["op"]) for c in body["changes"]] == [("activity", activity_id, "delete")]
+    assert "data" not in body["changes"][0]
+
+
+def test_sync_only_sends_the_students_own_rows(app):
+    get = sync_client(app)
+    since = get().get_json()["next"]
+    with app.app_context():
+        mine = Participation.query.filter_by(studentID=1).first().participationID
+        theirs = Participation.query.filter_by(studentID=2).first().participationID
+
+    def edit():
+        db.session.get(Students, 1).studentFirstName = "Me"
+        db.session.get(Students, 2).studentFirstName = "Someone"
+        db.session.get(Participation, mine).advisorFeedback = "Mine"
+        db.session.get(Participation, theirs).advisorFeedback = "Theirs"
+    change(app, edit)
+
+    got = {(c["entity"], c["id"]): c for c in get(since).get_json()["changes"]}
+    assert set(got) == {("students", 1), ("participation", mine)}
+    assert got["students", 1]["data"]["firstName"] == "Me"
+
+    # a participation handed to another student disappears from this one
+    since = get().get_json()["next"]
+    change(app, lambda: setattr(db.session.get(Participation, mine), "studentID", 2))
+    assert [(c["entity"], c["id"], c["op"]) for c in get(since).get_json()["changes"]] == \
+        [("participation", mine, "delete")]
+
+
+def test_sync_pages_with_more(app):
+    get = sync_client(app)
+    since = get().get_json()["next"]
+    for i in (1, 2, 3):
+        change(app, lambda i=i: setattr(db.session.get(Activity, i), "activityName", f"Renamed {i}"))
+
+    ids = []
+    while True:
+        body = get(since, limit=1).get_json()
+        ids += [c["id"] for c in body["changes"]]
+        since = body["next"]
+        if not body["more"]:
+            break
+    assert ids == [1, 2, 3]
+
+
+def test_sync_expired_cursor_is_410(app):
+    get = sync_client(app)
+    assert get("x").status_code == 400
+    with app.app_context():
+        with db.engine.begin() as conn:
+            conn.execute(changes.log.delete().where(changes.log.c.seq <= 5))
+        latest = changes.latest_seq()
+
+    r = get(0)
+    assert r.status_code == 410
+    assert r.get_json()["next"] == latest
+    assert get(5).status_code == 200
+
+
+# ---------------- ADVISOR FEED ---------------- #
+
+def events(body):
+    # -> [(id, event, data)] from a text/event-stream body
+    parsed = []
+    for block in body.split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if ": " in line and not line.startswith(":"))
+        if "event" in fields:
+            parsed.append((int(fields["id"]), fields["event"], json.loads(fields["data"])))
+    return parsed
+
+
+def feed_setup(app):
+    seed(app, students=3, advisors=2, activities=3, per_student=2)
+    with app.app_context():
+        mine = Participation.query.filter_by(advisorID=2).order_by(Participation.participationID).all()
+        theirs = Participation.query.filter_by(advisorID=3).first()
+        return changes.latest_seq(), [p.participationID for p in mine], theirs.participationID
+
+
+def test_advisor_changes_lists_the_advisors_rows_once(app):
+    since, mine, theirs = feed_setup(app)
+    change(app, lambda: setattr(db.session.get(Participation, mine[0]), "advisorFeedback", "a"))
+    change(app, lambda: setattr(db.session.get(Participation, theirs), "advisorFeedback", "b"))
+    change(app, lambda: setattr(db.session.get(Participation, mine[1]), "advisorFeedback", "c"))
+    change(app, lambda: setattr(db.session.get(Participation, mine[0]), "advisorFeedback", "d"))
+
+    with app.app_context():
+        last, ids = changes.advisor_changes(2, since)
+        assert ids == [mine[0], mine[1]]
+        assert last == changes.latest_seq()
+        assert changes.advisor_changes(2, last) == (last, [])
+
+
+def test_feed_replays_after_last_event_id(make_app):
+    app = make_app(FEED_STREAM_SECONDS=0)
+    since, mine, _ = feed_setup(app)
+    client = login(app, "advisor1@example.com")
+
+    change(app, lambda: setattr(db.session.get(Participation, mine[0]), "advisorFeedback", "first"))
+    with app.app_context():
+        first_seq = changes.latest_seq()
+    change(app, lambda: setattr(db.session.get(Participation, mine[1]), "advisorFeedback", "second"))
+    change(app, lambda: setattr(db.session.get(Participation, mine[0]), "advisorID", 3))  # moved away
+    with app.app_context():
+        latest = changes.latest_seq()
+
+    full = events(client.get(f"/advisor/feed?since={since}").get_data(as_text=True))
+    assert [(e, d["id"]) for _, e, d in full if e != "counts"] == [("removed", mine[0]), ("participation", mine[1])]
+    assert "second" in full[1][2]["html"]
+    assert full[-1][1] == "counts" and all(seq == latest for seq, _, _ in full)
+
+    # a reconnect resends Last-Event-ID, which wins over ?since
+    replay = events(client.get(f"/advisor/feed?since={since}",
+                               headers={"Last-Event-ID": str(first_seq)}).get_data(as_text=True))
+    assert [(e, d["id"]) for _, e, d in replay if e != "counts"] == [("participation", mine[1]), ("removed", mine[0])]
+    caught_up = client.get("/advisor/feed", headers={"Last-Event-ID": str(latest)}).get_data(as_text=True)
+    assert events(caught_up) == [] and ": keep-alive" in caught_up
@@ -0,0 +1,53 @@
+from conftest import login
+from website import db
+from website.identity import load_user
+from website.models import Advisor, Students
+
+
+def cached(app, key):
+    return app.extensions["identity_cache"]._data.get(key) is not None
+
+
+def test_update_invalidates_after_commit(app):
+    client = login(app, "atmin@anjay.com", "atmindatang")
+    client.get("/admin/")
+    with app.app_context():
+        admin = Advisor.query.filter_by(is_admin=True).one()
+        key = admin.id
+        assert cached(app, key)
+
+        admin.advisorName = "Renamed"
+        db.session.flush()
+        # flushed but not committed: a reader would still see the old row
+        assert cached(app, key)
+        db.session.commit()
+        assert not cached(app, key)
+        assert load_user(key).advisorName == "Renamed"
+
+
+def test_rolled_back_change_keeps_entry(app):
+    client = login(app, "atmin@anjay.com", "atmindatang")
+    client.get("/admin/")
+    with app.app_context():
+        admin = Advisor.query.filter_by(is_admin=True).one()
+        admin.advisorName = "Renamed"
+        db.session.flush()
+        db.session.rollback()
+        assert cached(app, admin.id)
+
+
+def test_delete_invalidates_after_commit(app):
+    with app.app_context():
+        student = Students(studentFirstName="A", studentLastName="B", studentEmail="ab@example.com")
+        db.session.add(student)
+        db.session.commit()
+        key = student.id
+        load_user(key)
+        assert cached(app, key)
+
+        db.session.delete(student)
+        db.session.flush()
+        assert cached(app, key)
+        db.session.commit()
+        assert not cached(app, key)
+        assert load_user(key) is None
@@ -0,0 +1,42 @@
+import threading
+
+from conftest import count_queries
+from website import db
+from website.jobs import enqueue, handler, run_next
+from website.models import Job
+
+ran = []
+
+
+@handler("test.record")
+def record(value):
+    ran.append(value)
+
+
+def test_idle_poll_only_reads(app):
+    with count_queries(app) as statements, app.app_context():
+        assert run_next() is None
+    assert statements and all(s.lstrip().upper().startswith("SELECT") for s in statements)
+
+
+def test_each_job_runs_once_across_workers(app):
+    ran.clear()
+    with app.app_context():
+        for n in range(20):
+            enqueue("test.record", {"value": n})
+        db.session.commit()
+
+    def worker():
+        with app.app_context():
+            while run_next() is not None:
+                pass
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sorted(ran) == list(range(20))
+    with app.app_context():
+        assert {job.status for job in Job.query} == {"done"}
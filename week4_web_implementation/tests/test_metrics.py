@@ -0,0 +1,29 @@
+import pytest
+
+from conftest import login, seed
+
+
+@pytest.fixture
+def app(make_app):
+    app = make_app(METRICS_ENABLED=True, METRICS_TOKEN="scrape-token")
+    seed(app, students=2, advisors=1, activities=2, per_student=1)
+    return app
+
+
+def test_metrics_denied_by_default(app):
+    client = app.test_client()
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    assert login(app, "student1@example.com").get("/metrics").status_code == 401
+    assert login(app, "advisor1@example.com").get("/metrics").status_code == 401
+
+
+def test_metrics_for_admin_or_token(app):
+    r = app.test_client().get("/metrics", headers={"Authorization": "Bearer scrape-token"})
+    assert r.status_code == 200 and "http_request_duration_seconds" in r.text
+    assert login(app, "atmin@anjay.com", "atmindatang").get("/metrics").status_code == 200
+
+
+def test_metrics_without_token_config(make_app):
+    app = make_app(METRICS_ENABLED=True)
+    assert app.test_client().get("/metrics", headers={"Authorization": "Bearer None"}).status_code == 401
@@ -0,0 +1,102 @@
+import re
+
+import pytest
+from sqlalchemy import func, inspect, select
+
+from website import db
+from website.migrations import MigrationError, explain, hot_queries, schema_migrations, upgrade
+from website.models import Activity, ChangeLog, Students
+
+
+@pytest.mark.parametrize("label, stmt", hot_queries(), ids=[label for label, _ in hot_queries()])
+def test_hot_query_uses_index(app, label, stmt):
+    with app.app_context(), db.engine.connect() as conn:
+        details, uses_index = explain(conn, stmt)
+    assert uses_index, details
+
+
+def downgrade_email_index(app):
+    # what 0001 used to leave behind when it found duplicate emails
+    with app.app_context(), db.engine.begin() as conn:
+        conn.exec_driver_sql('DROP INDEX "ix_students_studentEmail"')
+        conn.exec_driver_sql('CREATE INDEX "ix_students_studentEmail" ON students ("studentEmail")')
+        conn.execute(schema_migrations.delete().where(schema_migrations.c.name == "0009_enforce_unique_emails"))
+
+
+def email_index(app):
+    with app.app_context():
+        return next(ix for ix in inspect(db.engine).get_indexes("students")
+                    if ix["name"] == "ix_students_studentEmail")
+
+
+def test_upgrade_makes_email_index_unique(app):
+    downgrade_email_index(app)
+    assert not email_index(app)["unique"]
+    with app.app_context():
+        assert upgrade(db.engine) == ["0009_enforce_unique_emails"]
+    assert email_index(app)["unique"]
+
+
+def test_duplicate_emails_fail_the_upgrade(app):
+    downgrade_email_index(app)
+    with app.app_context():
+        db.session.add_all(
+            Students(studentFirstName="Dup", studentLastName=str(i), studentEmail="dup@example.com")
+            for i in range(2)
+        )
+        db.session.commit()
+
+        with pytest.raises(MigrationError, match="dup@example.com"):
+            upgrade(db.engine)
+    assert not email_index(app)["unique"]
+
+    runner = app.test_cli_runner()
+    status = runner.invoke(args=["db", "status"])
+    assert "[ ] 0009_enforce_unique_emails" in status.output
+    assert "WARNING: ix_students_studentEmail is not unique" in status.output
+    result = runner.invoke(args=["db", "upgrade"])
+    assert result.exit_code != 0
+    assert "dup@example.com" in result.output
+
+
+def downgrade_update_triggers(app):
+    # before 0010 the activity triggers fired on any UPDATE
+    with app.app_context(), db.engine.begin() as conn:
+        for name in ("change_log_activity_au", "activity_fts_au"):
+            sql = conn.exec_driver_sql("SELECT sql FROM sqlite_master WHERE name = ?", (name,)).scalar()
+            conn.exec_driver_sql(f"DROP TRIGGER {name}")
+            conn.exec_driver_sql(re.sub(r"AFTER UPDATE OF .*? ON ", "AFTER UPDATE ON ", sql, count=1))
+        conn.execute(schema_migrations.delete().where(
+            schema_migrations.c.name == "0010_update_triggers_on_synced_columns"))
+
+
+def activity_log_entries():
+    return db.session.execute(
+        select(func.count()).select_from(ChangeLog).where(ChangeLog.entity == "activity")
+    ).scalar()
+
+
+@pytest.mark.parametrize("downgraded", [False, True])
+def test_seat_updates_skip_activity_triggers(app, downgraded):
+    if downgraded:
+        downgrade_update_triggers(app)
+        with app.app_context():
+            assert upgrade(db.engine) == ["0010_update_triggers_on_synced_columns"]
+
+    with app.app_context():
+        db.session.add(Activity(activityName="Chess Club", capacity=5))
+        db.session.commit()
+        logged = activity_log_entries()
+        with db.engine.begin() as conn:
+            fts_changes = conn.exec_driver_sql("SELECT total_changes()").scalar()
+            conn.execute(Activity.__table__.update().values(seatsTaken=Activity.seatsTaken + 1))
+            # one row changed, and no trigger wrote anything else
+            assert conn.exec_driver_sql("SELECT total_changes()").scalar() == fts_changes + 1
+        assert activity_log_entries() == logged
+
+        db.session.get(Activity, 1).activityName = "Go Club"
+        db.session.commit()
+        assert activity_log_entries() == logged + 1
+        assert db.session.execute(
+            select(func.count()).select_from(db.text("activity_fts")).where(db.text("activity_fts MATCH 'go'"))
+        ).scalar() == 1
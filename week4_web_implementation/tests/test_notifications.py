@@ -0,0 +1,18 @@
+from conftest import login, seed
+
+STREAM = b"/notifications/stream"
+UNREAD = b"/notifications/unread-count"
+
+
+def test_only_the_dashboard_opens_the_stream(app):
+    seed(app, students=2, advisors=1, activities=3, per_student=1)
+    client = login(app, "student1@example.com")
+
+    page = client.get("/dashboard").data
+    assert STREAM in page and UNREAD not in page
+
+    for path in ("/activities", "/activity-history"):
+        page = client.get(path).data
+        assert STREAM not in page and UNREAD in page
+
+    assert "count" in client.get("/notifications/unread-count").get_json()
@@ -0,0 +1,46 @@
+import pytest
+
+from conftest import seed
+from website.api import create_token
+from website.models import Students
+from website.pagination import encode_cursor
+
+
+@pytest.fixture
+def api(app):
+    seed(app, students=5, advisors=2, activities=12, per_student=2)
+    with app.app_context():
+        token = create_token(Students.query.first())
+    client = app.test_client()
+    client.headers = {"Authorization": f"Bearer {token}"}
+    return client
+
+
+def get(api, url):
+    return api.get(url, headers=api.headers)
+
+
+def test_cursor_round_trip(api):
+    first = get(api, "/api/v1/activities?sort=name&limit=5").get_json()
+    second = get(api, f"/api/v1/activities?sort=name&limit=5&cursor={first['next_cursor']}").get_json()
+    names = [a["name"] for a in first["items"] + second["items"]]
+    assert names == sorted(names)
+    assert len(set(names)) == 10
+
+
+@pytest.mark.parametrize("values", [
+    ["Chess Club 1", "7"],        # pk must be an integer
+    ["Chess Club 1", True],
+    [{"$gt": ""}, 7],             # sort value must be a string for a text column
+    [["a", "b"], 7],
+    [12, 7],
+    ["Chess Club 1", 7, 8],
+])
+def test_cursor_values_are_type_checked(api, values):
+    r = get(api, f"/api/v1/activities?sort=name&cursor={encode_cursor(values)}")
+    assert r.status_code == 400
+    assert r.get_json() == {"error": "Invalid cursor"}
+
+
+def test_malformed_cursor(api):
+    assert get(api, "/api/v1/activities?cursor=not-base64!").status_code == 400
@@ -0,0 +1,37 @@
+import pytest
+from werkzeug.security import generate_password_hash
+
+from website.models import Advisor
+from website.passwords import PasswordService, stored_method
+
+
+def service(method):
+    return PasswordService(method, salt_length=8, workers=1, queue=None, timeout=1)
+
+
+@pytest.mark.parametrize("method", [
+    "scrypt", "scrypt:16384:8:1", "pbkdf2", "pbkdf2:sha256", "pbkdf2:sha256:1000", "pbkdf2:sha512:2000",
+])
+def test_fresh_hash_does_not_need_rehash(method):
+    svc = service(method)
+    stored = svc.hash("secret")
+    assert stored.split("$")[0] == stored_method(method)
+    assert not svc.needs_rehash(stored)
+
+
+def test_changed_parameters_need_rehash():
+    svc = service("pbkdf2:sha256:2000")
+    assert svc.needs_rehash(generate_password_hash("secret", "pbkdf2:sha256:1000"))
+    assert svc.needs_rehash(generate_password_hash("secret", "scrypt"))
+    assert not svc.needs_rehash(generate_password_hash("secret", "pbkdf2:sha256:2000"))
+
+
+def test_login_does_not_rewrite_current_hash(make_app):
+    app = make_app(PASSWORD_HASH_METHOD="scrypt:1024:8:1")
+    client = app.test_client()
+    with app.app_context():
+        before = Advisor.query.filter_by(is_admin=True).one().advisorPassword
+        assert before.startswith("scrypt:1024:8:1$")
+    client.post("/auth/login", data={"email": "atmin@anjay.com", "password": "atmindatang"})
+    with app.app_context():
+        assert Advisor.query.filter_by(is_admin=True).one().advisorPassword == before
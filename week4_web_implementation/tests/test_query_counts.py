@@ -0,0 +1,66 @@
+# Page renders must cost a fixed number of SQL statements, however many
+# rows they list (no N+1 over relationships).
+
+from sqlalchemy import func, select
+
+from conftest import count_queries, login, seed
+from website import db
+from website.models import Advisor, Participation, Students
+
+SMALL = {"students": 20, "advisors": 3, "activities": 10, "per_student": 3}
+LARGE = {name: n * 10 if name != "per_student" else n for name, n in SMALL.items()}
+
+PAGES = {
+    "student": ["/dashboard", "/activity-history"],
+    "advisor": ["/advisor/dashboard"],
+    "admin": ["/admin/", "/admin/students", "/admin/activities", "/admin/participations"],
+}
+
+
+def busiest_users(app):
+    with app.app_context():
+        student_id = db.session.execute(
+            select(Participation.studentID).group_by(Participation.studentID)
+            .order_by(func.count().desc()).limit(1)
+        ).scalar()
+        advisor_id = db.session.execute(
+            select(Participation.advisorID).group_by(Participation.advisorID)
+            .order_by(func.count().desc()).limit(1)
+        ).scalar()
+        return {
+            "student": (db.session.get(Students, student_id).studentEmail, "secret"),
+            "advisor": (db.session.get(Advisor, advisor_id).advisorEmail, "secret"),
+            "admin": ("atmin@anjay.com", "atmindatang"),
+        }
+
+
+def page_queries(make_app, scale):
+    app = make_app()
+    seed(app, **scale)
+    users = busiest_users(app)
+    counts = {}
+    for role, urls in PAGES.items():
+        client = login(app, *users[role])
+        for url in urls:
+            # the first render fills the identity and response caches
+            assert client.get(url).status_code == 200
+            with count_queries(app) as statements:
+                assert client.get(url).status_code == 200
+            counts[url] = len(statements)
+    return counts
+
+
+def test_query_count_does_not_grow_with_rows(make_app):
+    small = page_queries(make_app, SMALL)
+    large = page_queries(make_app, LARGE)
+    assert large == small
+
+
+def test_participations_listing_is_not_n_plus_one(make_app):
+    app = make_app()
+    seed(app, **LARGE)
+    client = login(app, "atmin@anjay.com", "atmindatang")
+    client.get("/admin/participations")
+    with count_queries(app) as statements:
+        client.get("/admin/participations")
+    assert len(statements) <= 5
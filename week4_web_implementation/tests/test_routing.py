@@ -0,0 +1,100 @@
+import sqlite3
+import time
+
+import pytest
+from sqlalchemy import select, update
+
+from conftest import seed
+from website import db
+from website.models import Activity
+from website.routing import copy_sqlite
+from website.tokens import token_required
+
+
+@pytest.fixture
+def replicated(make_app, tmp_path):
+    # primary and replica hold the same rows except activity 1's name
+    replica = tmp_path / "replica.db"
+    app = make_app(SQLALCHEMY_REPLICAS=[f"sqlite:///{replica}"], REPLICA_STICKY_SECONDS=1)
+    seed(app, students=2, advisors=1, activities=2, per_student=1)
+    with app.app_context():
+        db.engines["replica1"].dispose()
+        copy_sqlite(db.engine.url, db.engines["replica1"].url)
+        db.session.execute(update(Activity).where(Activity.activityID == 1).values(activityName="Primary"))
+        db.session.commit()
+        db.engines["replica1"].dispose()
+    with sqlite3.connect(replica) as conn:
+        conn.execute("UPDATE activity SET activityName = 'Replica' WHERE activityID = 1")
+
+    def name():
+        return db.session.scalar(select(Activity.activityName).where(Activity.activityID == 1))
+
+    def touch():
+        db.session.execute(update(Activity).where(Activity.activityID == 2).values(activityName="Touched"))
+
+    @app.get("/t/name")
+    def read_name():
+        return name()
+
+    @app.get("/t/write-then-read")
+    def write_then_read():
+        before = name()
+        touch()
+        return f"{before},{name()}"
+
+    @app.post("/t/write")
+    def write():
+        touch()
+        db.session.commit()
+        return "ok"
+
+    @app.get("/t/api/name")
+    @token_required
+    def api_read_name(user_id):
+        return name()
+
+    @app.post("/t/api/write")
+    @token_required
+    def api_write(user_id):
+        touch()
+        db.session.commit()
+        return "ok"
+
+    return app
+
+
+def test_get_reads_the_replica_and_other_methods_the_primary(replicated):
+    client = replicated.test_client()
+    assert client.get("/t/name").text == "Replica"
+    with replicated.test_request_context("/t/name", method="POST"):
+        assert db.session.scalar(select(Activity.activityName).where(Activity.activityID == 1)) == "Primary"
+
+
+def test_write_then_read_in_one_request_reads_the_primary(replicated):
+    assert replicated.test_client().get("/t/write-then-read").text == "Replica,Primary"
+
+
+def test_commit_pins_the_cookie_session_for_the_sticky_window(replicated):
+    client = replicated.test_client()
+    assert client.post("/t/write").text == "ok"
+    assert client.get("/t/name").text == "Primary"
+    # another browser is not pinned
+    assert replicated.test_client().get("/t/name").text == "Replica"
+    time.sleep(1.1)
+    assert client.get("/t/name").text == "Replica"
+
+
+def test_commit_pins_a_bearer_token_without_cookies(replicated):
+    client = replicated.test_client(use_cookies=False)
+
+    def bearer(email):
+        r = client.post("/api/v1/login", json={"email": email, "password": "secret"})
+        return {"Authorization": f"Bearer {r.get_json()['token']}"}
+
+    mine, other = bearer("student1@example.com"), bearer("student2@example.com")
+    assert client.get("/t/api/name", headers=mine).text == "Replica"
+    assert client.post("/t/api/write", headers=mine).text == "ok"
+    assert client.get("/t/api/name", headers=mine).text == "Primary"
+    assert client.get("/t/api/name", headers=other).text == "Replica"
+    time.sleep(1.1)
+    assert client.get("/t/api/name", headers=mine).text == "Replica"
@@ -0,0 +1,130 @@
+# Seat capacity, the waitlist and apply() transaction handling.
+
+import threading
+from collections import Counter
+
+import pytest
+from sqlalchemy import func, select
+
+from website import db
+from website.api import create_token
+from website.applications import apply
+from website.models import Activity, Advisor, Participation, Students
+from website.stats import counts_for
+
+CAPACITY = 10
+STUDENTS = 50
+THREADS = 8
+WITHDRAW = 3
+
+
+def snapshot():
+    db.session.expire_all()
+    statuses = dict(db.session.execute(
+        select(Participation.applicationStatus, func.count()).group_by(Participation.applicationStatus)
+    ).all())
+    waitlist = db.session.scalars(
+        select(Participation.participationID)
+        .where(Participation.applicationStatus == "Waitlisted")
+        .order_by(Participation.waitlistedAt, Participation.participationID)
+    ).all()
+    return statuses, waitlist, db.session.get(Activity, 1).seatsTaken
+
+
+def assert_consistent(statuses, seats):
+    assert statuses.get("Approved", 0) == seats <= CAPACITY
+    assert {k: v for k, v in counts_for("all").items() if v} == statuses
+
+
+@pytest.fixture
+def applications(app):
+    # STUDENTS pending applications for one activity with CAPACITY seats
+    with app.app_context():
+        students = [
+            Students(studentFirstName="Stress", studentLastName=str(i),
+                     studentEmail=f"stress{i}@example.com", studentPassword="x")
+            for i in range(STUDENTS)
+        ]
+        db.session.add_all(students)
+        db.session.add(Activity(activityName="Limited", capacity=CAPACITY))
+        db.session.commit()
+        tokens = {s.studentID: {"Authorization": f"Bearer {create_token(s)}"} for s in students}
+        admin = {"Authorization": f"Bearer {create_token(Advisor.query.filter_by(is_admin=True).one())}"}
+        owners = {}
+        for student_id in tokens:
+            owners[apply(student_id, 1)] = student_id
+            db.session.commit()
+    return tokens, admin, owners
+
+
+def approve_concurrently(app, admin, pids):
+    responses = Counter()
+    lock = threading.Lock()
+    barrier = threading.Barrier(THREADS)
+
+    def advisor(n):
+        client = app.test_client()
+        barrier.wait()
+        for pid in pids[n::THREADS]:
+            r = client.put(f"/api/v1/participations/{pid}", json={"status": "Approved"}, headers=admin)
+            with lock:
+                responses[r.get_json().get("status", r.status_code)] += 1
+
+    threads = [threading.Thread(target=advisor, args=(n,)) for n in range(THREADS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return responses
+
+
+def test_concurrent_approvals_never_oversell(app, applications):
+    _, admin, owners = applications
+    responses = approve_concurrently(app, admin, sorted(owners))
+    assert responses == {"Approved": CAPACITY, "Waitlisted": STUDENTS - CAPACITY}
+    with app.app_context():
+        statuses, _, seats = snapshot()
+        assert statuses == {"Approved": CAPACITY, "Waitlisted": STUDENTS - CAPACITY}
+        assert_consistent(statuses, seats)
+
+
+def test_withdrawals_promote_the_waitlist_in_order(app, applications):
+    tokens, admin, owners = applications
+    approve_concurrently(app, admin, sorted(owners))
+    with app.app_context():
+        _, waitlist, _ = snapshot()
+        approved = db.session.scalars(
+            select(Participation.participationID).where(Participation.applicationStatus == "Approved")
+        ).all()
+
+    client = app.test_client()
+    for pid in approved[:WITHDRAW]:
+        r = client.post(f"/api/v1/participations/{pid}/withdraw", headers=tokens[owners[pid]])
+        assert r.status_code == 200
+
+    with app.app_context():
+        statuses, _, seats = snapshot()
+        assert_consistent(statuses, seats)
+        assert statuses["Withdrawn"] == WITHDRAW
+        promoted = [pid for pid in waitlist[:WITHDRAW]
+                    if db.session.get(Participation, pid).applicationStatus == "Approved"]
+        assert promoted == waitlist[:WITHDRAW]
+
+
+def test_apply_leaves_the_transaction_to_the_caller(app, applications):
+    _, _, owners = applications
+    with app.app_context():
+        db.session.add(Activity(activityName="Pending work"))
+        db.session.flush()
+        student_id = next(iter(owners.values()))
+
+        # a duplicate keeps the caller's pending work
+        assert apply(student_id, 1) is None
+        assert Activity.query.filter_by(activityName="Pending work").count() == 1
+
+        # a new application is undone with the caller's rollback
+        assert apply(student_id, 2) is not None
+        db.session.rollback()
+        assert Activity.query.filter_by(activityName="Pending work").count() == 0
+        assert Participation.query.filter_by(activityID=2).count() == 0
+        assert counts_for("all").get("Pending") == STUDENTS
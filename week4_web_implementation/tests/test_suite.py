@@ -0,0 +1,34 @@
+# The benchmark scenarios from benchmarks/run_suite.py, checked against the
+# committed baseline: no scenario may issue more SQL statements per request
+# than benchmarks/baseline.json records. Timings depend on the machine, so
+# only `python benchmarks/run_suite.py --compare` looks at those.
+
+import json
+
+import pytest
+
+from run_suite import BASELINE, create
+from synthetic import SCALES
+
+with open(BASELINE) as f:
+    baseline = json.load(f)
+
+
+@pytest.fixture(scope="module")
+def suite(tmp_path_factory):
+    path = tmp_path_factory.mktemp("suite") / "bench.db"
+    meta = baseline["meta"]
+    suite, _ = create(f"sqlite:///{path}", meta["hash_method"], meta["seed"], **SCALES[meta["scale"]])
+    return suite
+
+
+def test_baseline_covers_every_scenario(suite):
+    assert set(suite.scenarios) == set(baseline["results"])
+
+
+@pytest.mark.parametrize("name", sorted(baseline["results"]))
+def test_queries_within_baseline(suite, name):
+    # same number of requests as the baseline run: some scenarios take a
+    # different path once they cycle (cached searches, duplicate applications)
+    result = suite.measure(name, baseline["meta"]["iterations"], baseline["meta"]["warmup"])
+    assert result["queries"] <= baseline["results"][name]["queries"]
@@ -0,0 +1,75 @@
+# Duplicate emails hit the unique indexes from 0009: forms flash an error,
+# the API answers 409, and nothing is written.
+
+import pytest
+
+from conftest import login, seed
+from website import db
+from website.models import Advisor, Students
+
+ADMIN = ("atmin@anjay.com", "atmindatang")
+TAKEN_STUDENT = "student2@example.com"
+TAKEN_ADVISOR = "advisor2@example.com"
+
+
+@pytest.fixture
+def app(app):
+    seed(app, students=2, advisors=2, activities=2, per_student=1)
+    return app
+
+
+def token(app, email, password="secret"):
+    r = app.test_client().post("/api/v1/login", json={"email": email, "password": password})
+    return {"Authorization": f"Bearer {r.get_json()['token']}"}
+
+
+def emails(app, model, column):
+    with app.app_context():
+        return sorted(getattr(row, column) for row in model.query)
+
+
+def student_form(email):
+    return {"first_name": "Dup", "last_name": "Licate", "email": email, "year": "", "phone": "", "password": ""}
+
+
+@pytest.mark.parametrize("who, path", [
+    (ADMIN, "/admin/students/add"),
+    (ADMIN, "/admin/students/edit/1"),
+    (("student1@example.com",), "/profile"),
+])
+def test_student_forms_flash_duplicates(app, who, path):
+    before = emails(app, Students, "studentEmail")
+    client = login(app, *who)
+    r = client.post(path, data=student_form(TAKEN_STUDENT), follow_redirects=True)
+    assert r.status_code == 200
+    assert b"Email already registered." in r.data
+    assert emails(app, Students, "studentEmail") == before
+
+
+def test_advisor_profile_flashes_duplicates(app):
+    before = emails(app, Advisor, "advisorEmail")
+    client = login(app, "advisor1@example.com")
+    r = client.post("/advisor/profile", data={"name": "A", "email": TAKEN_ADVISOR, "role": "Coach", "schedule": ""},
+                    follow_redirects=True)
+    assert r.status_code == 200
+    assert b"Email already registered." in r.data
+    assert emails(app, Advisor, "advisorEmail") == before
+
+
+@pytest.mark.parametrize("who, method, path, body", [
+    (ADMIN, "post", "/api/v1/students",
+     {"firstName": "Dup", "lastName": "Licate", "email": TAKEN_STUDENT, "password": "x"}),
+    (ADMIN, "put", "/api/v1/students/1", {"email": TAKEN_STUDENT}),
+    (("student1@example.com",), "put", "/api/v1/students/1", {"email": TAKEN_STUDENT}),
+    (ADMIN, "post", "/api/v1/advisors",
+     {"name": "Dup", "email": TAKEN_ADVISOR, "role": "Coach", "officeLocation": "Gym",
+      "availableSchedule": "Mon", "password": "x"}),
+    (ADMIN, "put", "/api/v1/advisors/2", {"email": TAKEN_ADVISOR}),
+    (("advisor1@example.com",), "put", "/api/v1/advisors/2", {"email": TAKEN_ADVISOR}),
+])
+def test_api_answers_409(app, who, method, path, body):
+    before = emails(app, Students, "studentEmail"), emails(app, Advisor, "advisorEmail")
+    r = getattr(app.test_client(), method)(path, json=body, headers=token(app, *who))
+    assert r.status_code == 409
+    assert r.get_json() == {"error": "Email already registered"}
+    assert (emails(app, Students, "studentEmail"), emails(app, Advisor, "advisorEmail")) == before
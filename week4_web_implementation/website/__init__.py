@@ -1,53 +1,108 @@
-from flask import Flask
+from flask import Flask, request, jsonify, flash, redirect
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 
-db = SQLAlchemy()
+from .routing import RoutingSession
 
-def create_app():
+db = SQLAlchemy(session_options={"class_": RoutingSession})
+
+def create_app(test_config=None):
     app = Flask(__name__)
     app.config["SECRET_KEY"] = "AkuCintaAris"
-    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///student_activities.db"
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 
+    from . import engine
+    app.config["SQLALCHEMY_DATABASE_URI"] = engine.database_uri()
+
+    # Benchmarks and scripts point the app at a scratch database
+    if test_config:
+        app.config.update(test_config)
+
+    from . import routing
+    engine.init_app(app)
+    routing.init_app(app)
     db.init_app(app)
+    with app.app_context():
+        for bind in db.engines.values():
+            engine.install_pragmas(bind, app.config["SQLITE_PRAGMAS"])
+
+    from . import passwords
+    passwords.init_app(app)
+
+    from . import tokens
+    tokens.init_app(app)
+
+    from . import cache
+    cache.init_app(app)
+
+    from . import metrics
+    metrics.init_app(app)
+
+    from . import jobs, notify, notifications
+    jobs.init_app(app)
+    notify.init_app(app)
+    notifications.init_app(app)
+
+    from . import changes
+    changes.init_app(app)
+
+    @app.errorhandler(passwords.PasswordServiceBusy)
+    def password_service_busy(e):
+        if request.blueprint == "api":
+            return jsonify({"error": "Server busy, try again shortly"}), 503
+        flash("The server is busy right now. Please try again in a moment.", "warning")
+        return redirect(request.path)
 
     # ----------- REGISTER BLUEPRINTS -----------
     from .views import views
     from .auth import auth
     from .admin import admin
     from .advisor import advisor as advisor_bp
+    from .api import api
 
     app.register_blueprint(views, url_prefix="/")
     app.register_blueprint(auth, url_prefix="/auth")
     app.register_blueprint(admin, url_prefix="/admin")
     app.register_blueprint(advisor_bp, url_prefix="/advisor")
+    app.register_blueprint(api, url_prefix="/api/v1")
 
     from .models import Students, Advisor
-    from werkzeug.security import generate_password_hash
+    from .migrations import upgrade, migrate_cli
+    from .stats import stats_cli
+    from .bulk_import import import_command
+    from .export import export_command
+    from .jobs import jobs_cli
+    from .changes import changes_cli
+
+    migrate_cli.add_command(routing.replicate_command)
+    app.cli.add_command(migrate_cli)
+    app.cli.add_command(stats_cli)
+    app.cli.add_command(import_command)
+    app.cli.add_command(export_command)
+    app.cli.add_command(jobs_cli)
+    app.cli.add_command(changes_cli)
 
     login_manager = LoginManager()
     login_manager.login_view = "auth.login"
     login_manager.init_app(app)
 
+    from . import identity
+    identity.init_app(app)
+
     @login_manager.user_loader
     def load_user(user_id):
-        # prefix-based loader (fixes ID collision forever)
-        if not user_id:
-            return None
-
-        if user_id.startswith("s"):
-            real_id = int(user_id[1:])
-            return Students.query.get(real_id)
-
-        if user_id.startswith("a"):
-            real_id = int(user_id[1:])
-            return Advisor.query.get(real_id)
-
-        return None
+        # prefix-based loader (fixes ID collision forever); "s12" / "a3"
+        # are served from the identity cache when possible
+        return identity.load_user(user_id)
 
     with app.app_context():
-        db.create_all()
+        # primary only: replica binds are copies (routing.py) and share db's
+        # per-bind metadata with every other app in the process
+        db.create_all(bind_key=None)
+
+        # Bring databases created by older versions up to date
+        for name in upgrade(db.engine):
+            print(f"Applied migration {name}")
 
         # Create your admin if none exists
         if not Advisor.query.filter_by(is_admin=True).first():
@@ -55,7 +110,7 @@ def create_app():
                 advisorName="ATMIN",
                 advisorEmail="atmin@anjay.com",
                 advisorRole="Admin",
-                advisorPassword=generate_password_hash("atmindatang"),
+                advisorPassword=passwords.hash_password("atmindatang"),
                 status="Approved",
                 is_admin=True,
             )
@@ -1,13 +1,41 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask import Blueprint, render_template, request, redirect, url_for, flash, Response, stream_with_context
 from flask_login import login_required, current_user
 from functools import wraps
 from datetime import datetime
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
 
 from . import db
 from .models import Students, Advisor, Activity, Participation
+from .pagination import keyset_page, page_size, parse_sort, InvalidCursor
+from .stats import counts_for
+from .passwords import hash_password
+from . import identity
+from .bulk_import import ENTITIES as IMPORT_ENTITIES, guess_format, import_result, queue_import
+from .export import FORMATS as EXPORT_FORMATS, iter_export
+from .batch import apply_batch, form_items, flash_message
+from .applications import set_status, promote
+from . import metrics as request_metrics
 
 admin = Blueprint("admin", __name__)
 
+# Whitelisted ?sort= keys for the paginated listings
+STUDENT_SORTS = {
+    "first_name": Students.studentFirstName,
+    "last_name": Students.studentLastName,
+    "email": Students.studentEmail,
+}
+ADVISOR_SORTS = {
+    "name": Advisor.advisorName,
+    "email": Advisor.advisorEmail,
+    "status": Advisor.status,
+}
+ACTIVITY_SORTS = {
+    "name": Activity.activityName,
+    "category": Activity.activityCategory,
+    "location": Activity.activityLocation,
+}
+
 # ---------------- ADMIN REQUIRED DECORATOR ---------------- #
 
 def admin_required(f):
@@ -22,13 +50,58 @@ def admin_required(f):
     return wrapper
 
 
+def paginate(query, pk, sorts):
+    sort_col, descending = parse_sort(request.args.get("sort"), sorts)
+    return keyset_page(
+        query,
+        pk,
+        cursor=request.args.get("cursor"),
+        limit=page_size(request.args.get("per_page")),
+        sort_col=sort_col,
+        descending=descending,
+    )
+
+
 # ---------------- ADMIN HOME ---------------- #
 
 @admin.route("/")
 @login_required
 @admin_required
 def index():
-    return render_template("admin_home.html")
+    return render_template(
+        "admin_home.html",
+        counts=counts_for("all"),
+        identity_stats=identity.stats(),
+    )
+
+
+# ---------------- REQUEST METRICS ---------------- #
+
+@admin.route("/metrics")
+@login_required
+@admin_required
+def metrics():
+    registry = request_metrics.registry()
+    snapshot = registry.snapshot() if registry else {}
+    # slowest first
+    rows = sorted(snapshot.items(), key=lambda item: item[1]["quantiles"]["wall"][0.95], reverse=True)
+    return render_template(
+        "admin_metrics.html",
+        enabled=registry is not None,
+        rows=rows,
+        since=datetime.fromtimestamp(registry.started) if registry else None,
+    )
+
+
+@admin.route("/metrics/reset", methods=["POST"])
+@login_required
+@admin_required
+def metrics_reset():
+    registry = request_metrics.registry()
+    if registry:
+        registry.reset()
+        flash("Metrics reset.", "success")
+    return redirect(url_for("admin.metrics"))
 
 
 # ---------------- STUDENTS CRUD ---------------- #
@@ -37,8 +110,16 @@ def index():
 @login_required
 @admin_required
 def students_list():
-    students = Students.query.all()
-    return render_template("admin_students.html", students=students)
+    try:
+        page = paginate(Students.query, Students.studentID, STUDENT_SORTS)
+    except InvalidCursor:
+        flash("Invalid page link.", "warning")
+        return redirect(url_for("admin.students_list"))
+    return render_template(
+        "admin_students.html",
+        students=page.items,
+        next_cursor=page.next_cursor,
+    )
 
 
 @admin.route("/students/add", methods=["GET", "POST"])
@@ -53,10 +134,15 @@ def students_add():
             studentYear=request.form.get("year"),
             studentAddress=request.form.get("address"),
             phoneNumber=request.form.get("phone"),
-            studentPassword=request.form.get("password") or "password",
+            studentPassword=hash_password(request.form.get("password") or "password"),
         )
         db.session.add(s)
-        db.session.commit()
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            flash("Email already registered.", "danger")
+            return redirect(url_for("admin.students_add"))
         flash("Student added.", "success")
         return redirect(url_for("admin.students_list"))
     return render_template("admin_student_form.html")
@@ -74,7 +160,12 @@ def students_edit(id):
         s.studentYear = request.form.get("year")
         s.studentAddress = request.form.get("address")
         s.phoneNumber = request.form.get("phone")
-        db.session.commit()
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            flash("Email already registered.", "danger")
+            return redirect(url_for("admin.students_edit", id=id))
         flash("Student updated.", "success")
         return redirect(url_for("admin.students_list"))
     return render_template("admin_student_form.html", student=s)
@@ -91,14 +182,56 @@ def students_delete(id):
     return redirect(url_for("admin.students_list"))
 
 
+# ---------------- BULK IMPORT ---------------- #
+
+@admin.route("/import", methods=["GET", "POST"])
+@login_required
+@admin_required
+def bulk_import():
+    import_id = request.args.get("id")
+    report = import_result(import_id)
+    if request.method == "POST":
+        entity = request.form.get("entity")
+        upload = request.files.get("file")
+        fmt = request.form.get("format") or guess_format(upload.filename if upload else None)
+
+        if entity not in IMPORT_ENTITIES:
+            flash("Choose what to import.", "warning")
+        elif not upload or not upload.filename:
+            flash("Choose a CSV or JSON file to upload.", "warning")
+        elif fmt not in ("csv", "json", "jsonl"):
+            flash("Unsupported file type. Use .csv, .json or .jsonl.", "warning")
+        else:
+            # hashing a large file takes minutes; a background job does it
+            import_id = queue_import(entity, upload.stream, fmt)
+            db.session.commit()
+            flash("Import queued. The report appears here when it has finished.", "info")
+            return redirect(url_for("admin.bulk_import", id=import_id))
+
+    return render_template(
+        "admin_import.html",
+        entities=sorted(IMPORT_ENTITIES),
+        report=report,
+        pending=bool(import_id) and report is None,
+    )
+
+
 # ---------------- ADVISORS MANAGEMENT ---------------- #
 
 @admin.route("/advisors")
 @login_required
 @admin_required
 def advisors_list():
-    advisors = Advisor.query.all()
-    return render_template("admin_advisors.html", advisors=advisors)
+    try:
+        page = paginate(Advisor.query, Advisor.advisorID, ADVISOR_SORTS)
+    except InvalidCursor:
+        flash("Invalid page link.", "warning")
+        return redirect(url_for("admin.advisors_list"))
+    return render_template(
+        "admin_advisors.html",
+        advisors=page.items,
+        next_cursor=page.next_cursor,
+    )
 
 
 @admin.route("/advisors/update_status/<int:id>", methods=["POST"])
@@ -134,8 +267,16 @@ def advisors_delete(id):
 @login_required
 @admin_required
 def activities_list():
-    activities = Activity.query.all()
-    return render_template("admin_activities.html", activities=activities)
+    try:
+        page = paginate(Activity.query, Activity.activityID, ACTIVITY_SORTS)
+    except InvalidCursor:
+        flash("Invalid page link.", "warning")
+        return redirect(url_for("admin.activities_list"))
+    return render_template(
+        "admin_activities.html",
+        activities=page.items,
+        next_cursor=page.next_cursor,
+    )
 
 
 @admin.route("/activities/add", methods=["GET", "POST"])
@@ -154,6 +295,7 @@ def activities_add():
             activityStartDate=datetime.strptime(start_date_str, "%Y-%m-%d").date() if start_date_str else None,
             activityEndDate=datetime.strptime(end_date_str, "%Y-%m-%d").date() if end_date_str else None,
             activityFrequency=request.form.get("frequency"),
+            capacity=request.form.get("capacity", type=int),
         )
 
         db.session.add(ac)
@@ -186,9 +328,14 @@ def activities_edit(id):
             ac.activityEndDate = datetime.strptime(end_date_str, "%Y-%m-%d").date()
 
         ac.activityFrequency = request.form.get("frequency")
+        ac.capacity = request.form.get("capacity", type=int)
 
+        # a larger capacity lets waitlisted students in
+        promoted = promote(db.session, ac.activityID)
         db.session.commit()
         flash("Activity updated.", "success")
+        if promoted:
+            flash(f"{len(promoted)} waitlisted student(s) approved.", "info")
         return redirect(url_for("admin.activities_list"))
 
     return render_template("admin_activity_form.html", activity=ac)
@@ -211,10 +358,35 @@ def activities_delete(id):
 @login_required
 @admin_required
 def participations_list():
-    participations = Participation.query.all()
+    # Eager-load the student and activity of every row so the template
+    # doesn't fire two extra SELECTs per participation
+    participations = Participation.query.options(
+        joinedload(Participation.student),
+        joinedload(Participation.activity),
+    ).all()
     return render_template("admin_participations.html", participations=participations)
 
 
+@admin.route("/participations/export")
+@login_required
+@admin_required
+def participations_export():
+    fmt = request.args.get("format", "csv")
+    if fmt not in EXPORT_FORMATS:
+        flash("Unsupported export format.", "warning")
+        return redirect(url_for("admin.participations_list"))
+
+    mimetype, ext = EXPORT_FORMATS[fmt]
+    filename = f"participations-{datetime.utcnow():%Y%m%d-%H%M%S}.{ext}"
+
+    # Streamed: rows are written out while the query is still running
+    return Response(
+        stream_with_context(iter_export(fmt, request.args.get("status"))),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
+
+
 @admin.route('/participations/update/<int:id>', methods=['POST'])
 @login_required
 def participations_update(id):
@@ -228,16 +400,43 @@ def participations_update(id):
     new_status = request.form.get('status')
     new_feedback = request.form.get('feedback')
 
-    # Update status if provided
-    if new_status:
-        p.applicationStatus = new_status
-    
     # Update feedback (checks for None so empty strings overwrite old feedback)
     if new_feedback is not None:
         p.advisorFeedback = new_feedback
 
-    db.session.commit()
-    flash("Participation request updated successfully.", "success")
+    try:
+        # Status changes go through the seat allocator (capacity/waitlist)
+        result = set_status(p.participationID, new_status) if new_status else None
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        flash("This student already has another active request for this activity.", "danger")
+        return redirect(url_for('admin.participations_list'))
+    if new_status == "Approved" and result == "Waitlisted":
+        flash("The activity is full; the request was added to the waitlist.", "warning")
+    else:
+        flash("Participation request updated successfully.", "success")
+    return redirect(url_for('admin.participations_list'))
+
+
+@admin.route('/participations/batch', methods=['POST'])
+@login_required
+def participations_batch():
+    if not getattr(current_user, "is_admin", False):
+         return redirect(url_for('views.dashboard'))
+
+    items = form_items(request.form)
+    if not items:
+        flash("Select at least one request.", "warning")
+        return redirect(url_for('admin.participations_list'))
+
+    try:
+        results = apply_batch(items)
+    except ValueError as e:
+        flash(str(e), "danger")
+        return redirect(url_for('admin.participations_list'))
+
+    flash(*flash_message(results))
     return redirect(url_for('admin.participations_list'))
 
 
@@ -1,10 +1,15 @@
 from flask import Blueprint, render_template, redirect, url_for, request, flash
 from flask_login import login_required, current_user
 from functools import wraps
-from werkzeug.security import generate_password_hash
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
 
-from . import db
+from . import changes, db
 from .models import Participation, Advisor, Activity, Students
+from .stats import counts_for
+from .passwords import hash_password
+from .batch import apply_batch, form_items, flash_message
+from .applications import set_status
 
 
 advisor = Blueprint("advisor", __name__)
@@ -26,8 +31,36 @@ def advisor_required(f):
 @login_required
 @advisor_required
 def dashboard():
-    participations = Participation.query.filter_by(advisorID=current_user.advisorID).all()
-    return render_template("advisor_dashboard.html", participations=participations)
+    # the live feed replays everything after this point, so a change made
+    # while the list below is loading is sent again rather than missed
+    feed_since = changes.latest_seq()
+    participations = (
+        Participation.query
+        .options(
+            joinedload(Participation.student),
+            joinedload(Participation.activity),
+        )
+        .filter_by(advisorID=current_user.advisorID)
+        .all()
+    )
+    return render_template(
+        "advisor_dashboard.html",
+        participations=participations,
+        counts=counts_for("advisor", current_user.advisorID),
+        feed_since=feed_since,
+    )
+
+
+@advisor.route("/feed")
+@login_required
+@advisor_required
+def feed():
+    # Server-Sent Events with the dashboard's deltas; EventSource resends
+    # the last id as Last-Event-ID when it reconnects
+    since = request.headers.get("Last-Event-ID", type=int)
+    if since is None:
+        since = request.args.get("since", 0, type=int)
+    return changes.advisor_stream(current_user.advisorID, since)
 
 
 @advisor.route("/participation/<int:id>/update", methods=["POST"])
@@ -43,12 +76,39 @@ def update_participation(id):
     status = request.form.get("status")
     feedback = request.form.get("feedback")
 
-    participation.applicationStatus = status
     participation.advisorFeedback = feedback
 
-    db.session.commit()
+    try:
+        result = set_status(participation.participationID, status) if status else None
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        flash("This student already has another active request for this activity.", "danger")
+        return redirect(url_for("advisor.dashboard"))
+
+    if status == "Approved" and result == "Waitlisted":
+        flash("The activity is full; the student was added to the waitlist.", "warning")
+    else:
+        flash("Participation updated.", "success")
+    return redirect(url_for("advisor.dashboard"))
+
 
-    flash("Participation updated.", "success")
+@advisor.route("/participations/batch", methods=["POST"])
+@login_required
+@advisor_required
+def batch_update():
+    items = form_items(request.form)
+    if not items:
+        flash("Select at least one request.", "warning")
+        return redirect(url_for("advisor.dashboard"))
+
+    try:
+        results = apply_batch(items, advisor_id=current_user.advisorID)
+    except ValueError as e:
+        flash(str(e), "danger")
+        return redirect(url_for("advisor.dashboard"))
+
+    flash(*flash_message(results))
     return redirect(url_for("advisor.dashboard"))
 
 
@@ -81,11 +141,14 @@ def profile():
 
         new_password = request.form.get("password")
         if new_password:
-            current_user.advisorPassword = generate_password_hash(
-                new_password, method="pbkdf2:sha256", salt_length=16
-            )
-
-        db.session.commit()
+            current_user.advisorPassword = hash_password(new_password)
+
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            flash("Email already registered.", "danger")
+            return redirect(url_for("advisor.profile"))
         flash("Advisor profile updated.", "success")
         return redirect(url_for("advisor.profile"))
 
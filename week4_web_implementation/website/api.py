@@ -1,57 +1,142 @@
-from flask import Blueprint, request, jsonify, current_app
-from werkzeug.security import check_password_hash
-from datetime import datetime, timedelta
-import jwt
-
-from .models import Students, Activity, Participation
-from . import db
+from flask import Blueprint, request, jsonify, g, current_app
+from datetime import datetime
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import contains_eager
+
+from .models import Students, Activity, Participation, Advisor, Notification
+from .pagination import keyset_page, page_size, parse_sort, InvalidCursor
+from .search import search_activities
+from .passwords import hash_password, verify_and_upgrade
+from .tokens import create_token, identity, roles_required, token_required
+from .batch import apply_batch
+from .applications import apply, set_status, withdraw, promote, STATUSES, ACTIVE_STATUSES
+from .cache import cached, catalog_key, activity_key
+from . import changes, db, notifications, serializers
 
 api = Blueprint("api", __name__)
 
+STAFF = ("advisor", "admin")
+
+# Whitelisted ?sort= keys for the paginated collections
+STUDENT_SORTS = {
+    "firstName": Students.studentFirstName,
+    "lastName": Students.studentLastName,
+    "email": Students.studentEmail,
+}
+ACTIVITY_SORTS = {
+    "name": Activity.activityName,
+    "category": Activity.activityCategory,
+    "location": Activity.activityLocation,
+}
+ADVISOR_SORTS = {
+    "name": Advisor.advisorName,
+    "email": Advisor.advisorEmail,
+    "role": Advisor.advisorRole,
+}
+
 
 # ======================================================================
-# Helpers: JWT
+# Helpers: responses
 # ======================================================================
 
-def create_token(user):
-    payload = {
-        "sub": user.studentID,
-        "email": user.studentEmail,
-        "exp": datetime.utcnow() + timedelta(hours=2),
+def conditional_json(payload):
+    return conditional_body(current_app.json.dumps(payload))
+
+
+def conditional_body(body):
+    # Strong ETag over the body; a matching If-None-Match gets an empty 304
+    response = current_app.response_class(f"{body}\n", mimetype=current_app.json.mimetype)
+    response.add_etag()
+    return response.make_conditional(request)
+
+
+@api.errorhandler(404)
+def api_not_found(e):
+    return jsonify({"error": "Not found"}), 404
+
+
+def paginated_payload(query, pk, sorts, serializer):
+    # raises InvalidCursor
+    sort_col, descending = parse_sort(request.args.get("sort"), sorts)
+    page = keyset_page(
+        query,
+        pk,
+        cursor=request.args.get("cursor"),
+        limit=page_size(request.args.get("limit")),
+        sort_col=sort_col,
+        descending=descending,
+    )
+    return {
+        "items": serializer.many(page.items),
+        "next_cursor": page.next_cursor,
     }
-    token = jwt.encode(payload, current_app.config["SECRET_KEY"], algorithm="HS256")
-    # PyJWT >= 2 returns str already
-    return token
 
 
-def token_required(f):
-    from functools import wraps
+def paginated_response(query, pk, sorts, serializer):
+    try:
+        return conditional_json(paginated_payload(query, pk, sorts, serializer))
+    except InvalidCursor:
+        return jsonify({"error": "Invalid cursor"}), 400
+
+
+def forbidden(message="Not allowed for this account"):
+    return jsonify({"error": message}), 403
+
+
+def commit_or_conflict():
+    # -> a 409 response if the commit hit the unique email index, else None
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"error": "Email already registered"}), 409
+    return None
 
-    @wraps(f)
-    def wrapper(*args, **kwargs):
-        auth_header = request.headers.get("Authorization", "")
-        parts = auth_header.split()
 
-        if len(parts) != 2 or parts[0].lower() != "bearer":
-            return jsonify({"error": "Missing or invalid token"}), 401
+def is_self(user_id, role, target_id):
+    # the token belongs to this student / advisor
+    return g.token_role == role and user_id == target_id
 
-        token = parts[1]
-        try:
-            payload = jwt.decode(
-                token,
-                current_app.config["SECRET_KEY"],
-                algorithms=["HS256"],
-            )
-            user_id = payload["sub"]
-        except Exception:
-            return jsonify({"error": "Token invalid"}), 401
 
-        return f(user_id, *args, **kwargs)
+def handles(user_id, participation):
+    # admins handle every application, advisors the ones assigned to them
+    return g.token_role == "admin" or (g.token_role == "advisor" and participation.advisorID == user_id)
 
-    return wrapper
 
+def parse_date(value):
+    if not value:
+        return None
+    return datetime.strptime(value, "%Y-%m-%d").date()
 
 
+def history_filters(student_id, args):
+    # WHERE clauses for a student's history; raises ValueError on bad dates
+    clauses = [Participation.studentID == student_id]
+    if args.get("name"):
+        clauses.append(Activity.activityName.ilike(f"%{args['name']}%"))
+    if args.get("category"):
+        clauses.append(Activity.activityCategory.ilike(f"%{args['category']}%"))
+    if args.get("status"):
+        clauses.append(func.lower(Participation.applicationStatus) == args["status"].lower())
+    date_from = parse_date(args.get("from"))
+    date_to = parse_date(args.get("to"))
+    if date_from:
+        clauses.append(Participation.dateApplied >= date_from)
+    if date_to:
+        clauses.append(Participation.dateApplied <= date_to)
+    return clauses
+
+
+def parse_capacity(value):
+    # None/"" = unlimited
+    if value is None or value == "":
+        return None
+    capacity = int(value)
+    if capacity < 0:
+        raise ValueError("negative capacity")
+    return capacity
+
 
 # ======================================================================
 # Auth
@@ -66,35 +151,60 @@ def api_login():
     if not email or not password:
         return jsonify({"error": "Email and password are required"}), 400
 
-    user = Students.query.filter_by(studentEmail=email).first()
-    if not user or not check_password_hash(user.studentPassword, password):
-        return jsonify({"error": "Invalid credentials"}), 401
+    # advisors first, as in auth.login
+    user = Advisor.query.filter_by(advisorEmail=email).first()
+    if user is not None:
+        if not verify_and_upgrade(user, "advisorPassword", password):
+            return jsonify({"error": "Invalid credentials"}), 401
+        if user.status != "Approved":
+            return forbidden("Advisor account is not approved yet")
+    else:
+        user = Students.query.filter_by(studentEmail=email).first()
+        if not user or not verify_and_upgrade(user, "studentPassword", password):
+            return jsonify({"error": "Invalid credentials"}), 401
+    db.session.commit()
 
     token = create_token(user)
     return jsonify({"token": token})
 
 
+@api.route("/me", methods=["GET"])
+@token_required
+def api_me(user_id):
+    claims = g.token_claims
+    student = g.token_role == "student"
+    if "name" not in claims:
+        # token issued without embedded claims
+        user = (Students if student else Advisor).query.get_or_404(user_id)
+        claims = dict(claims, name=identity(user)[3])
+    return jsonify(
+        {
+            "studentID" if student else "advisorID": user_id,
+            "email": claims["email"],
+            "role": g.token_role,
+            "name": claims["name"],
+        }
+    )
+
+
 # ======================================================================
 # Students
 # ======================================================================
 
 @api.route("/students", methods=["GET"])
 @token_required
+@roles_required(*STAFF)
 def api_students_list(user_id):
-    students = Students.query.all()
-    result = [
-        {
-            "studentID": s.studentID,
-            "firstName": s.studentFirstName,
-            "lastName": s.studentLastName,
-            "email": s.studentEmail,
-        }
-        for s in students
-    ]
-    return jsonify(result)
+    return paginated_response(
+        Students.query,
+        Students.studentID,
+        STUDENT_SORTS,
+        serializers.student,
+    )
 
 @api.route("/students", methods=["POST"])
 @token_required
+@roles_required("admin")
 def api_create_student(user_id):
     data = request.get_json() or {}
 
@@ -108,19 +218,23 @@ def api_create_student(user_id):
         studentLastName=data.get("lastName"),
         studentYear=data.get("year"),
         studentEmail=data.get("email"),
-        studentPassword=data.get("password"),  # consider hashing
+        studentPassword=hash_password(data.get("password")),
         studentAddress=data.get("address"),
         phoneNumber=data.get("phone")
     )
 
     db.session.add(student)
-    db.session.commit()
+    conflict = commit_or_conflict()
+    if conflict:
+        return conflict
     return jsonify({"message": "Student created", "studentID": student.studentID}), 201
 
 
 @api.route("/students/<int:student_id>", methods=["PUT"])
 @token_required
 def api_update_student(user_id, student_id):
+    if not (g.token_role == "admin" or is_self(user_id, "student", student_id)):
+        return forbidden()
     student = Students.query.get_or_404(student_id)
     data = request.get_json() or {}
 
@@ -128,17 +242,19 @@ def api_update_student(user_id, student_id):
     student.studentLastName = data.get("lastName", student.studentLastName)
     student.studentYear = data.get("year", student.studentYear)
     student.studentEmail = data.get("email", student.studentEmail)
-    student.studentPassword = data.get("password", student.studentPassword)
+    if data.get("password"):
+        student.studentPassword = hash_password(data["password"])
     student.studentAddress = data.get("address", student.studentAddress)
     student.phoneNumber = data.get("phone", student.phoneNumber)
 
-    db.session.commit()
-    return jsonify({"message": "Student updated"})
+    return commit_or_conflict() or jsonify({"message": "Student updated"})
 
 
 @api.route("/students/<int:student_id>", methods=["DELETE"])
 @token_required
 def api_delete_student(user_id, student_id):
+    if not (g.token_role == "admin" or is_self(user_id, "student", student_id)):
+        return forbidden()
     student = Students.query.get_or_404(student_id)
     db.session.delete(student)
     db.session.commit()
@@ -152,40 +268,33 @@ def api_delete_student(user_id, student_id):
 @api.route("/activities", methods=["GET"])
 @token_required
 def api_activities_list(user_id):
-    activities = Activity.query.all()
-    result = [
-        {
-            "activityID": a.activityID,
-            "name": a.activityName,
-            "category": a.activityCategory,
-            "location": a.activityLocation,
-        }
-        for a in activities
-    ]
-    return jsonify(result)
+    def build():
+        return current_app.json.dumps(paginated_payload(
+            Activity.query,
+            Activity.activityID,
+            ACTIVITY_SORTS,
+            serializers.activity_summary,
+        ))
+
+    try:
+        return conditional_body(cached(catalog_key("api"), build))
+    except InvalidCursor:
+        return jsonify({"error": "Invalid cursor"}), 400
 
 
 @api.route("/activities/<int:activity_id>", methods=["GET"])
 @token_required
 def api_activity_detail(user_id, activity_id):
-    a = Activity.query.get_or_404(activity_id)
-    return jsonify(
-        {
-            "activityID": a.activityID,
-            "name": a.activityName,
-            "category": a.activityCategory,
-            "location": a.activityLocation,
-            "details": a.activityDetails,
-            "startDate": a.activityStartDate,
-            "endDate": a.activityEndDate,
-            "frequency": a.activityFrequency,
-            "advisorID": a.advisorID,
-        }
-    )
+    def build():
+        a = Activity.query.get_or_404(activity_id)
+        return current_app.json.dumps(serializers.activity_detail(a))
+
+    return conditional_body(cached(activity_key(activity_id), build))
 
 
 @api.route("/activities", methods=["POST"])
 @token_required
+@roles_required("admin")
 def api_create_activity(user_id):
     data = request.get_json() or {}
 
@@ -193,15 +302,26 @@ def api_create_activity(user_id):
     if not data.get("name"):
         return jsonify({"error": "Activity name is required"}), 400
 
+    try:
+        start_date = parse_date(data.get("startDate"))
+        end_date = parse_date(data.get("endDate"))
+    except (TypeError, ValueError):
+        return jsonify({"error": "startDate/endDate must be YYYY-MM-DD"}), 400
+    try:
+        capacity = parse_capacity(data.get("capacity"))
+    except (TypeError, ValueError):
+        return jsonify({"error": "capacity must be a non-negative integer"}), 400
+
     a = Activity(
         activityName=data.get("name"),
         activityCategory=data.get("category"),
         activityLocation=data.get("location"),
         activityDetails=data.get("details"),
-        activityStartDate=data.get("startDate"),
-        activityEndDate=data.get("endDate"),
+        activityStartDate=start_date,
+        activityEndDate=end_date,
         activityFrequency=data.get("frequency"),
         advisorID=data.get("advisorID"),
+        capacity=capacity,
     )
 
     db.session.add(a)
@@ -214,25 +334,40 @@ def api_create_activity(user_id):
 
 @api.route("/activities/<int:activity_id>", methods=["PUT"])
 @token_required
+@roles_required("admin")
 def api_update_activity(user_id, activity_id):
     data = request.get_json() or {}
     a = Activity.query.get_or_404(activity_id)
 
+    try:
+        if "startDate" in data:
+            a.activityStartDate = parse_date(data["startDate"])
+        if "endDate" in data:
+            a.activityEndDate = parse_date(data["endDate"])
+    except (TypeError, ValueError):
+        return jsonify({"error": "startDate/endDate must be YYYY-MM-DD"}), 400
+    try:
+        if "capacity" in data:
+            a.capacity = parse_capacity(data["capacity"])
+    except (TypeError, ValueError):
+        return jsonify({"error": "capacity must be a non-negative integer"}), 400
+
     a.activityName = data.get("name", a.activityName)
     a.activityCategory = data.get("category", a.activityCategory)
     a.activityLocation = data.get("location", a.activityLocation)
     a.activityDetails = data.get("details", a.activityDetails)
-    a.activityStartDate = data.get("startDate", a.activityStartDate)
-    a.activityEndDate = data.get("endDate", a.activityEndDate)
     a.activityFrequency = data.get("frequency", a.activityFrequency)
     a.advisorID = data.get("advisorID", a.advisorID)
 
+    # a larger capacity lets waitlisted students in
+    promote(db.session, activity_id)
     db.session.commit()
     return jsonify({"message": "Activity updated"})
 
 
 @api.route("/activities/<int:activity_id>", methods=["DELETE"])
 @token_required
+@roles_required("admin")
 def api_delete_activity(user_id, activity_id):
     a = Activity.query.get_or_404(activity_id)
     db.session.delete(a)
@@ -247,22 +382,15 @@ def api_search_activities(user_id):
 
     if not keyword:
         # if no keyword, just return all activities (or empty list if you prefer)
-        activities = Activity.query.all()
+        activities = [(a, None) for a in Activity.query.all()]
     else:
-        activities = Activity.query.filter(
-            Activity.activityName.ilike(f"%{keyword}%")
-        ).all()
+        activities = search_activities(keyword, limit=page_size(request.args.get("limit")))
 
     result = [
-        {
-            "activityID": a.activityID,
-            "name": a.activityName,
-            "category": a.activityCategory,
-            "location": a.activityLocation,
-        }
-        for a in activities
+        dict(serializers.activity_summary(a), snippet=snippet)
+        for a, snippet in activities
     ]
-    return jsonify(result)
+    return conditional_json(result)
 
 
 # ======================================================================
@@ -272,68 +400,52 @@ def api_search_activities(user_id):
 @api.route("/participations", methods=["GET"])
 @token_required
 def api_participations_list(user_id):
-    parts = Participation.query.filter_by(studentID=user_id).all()
-    result = [
-        {
-            "participationID": p.participationID,
-            "activityID": p.activityID,
-            "status": p.applicationStatus,
-            "feedback": p.advisorFeedback,
-            "achievements": p.achievements,
-            "dateApplied": p.dateApplied,
-            "approvalDate": p.approvalDate,
-            "advisorID": p.advisorID,
-        }
-        for p in parts
-    ]
-    return jsonify(result)
+    # a student's own applications, or the requests assigned to an advisor
+    if g.token_role == "student":
+        parts = Participation.query.filter_by(studentID=user_id).all()
+    else:
+        parts = Participation.query.filter_by(advisorID=user_id).all()
+    return conditional_json(serializers.participation.many(parts))
 
 
 @api.route("/participations", methods=["POST"])
 @token_required
+@roles_required("student")
 def api_create_participation(user_id):
     data = request.get_json() or {}
 
-    if not data.get("activityID"):
+    try:
+        activity_id = int(data["activityID"])
+        advisor_id = int(data["advisorID"]) if data.get("advisorID") is not None else None
+    except (KeyError, TypeError, ValueError):
         return jsonify({"error": "activityID is required"}), 400
 
-    participation = Participation(
-        studentID=user_id,
-        activityID=data.get("activityID"),
-        advisorID=data.get("advisorID"),
-        dateApplied=datetime.utcnow(),
-        applicationStatus="Pending",
-        advisorFeedback=None,
-        achievements=None,
-    )
-
-    db.session.add(participation)
+    participation_id = apply(user_id, activity_id, advisor_id)
     db.session.commit()
+    if participation_id is None:
+        return jsonify({"error": "You already have an active application for this activity"}), 409
 
     return jsonify(
         {
             "message": "Participation submitted",
-            "participationID": participation.participationID,
+            "participationID": participation_id,
         }
     ), 201
 
 
 @api.route("/participations/<int:pid>", methods=["PUT"])
 @token_required
+@roles_required(*STAFF)
 def api_update_participation(user_id, pid):
     data = request.get_json() or {}
     p = Participation.query.get_or_404(pid)
+    if not handles(user_id, p):
+        return forbidden("Not assigned to you")
 
     # basic fields an advisor / system can update
     status = data.get("status")
-    if status is not None:
-        p.applicationStatus = status
-        if status == "Approved":
-            p.approvalDate = datetime.utcnow()
-        elif status == "Rejected":
-            p.approvalDate = datetime.utcnow()
-        else:
-            p.approvalDate = None
+    if status is not None and status not in STATUSES:
+        return jsonify({"error": f"status must be one of {', '.join(STATUSES)}"}), 400
 
     if "feedback" in data:
         p.advisorFeedback = data.get("feedback")
@@ -341,45 +453,100 @@ def api_update_participation(user_id, pid):
     if "achievements" in data:
         p.achievements = data.get("achievements")
 
+    try:
+        # approving may waitlist the request when the activity is full
+        result = set_status(p.participationID, status) if status is not None else p.applicationStatus
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"error": "The student already has an active application for this activity"}), 409
+    return jsonify({"message": "Participation updated", "status": result})
+
+
+@api.route("/participations/<int:pid>/withdraw", methods=["POST"])
+@token_required
+@roles_required("student")
+def api_withdraw_participation(user_id, pid):
+    p = Participation.query.get_or_404(pid)
+    if p.studentID != user_id:
+        return jsonify({"error": "Not your application"}), 403
+    if p.applicationStatus not in ACTIVE_STATUSES:
+        return jsonify({"error": "Application is not active"}), 409
+
+    withdraw(pid)
     db.session.commit()
-    return jsonify({"message": "Participation updated"})
+    return jsonify({"message": "Application withdrawn"})
+
+
+@api.route("/participations", methods=["PATCH"])
+@token_required
+@roles_required(*STAFF)
+def api_batch_update_participations(user_id):
+    # [{"id": 1, "status": "Approved", "feedback": "..."}, ...]; see batch.py.
+    # Advisors can only change requests assigned to them.
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get("items")
+    if not isinstance(data, list) or not data:
+        return jsonify({"error": "Expected a non-empty list of updates"}), 400
+
+    try:
+        results = apply_batch(data, advisor_id=None if g.token_role == "admin" else user_id)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify(
+        {
+            "updated": sum(r["ok"] for r in results),
+            "results": results,
+        }
+    )
+
 
 @api.route("/students/<int:student_id>/activities", methods=["GET"])
 @token_required
 def api_student_activity_history(user_id, student_id):
-    activity_name = request.args.get('name', type=str)
-    category = request.args.get('category', type=str)
-    status = request.args.get('status', type=str)
-
-    participations = Participation.query.filter_by(studentID=student_id).all()
-
-    data = []
-    for p in participations:
-        activity = Activity.query.get(p.activityID)
-        
-        if activity_name and activity_name.lower() not in activity.activityName.lower():
-            continue
-        if category and category.lower() not in activity.activityCategory.lower():
-            continue
-        if status and status.lower() != p.applicationStatus.lower():
-            continue
-
-        data.append({
-            "participationID": p.participationID,
-            "activityID": activity.activityID,
-            "activityName": activity.activityName,
-            "category": activity.activityCategory,
-            "location": activity.activityLocation,
-            "dateApplied": p.dateApplied,
-            "status": p.applicationStatus
-        })
-
-    return jsonify({"history": data}), 200
+    if not (g.token_role in STAFF or is_self(user_id, "student", student_id)):
+        return forbidden()
+    try:
+        filters = history_filters(student_id, request.args)
+    except ValueError:
+        return jsonify({"error": "from/to must be YYYY-MM-DD"}), 400
+
+    # One joined query; every filter runs in SQL
+    query = (
+        Participation.query
+        .join(Activity, Participation.activityID == Activity.activityID)
+        .options(contains_eager(Participation.activity))
+        .filter(*filters)
+    )
+
+    # Newest applications first
+    try:
+        page = keyset_page(
+            query,
+            Participation.participationID,
+            cursor=request.args.get("cursor"),
+            limit=page_size(request.args.get("limit")),
+            descending=True,
+        )
+    except InvalidCursor:
+        return jsonify({"error": "Invalid cursor"}), 400
+
+    return conditional_json(
+        {
+            "history": serializers.history_item.many(page.items),
+            "next_cursor": page.next_cursor,
+        }
+    )
 
 @api.route("/participations/<int:pid>", methods=["DELETE"])
 @token_required
+@roles_required(*STAFF)
 def api_delete_participation(user_id, pid):
     participation = Participation.query.get_or_404(pid)
+    if not handles(user_id, participation):
+        return forbidden("Not assigned to you")
     db.session.delete(participation)
     db.session.commit()
     return jsonify({"message": "Participation deleted"})
@@ -390,6 +557,7 @@ def api_delete_participation(user_id, pid):
 
 @api.route("/advisors", methods=["POST"])
 @token_required
+@roles_required("admin")
 def api_create_advisor(user_id):
     data = request.get_json() or {}
     required_fields = ["name", "email", "role", "officeLocation", "availableSchedule", "password"]
@@ -403,35 +571,32 @@ def api_create_advisor(user_id):
         advisorRole=data.get("role"),
         officeLocation=data.get("officeLocation"),
         availableSchedule=data.get("availableSchedule"),
-        advisorPassword=data.get("password")  # consider hashing
+        advisorPassword=hash_password(data.get("password"))
     )
 
     db.session.add(advisor)
-    db.session.commit()
+    conflict = commit_or_conflict()
+    if conflict:
+        return conflict
     return jsonify({"message": "Advisor created", "advisorID": advisor.advisorID}), 201
 
 
 @api.route("/advisors", methods=["GET"])
 @token_required
 def api_list_advisors(user_id):
-    advisors = Advisor.query.all()
-    result = [
-        {
-            "advisorID": a.advisorID,
-            "name": a.advisorName,
-            "email": a.advisorEmail,
-            "role": a.advisorRole,
-            "officeLocation": a.officeLocation,
-            "schedule": a.availableSchedule
-        }
-        for a in advisors
-    ]
-    return jsonify(result)
+    return paginated_response(
+        Advisor.query,
+        Advisor.advisorID,
+        ADVISOR_SORTS,
+        serializers.advisor,
+    )
 
 
 @api.route("/advisors/<int:advisor_id>", methods=["PUT"])
 @token_required
 def api_update_advisor(user_id, advisor_id):
+    if not (g.token_role == "admin" or is_self(user_id, "advisor", advisor_id)):
+        return forbidden()
     advisor = Advisor.query.get_or_404(advisor_id)
     data = request.get_json() or {}
 
@@ -440,17 +605,101 @@ def api_update_advisor(user_id, advisor_id):
     advisor.advisorRole = data.get("role", advisor.advisorRole)
     advisor.officeLocation = data.get("officeLocation", advisor.officeLocation)
     advisor.availableSchedule = data.get("availableSchedule", advisor.availableSchedule)
-    advisor.advisorPassword = data.get("password", advisor.advisorPassword)  # consider hashing
+    if data.get("password"):
+        advisor.advisorPassword = hash_password(data["password"])
 
-    db.session.commit()
-    return jsonify({"message": "Advisor updated"})
+    return commit_or_conflict() or jsonify({"message": "Advisor updated"})
 
 
 @api.route("/advisors/<int:advisor_id>", methods=["DELETE"])
 @token_required
+@roles_required("admin")
 def api_delete_advisor(user_id, advisor_id):
     advisor = Advisor.query.get_or_404(advisor_id)
     db.session.delete(advisor)
     db.session.commit()
     return jsonify({"message": "Advisor deleted"})
 
+
+
+# ======================================================================
+# Notifications (FEED + UNREAD COUNT + LIVE STREAM)
+# ======================================================================
+
+@api.route("/notifications", methods=["GET"])
+@token_required
+@roles_required("student")
+def api_notifications_list(user_id):
+    # newest first
+    try:
+        page = keyset_page(
+            Notification.query.filter_by(studentID=user_id),
+            Notification.notificationID,
+            cursor=request.args.get("cursor"),
+            limit=page_size(request.args.get("limit")),
+            descending=True,
+        )
+    except InvalidCursor:
+        return jsonify({"error": "Invalid cursor"}), 400
+    return conditional_json({
+        "items": serializers.notification.many(page.items),
+        "next_cursor": page.next_cursor,
+    })
+
+
+@api.route("/notifications/unread-count", methods=["GET"])
+@token_required
+@roles_required("student")
+def api_notifications_unread_count(user_id):
+    return jsonify({"count": notifications.unread_count(user_id)})
+
+
+@api.route("/notifications/read", methods=["POST"])
+@token_required
+@roles_required("student")
+def api_notifications_read(user_id):
+    # {"upTo": <id>} marks up to that notification; no body marks them all
+    data = request.get_json(silent=True) or {}
+    try:
+        up_to = int(data["upTo"]) if data.get("upTo") is not None else None
+    except (TypeError, ValueError):
+        return jsonify({"error": "upTo must be a notification id"}), 400
+
+    marked = notifications.mark_read(user_id, up_to)
+    db.session.commit()
+    return jsonify({"marked": marked, "count": notifications.unread_count(user_id)})
+
+
+@api.route("/notifications/stream", methods=["GET"])
+@token_required
+@roles_required("student")
+def api_notifications_stream(user_id):
+    # Server-Sent Events: "unread" and "notification" events
+    return notifications.stream(user_id, request.headers.get("Last-Event-ID"))
+
+
+# ======================================================================
+# Sync (INCREMENTAL CHANGES FOR OFFLINE CLIENTS)
+# ======================================================================
+
+@api.route("/sync", methods=["GET"])
+@token_required
+@roles_required("student")
+def api_sync(user_id):
+    # No ?since: just the current seq. Read it, load the full lists, then
+    # call /sync?since=<seq> on every refresh and follow "next" while
+    # "more" is true.
+    since = request.args.get("since")
+    try:
+        since = int(since) if since is not None else None
+    except ValueError:
+        return jsonify({"error": "since must be a sequence number"}), 400
+
+    try:
+        payload = changes.sync(user_id, since, page_size(request.args.get("limit")))
+    except changes.CursorExpired:
+        return jsonify({
+            "error": "Cursor expired; reload the full lists and sync from next",
+            "next": changes.latest_seq(),
+        }), 410
+    return conditional_json(payload)
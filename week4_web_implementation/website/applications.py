@@ -0,0 +1,226 @@
+from datetime import date, datetime
+
+from sqlalchemy import event, func, or_, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+
+from . import db
+from .models import Activity, Participation, ACTIVE_APPLICATION
+from .notifications import status_changed
+from .stats import record_change
+
+# ---------------- APPLYING FOR AN ACTIVITY ---------------- #
+#
+# A student may hold at most one active (Pending, Approved or Waitlisted)
+# application per activity. The partial unique index uq_participation_active enforces
+# that in the database, and apply() is a single
+# INSERT ... ON CONFLICT DO NOTHING RETURNING, so two concurrent submissions
+# can't both get through and the common case needs no prior SELECT.
+#
+# apply() runs in a SAVEPOINT inside the caller's transaction and leaves the
+# commit to the caller, so it never discards the caller's pending work.
+# (With pysqlite a SAVEPOINT opened before the transaction has written
+# anything is the outermost one, and releasing it commits.)
+
+ACTIVE_STATUSES = ("Pending", "Approved", "Waitlisted")
+STATUSES = ACTIVE_STATUSES + ("Rejected", "Withdrawn")
+
+table = Participation.__table__
+activities = Activity.__table__
+
+
+def _insert(session):
+    # ON CONFLICT ... DO NOTHING exists on both supported backends
+    if session.get_bind().dialect.name == "postgresql":
+        return postgresql.insert(table)
+    return sqlite.insert(table)
+
+
+def apply(student_id, activity_id, advisor_id=None, session=None):
+    # Returns the new participationID, or None if the student already has
+    # an active application for this activity. `session` defaults to
+    # db.session (the async API passes its own); the caller commits.
+    session = session if session is not None else db.session
+    values = dict(
+        studentID=student_id,
+        activityID=activity_id,
+        advisorID=advisor_id,
+        applicationStatus="Pending",
+        dateApplied=date.today(),
+    )
+
+    stmt = (
+        _insert(session)
+        .values(**values)
+        .on_conflict_do_nothing(
+            index_elements=[table.c.studentID, table.c.activityID],
+            index_where=text(ACTIVE_APPLICATION),
+        )
+        .returning(table.c.participationID)
+    )
+    with session.begin_nested():
+        participation_id = session.execute(stmt).scalar()
+        if participation_id is not None:
+            # Core INSERT: keep participation_summary in step by hand
+            record_change(session.connection(), new=(student_id, advisor_id, activity_id, "Pending"))
+    return participation_id
+
+
+def active_status(student_id, activity_id):
+    # Status of the student's active application, if any
+    return db.session.execute(
+        select(table.c.applicationStatus).where(
+            table.c.studentID == student_id,
+            table.c.activityID == activity_id,
+            table.c.applicationStatus.in_(ACTIVE_STATUSES),
+        ).limit(1)
+    ).scalar()
+
+
+# ---------------- SEATS AND WAITLIST ---------------- #
+#
+# activity.seatsTaken counts Approved participations against the optional
+# activity.capacity. Approving claims a seat with a conditional
+# UPDATE ... WHERE seatsTaken < capacity, so concurrent advisors can never
+# oversell; when no seat is left the application is Waitlisted instead,
+# queued by waitlistedAt. Leaving Approved (rejected, withdrawn, deleted)
+# frees the seat and promotes the next waitlisted student.
+#
+# Status changes are conditional on the status we read, so a concurrent
+# change wins cleanly instead of being overwritten. These functions run in
+# the caller's transaction and never commit; `conn` may be db.session or a
+# Connection (inside mapper events). Each change notifies the student in
+# the same transaction (notifications.status_changed).
+
+def _row(conn, participation_id):
+    # (studentID, advisorID, activityID, status) or None
+    row = conn.execute(
+        select(table.c.studentID, table.c.advisorID, table.c.activityID, table.c.applicationStatus)
+        .where(table.c.participationID == participation_id)
+    ).first()
+    return tuple(row) if row else None
+
+
+def _transition(conn, participation_id, old_status, new_status, **values):
+    result = conn.execute(
+        table.update()
+        .where(table.c.participationID == participation_id, table.c.applicationStatus == old_status)
+        .values(applicationStatus=new_status, **values)
+    )
+    return result.rowcount == 1
+
+
+def _claim_seat(conn, activity_id):
+    result = conn.execute(
+        activities.update()
+        .where(
+            activities.c.activityID == activity_id,
+            or_(activities.c.capacity.is_(None), activities.c.seatsTaken < activities.c.capacity),
+        )
+        .values(seatsTaken=activities.c.seatsTaken + 1)
+    )
+    return result.rowcount == 1
+
+
+def _free_seat(conn, activity_id):
+    conn.execute(
+        activities.update()
+        .where(activities.c.activityID == activity_id, activities.c.seatsTaken > 0)
+        .values(seatsTaken=activities.c.seatsTaken - 1)
+    )
+
+
+def _status_values(status):
+    if status == "Approved":
+        return {"approvalDate": date.today(), "waitlistedAt": None}
+    if status == "Waitlisted":
+        return {"approvalDate": None, "waitlistedAt": func.coalesce(table.c.waitlistedAt, datetime.utcnow())}
+    if status == "Rejected":
+        return {"approvalDate": date.today(), "waitlistedAt": None}
+    return {"approvalDate": None, "waitlistedAt": None}
+
+
+def promote(conn, activity_id):
+    # Fill free seats from the head of the waitlist; returns promoted ids
+    promoted = []
+    while True:
+        row = conn.execute(
+            select(table.c.participationID, table.c.studentID, table.c.advisorID)
+            .where(table.c.activityID == activity_id, table.c.applicationStatus == "Waitlisted")
+            .order_by(table.c.waitlistedAt, table.c.participationID)
+            .limit(1)
+        ).first()
+        if row is None or not _claim_seat(conn, activity_id):
+            return promoted
+        pid, student_id, advisor_id = row
+        if _transition(conn, pid, "Waitlisted", "Approved", **_status_values("Approved")):
+            record_change(conn, old=(student_id, advisor_id, activity_id, "Waitlisted"),
+                          new=(student_id, advisor_id, activity_id, "Approved"))
+            status_changed(conn, pid, student_id, activity_id, "Approved")
+            promoted.append(pid)
+        else:
+            _free_seat(conn, activity_id)
+
+
+def set_status(participation_id, status, conn=None):
+    # Moves one application to `status`, allocating or releasing its seat.
+    # Approving may end up Waitlisted; returns the resulting status, or None
+    # if the participation doesn't exist.
+    conn = conn if conn is not None else db.session
+    row = _row(conn, participation_id)
+    if row is None:
+        return None
+    activity_id, old = row[2], row[3]
+
+    new = status
+    if status == "Approved" and old != "Approved":
+        new = "Approved" if _claim_seat(conn, activity_id) else "Waitlisted"
+    if new == old:
+        return old
+
+    if not _transition(conn, participation_id, old, new, **_status_values(new)):
+        # someone else changed it first; keep their result
+        if new == "Approved":
+            _free_seat(conn, activity_id)
+        return _row(conn, participation_id)[3]
+
+    record_change(conn, old=row, new=row[:3] + (new,))
+    status_changed(conn, participation_id, row[0], activity_id, new)
+    if old == "Approved":
+        _free_seat(conn, activity_id)
+        promote(conn, activity_id)
+    return new
+
+
+def withdraw(participation_id, conn=None):
+    return set_status(participation_id, "Withdrawn", conn)
+
+
+def recount_seats(conn):
+    # Rebuild activity.seatsTaken from the Approved participations
+    approved = (
+        select(func.count())
+        .where(table.c.activityID == activities.c.activityID, table.c.applicationStatus == "Approved")
+        .scalar_subquery()
+    )
+    conn.execute(activities.update().values(seatsTaken=approved))
+
+
+def record_imported_seats(conn, rows):
+    # Core bulk INSERTs of Approved participations take seats too
+    taken = {}
+    for row in rows:
+        if row["applicationStatus"] == "Approved" and row["activityID"] is not None:
+            taken[row["activityID"]] = taken.get(row["activityID"], 0) + 1
+    for activity_id, n in taken.items():
+        conn.execute(
+            activities.update()
+            .where(activities.c.activityID == activity_id)
+            .values(seatsTaken=activities.c.seatsTaken + n)
+        )
+
+
+@event.listens_for(Participation, "after_delete")
+def _participation_deleted(mapper, conn, target):
+    if target.applicationStatus == "Approved" and target.activityID is not None:
+        _free_seat(conn, target.activityID)
+        promote(conn, target.activityID)
@@ -0,0 +1,311 @@
+from functools import wraps
+
+from flask import current_app
+from sqlalchemy import select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import contains_eager
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import Response
+from starlette.routing import Mount, Route
+from werkzeug.http import generate_etag, parse_etags, quote_etag
+
+from . import serializers
+from .api import ACTIVITY_SORTS, STAFF, history_filters
+from .applications import ACTIVE_STATUSES, apply, withdraw
+from .cache import activity_key, catalog_key, lookup, store
+from .changes import watch
+from .engine import engine_options, install_pragmas
+from .models import Activity, Advisor, Participation, Students
+from .pagination import InvalidCursor, keyset_clauses, make_page, page_size, parse_sort
+from .tokens import current_role, decode_token, identity, token_role
+
+# ---------------- ASYNC (ASGI) API ---------------- #
+#
+# asgi.py serves the whole site from an ASGI server (uvicorn asgi:app).
+# The API routes mobile clients hit most are async handlers here, running
+# on an async engine (aiosqlite / asyncpg), so a request waiting on the
+# database doesn't hold a worker. Every other path, including the rest of
+# /api/v1, goes to the regular Flask app through asgiref's WSGI adapter.
+#
+# Responses match the Flask endpoints byte for byte (same serializers, JSON
+# provider and ETags) and share the response cache and token cache. Writes
+# call the sync code in applications.py through AsyncSession.run_sync, so
+# seat allocation, participation_summary and cache invalidation stay in
+# one place. Replica routing doesn't apply here; everything uses the
+# primary. The response cache client is synchronous (it may be Redis), so
+# cache reads and writes go through run_in_threadpool rather than blocking
+# the event loop.
+#
+# Optional dependencies (in requirements.txt): starlette uvicorn aiosqlite
+# greenlet asgiref
+
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+
+def async_url(uri):
+    url = make_url(uri)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise RuntimeError(f"No async driver configured for {backend}")
+    return url.set(drivername=ASYNC_DRIVERS[backend])
+
+
+def create_asgi_app(flask_app):
+    from asgiref.wsgi import WsgiToAsgi
+
+    config = flask_app.config
+    engine = create_async_engine(async_url(config["SQLALCHEMY_DATABASE_URI"]), **engine_options(config))
+    install_pragmas(engine.sync_engine, config["SQLITE_PRAGMAS"])
+    watch(engine.sync_engine)
+
+    async def lifespan(app):
+        yield
+        await engine.dispose()
+
+    app = Starlette(
+        routes=[
+            Route("/api/v1/me", me),
+            Route("/api/v1/activities", activities_list),
+            Route("/api/v1/activities/{activity_id:int}", activity_detail),
+            Route("/api/v1/students/{student_id:int}/activities", student_activity_history),
+            Route("/api/v1/participations", participations_list),
+            Route("/api/v1/participations", create_participation, methods=["POST"]),
+            Route("/api/v1/participations/{pid:int}/withdraw", withdraw_participation, methods=["POST"]),
+            # everything else: the Flask app, run in a thread
+            Mount("/", app=WsgiToAsgi(flask_app)),
+        ],
+        lifespan=lifespan,
+    )
+    app.state.flask_app = flask_app
+    app.state.sessions = async_sessionmaker(engine, expire_on_commit=False)
+    return app
+
+
+# ======================================================================
+# Helpers
+# ======================================================================
+
+def jsonify(payload, status=200):
+    # Same bytes as flask.jsonify
+    body = current_app.json.response(payload).get_data()
+    return Response(body, status_code=status, media_type=current_app.json.mimetype)
+
+
+def error(message, status):
+    return jsonify({"error": message}, status)
+
+
+def conditional_body(request, body):
+    # Same strong ETag / 304 handling as api.conditional_body
+    data = f"{body}\n".encode()
+    etag = generate_etag(data)
+    headers = {"ETag": quote_etag(etag)}
+    if parse_etags(request.headers.get("if-none-match")).contains(etag):
+        return Response(status_code=304, headers=headers)
+    return Response(data, media_type=current_app.json.mimetype, headers=headers)
+
+
+def conditional_json(request, payload):
+    return conditional_body(request, current_app.json.dumps(payload))
+
+
+def token_required(handler):
+    # Like tokens.token_required, inside the Flask app context so config,
+    # caches and the JSON provider are available
+    @wraps(handler)
+    async def wrapper(request):
+        with request.app.state.flask_app.app_context():
+            parts = request.headers.get("authorization", "").split()
+            if len(parts) != 2 or parts[0].lower() != "bearer":
+                return error("Missing or invalid token", 401)
+            try:
+                claims = decode_token(parts[1])
+                user_id = int(claims["sub"])
+            except Exception:
+                return error("Token invalid", 401)
+
+            # a cache miss reads the advisor row with the sync session
+            role = await run_in_threadpool(current_role, user_id, token_role(claims))
+            if role is None:
+                return error("Token revoked", 401)
+
+            request.state.token_claims = claims
+            request.state.token_role = role
+            return await handler(request, user_id, **request.path_params)
+
+    return wrapper
+
+
+def roles_required(*roles):
+    # Goes below @token_required, like tokens.roles_required
+    def decorator(handler):
+        @wraps(handler)
+        async def wrapper(request, *args, **kwargs):
+            if request.state.token_role not in roles:
+                return error("Not allowed for this account", 403)
+            return await handler(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+async def json_body(request):
+    try:
+        data = await request.json()
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+# ======================================================================
+# Endpoints
+# ======================================================================
+
+@token_required
+async def me(request, user_id):
+    claims = request.state.token_claims
+    student = request.state.token_role == "student"
+    if "name" not in claims:
+        # token issued without embedded claims
+        async with request.app.state.sessions() as session:
+            user = await session.get(Students if student else Advisor, user_id)
+        if user is None:
+            return error("Not found", 404)
+        claims = dict(claims, name=identity(user)[3])
+    return jsonify({
+        "studentID" if student else "advisorID": user_id,
+        "email": claims["email"],
+        "role": request.state.token_role,
+        "name": claims["name"],
+    })
+
+
+@token_required
+async def activities_list(request, user_id):
+    params = request.query_params
+    key = await run_in_threadpool(catalog_key, "api", params.multi_items())
+    body = await run_in_threadpool(lookup, key)
+    if body is None:
+        sort_col, descending = parse_sort(params.get("sort"), ACTIVITY_SORTS)
+        limit = page_size(params.get("limit"))
+        try:
+            where, order = keyset_clauses(Activity.activityID, params.get("cursor"), sort_col, descending)
+        except InvalidCursor:
+            return error("Invalid cursor", 400)
+
+        stmt = select(Activity).order_by(*order).limit(limit + 1)
+        if where is not None:
+            stmt = stmt.where(where)
+        async with request.app.state.sessions() as session:
+            rows = (await session.scalars(stmt)).all()
+        page = make_page(rows, Activity.activityID, limit, sort_col)
+        body = await run_in_threadpool(store, key, current_app.json.dumps({
+            "items": serializers.activity_summary.many(page.items),
+            "next_cursor": page.next_cursor,
+        }))
+    return conditional_body(request, body)
+
+
+@token_required
+async def activity_detail(request, user_id, activity_id):
+    key = activity_key(activity_id)
+    body = await run_in_threadpool(lookup, key)
+    if body is None:
+        async with request.app.state.sessions() as session:
+            a = await session.get(Activity, activity_id)
+        if a is None:
+            return error("Not found", 404)
+        body = await run_in_threadpool(store, key, current_app.json.dumps(serializers.activity_detail(a)))
+    return conditional_body(request, body)
+
+
+@token_required
+async def student_activity_history(request, user_id, student_id):
+    role = request.state.token_role
+    if role not in STAFF and not (role == "student" and user_id == student_id):
+        return error("Not allowed for this account", 403)
+    params = request.query_params
+    try:
+        filters = history_filters(student_id, params)
+    except ValueError:
+        return error("from/to must be YYYY-MM-DD", 400)
+
+    limit = page_size(params.get("limit"))
+    try:
+        where, order = keyset_clauses(Participation.participationID, params.get("cursor"), descending=True)
+    except InvalidCursor:
+        return error("Invalid cursor", 400)
+    if where is not None:
+        filters.append(where)
+
+    stmt = (
+        select(Participation)
+        .join(Activity, Participation.activityID == Activity.activityID)
+        .options(contains_eager(Participation.activity))
+        .where(*filters)
+        .order_by(*order)
+        .limit(limit + 1)
+    )
+    async with request.app.state.sessions() as session:
+        rows = (await session.scalars(stmt)).all()
+    page = make_page(rows, Participation.participationID, limit)
+    return conditional_json(request, {
+        "history": serializers.history_item.many(page.items),
+        "next_cursor": page.next_cursor,
+    })
+
+
+@token_required
+async def participations_list(request, user_id):
+    owner = Participation.studentID if request.state.token_role == "student" else Participation.advisorID
+    async with request.app.state.sessions() as session:
+        parts = (await session.scalars(select(Participation).where(owner == user_id))).all()
+    return conditional_json(request, serializers.participation.many(parts))
+
+
+@token_required
+@roles_required("student")
+async def create_participation(request, user_id):
+    data = await json_body(request)
+    try:
+        activity_id = int(data["activityID"])
+        advisor_id = int(data["advisorID"]) if data.get("advisorID") is not None else None
+    except (KeyError, TypeError, ValueError):
+        return error("activityID is required", 400)
+
+    def run(s):
+        participation_id = apply(user_id, activity_id, advisor_id, session=s)
+        s.commit()
+        return participation_id
+
+    async with request.app.state.sessions() as session:
+        participation_id = await session.run_sync(run)
+    if participation_id is None:
+        return error("You already have an active application for this activity", 409)
+
+    return jsonify({
+        "message": "Participation submitted",
+        "participationID": participation_id,
+    }, 201)
+
+
+@token_required
+@roles_required("student")
+async def withdraw_participation(request, user_id, pid):
+    async with request.app.state.sessions() as session:
+        p = await session.get(Participation, pid)
+        if p is None:
+            return error("Not found", 404)
+        if p.studentID != user_id:
+            return error("Not your application", 403)
+        if p.applicationStatus not in ACTIVE_STATUSES:
+            return error("Application is not active", 409)
+
+        def run(s):
+            # frees the seat and promotes the waitlist, as in the Flask endpoint
+            withdraw(pid, conn=s)
+            s.commit()
+
+        await session.run_sync(run)
+    return jsonify({"message": "Application withdrawn"})
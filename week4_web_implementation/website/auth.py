@@ -1,8 +1,9 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash
-from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import login_user, logout_user, login_required
 
+from .jobs import enqueue
 from .models import Students, Advisor
+from .passwords import hash_password, verify_and_upgrade
 from . import db
 
 auth = Blueprint("auth", __name__)
@@ -24,12 +25,12 @@ def login():
                 )
                 return render_template("login.html")
 
-            if not advisor.advisorPassword or not check_password_hash(
-                advisor.advisorPassword, password
-            ):
+            if not verify_and_upgrade(advisor, "advisorPassword", password):
                 flash("Invalid email or password", "danger")
                 return render_template("login.html")
 
+            # persists a re-hash if the stored one used old parameters
+            db.session.commit()
             login_user(advisor, remember=True)
 
             if advisor.is_admin:
@@ -39,7 +40,8 @@ def login():
 
         # 2) Try student login
         student = Students.query.filter_by(studentEmail=email).first()
-        if student and check_password_hash(student.studentPassword, password):
+        if student and verify_and_upgrade(student, "studentPassword", password):
+            db.session.commit()
             login_user(student, remember=True)
             return redirect(url_for("views.dashboard"))
 
@@ -69,9 +71,7 @@ def register():
                 studentFirstName=first,
                 studentLastName=last,
                 studentEmail=email,
-                studentPassword=generate_password_hash(
-                    password, method="pbkdf2:sha256", salt_length=16
-                ),
+                studentPassword=hash_password(password),
             )
             db.session.add(new_user)
             db.session.commit()
@@ -103,12 +103,15 @@ def register_advisor():
             advisorName=name,
             advisorEmail=email,
             advisorRole=role,
-            advisorPassword=generate_password_hash(password),
+            advisorPassword=hash_password(password),
             status="Pending",  # admin must approve
             is_admin=False,
         )
 
         db.session.add(advisor)
+        db.session.flush()
+        # admins hear about it by mail, after the response
+        enqueue("notify.advisor_registered", {"advisor_id": advisor.advisorID})
         db.session.commit()
 
         flash(
@@ -0,0 +1,457 @@
+import csv
+import io
+import json
+import os
+import re
+import shutil
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from datetime import date, datetime
+from itertools import islice
+
+import click
+from flask import current_app
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+
+from . import db
+from .models import Students, Advisor, Activity, Participation
+from . import stats
+from .applications import record_imported_seats
+from .cache import invalidate_catalog
+from .jobs import enqueue, handler
+from .passwords import service as password_service
+
+# ---------------- BULK IMPORT ---------------- #
+#
+# Rows are read lazily from CSV / JSON / JSON Lines, validated, and written
+# CHUNK_SIZE at a time with one executemany INSERT per chunk, each chunk in
+# its own transaction. A bad row is reported and skipped; it never aborts
+# the rest of the file. A file that can't be parsed any further (broken CSV
+# quoting, malformed JSON) stops the import; rows already written stay.
+#
+# `flask import-data` hashes student passwords on a process pool. Uploads
+# through the admin page are saved to disk and imported by a background job
+# (queue_import below), which hashes through the app's password service
+# pool: a web worker must not fork, and a request must not spend minutes
+# hashing.
+
+CHUNK_SIZE = 500
+MAX_REPORTED_ERRORS = 200
+MAX_JSON_ROW_SIZE = 1024 * 1024  # characters buffered while looking for one row
+STATUSES = {"Pending", "Approved", "Rejected"}
+
+
+class ImportReport:
+    def __init__(self, entity):
+        self.entity = entity
+        self.inserted = 0
+        self.failed = 0
+        self.errors = []
+
+    def error(self, line, message):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+
+    def __str__(self):
+        return f"{self.entity}: {self.inserted} imported, {self.failed} rejected"
+
+    def to_dict(self):
+        return {"entity": self.entity, "inserted": self.inserted, "failed": self.failed, "errors": self.errors}
+
+    @classmethod
+    def from_dict(cls, data):
+        report = cls(data["entity"])
+        report.inserted = data["inserted"]
+        report.failed = data["failed"]
+        report.errors = [tuple(error) for error in data["errors"]]
+        return report
+
+
+# ---------------- READERS ---------------- #
+
+def _iter_csv(text):
+    reader = csv.DictReader(text)
+    try:
+        for row in reader:
+            yield {k.strip(): (v.strip() if isinstance(v, str) else v) for k, v in row.items() if k}
+    except csv.Error as e:
+        raise ValueError(f"malformed CSV at line {reader.line_num}: {e}")
+
+
+def _iter_json_lines(text):
+    for line in text:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            # reported as an invalid row by the importer
+            yield line
+
+
+def _iter_json_array(text, chunk_size=65536):
+    # Incremental parse of a top-level JSON array of objects
+    decoder = json.JSONDecoder()
+    buf = ""
+    started = False
+    eof = False
+    row = 1
+    while True:
+        buf = buf.lstrip()
+        if not started:
+            if buf.startswith("["):
+                buf = buf[1:]
+                started = True
+                continue
+        elif buf.startswith(","):
+            buf = buf[1:]
+            continue
+        elif buf.startswith("]"):
+            return
+        elif buf:
+            try:
+                obj, end = decoder.raw_decode(buf)
+            except ValueError as e:
+                if eof:
+                    raise ValueError(f"row {row}: {e}")
+                if len(buf) > MAX_JSON_ROW_SIZE:
+                    # malformed, or one huge row: don't buffer the whole file
+                    raise ValueError(f"row {row}: not valid JSON within {MAX_JSON_ROW_SIZE} characters")
+            else:
+                yield obj
+                buf = buf[end:]
+                row += 1
+                continue
+
+        if eof:
+            if started:
+                raise ValueError("Unterminated JSON array")
+            raise ValueError("Expected a JSON array")
+        chunk = text.read(chunk_size)
+        eof = not chunk
+        buf += chunk
+
+
+def read_rows(stream, fmt):
+    # stream is a binary file object; yields (line_number, dict)
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        # line 1 is the header
+        return enumerate(_iter_csv(text), start=2)
+    if fmt == "jsonl":
+        return enumerate(_iter_json_lines(text), start=1)
+    if fmt == "json":
+        return enumerate(_iter_json_array(text), start=1)
+    raise ValueError(f"Unsupported format: {fmt}")
+
+
+def guess_format(filename):
+    ext = os.path.splitext(filename or "")[1].lower()
+    return {".csv": "csv", ".json": "json", ".jsonl": "jsonl", ".ndjson": "jsonl"}.get(ext)
+
+
+# ---------------- VALIDATION ---------------- #
+
+def _text(row, *keys):
+    for key in keys:
+        value = row.get(key)
+        if value not in (None, ""):
+            return str(value).strip()
+    return None
+
+
+def _int(row, *keys):
+    value = _text(row, *keys)
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"{keys[0]} must be a whole number")
+
+
+def _date(row, *keys):
+    value = _text(row, *keys)
+    if value is None:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise ValueError(f"{keys[0]} must be a YYYY-MM-DD date")
+
+
+def _student(row):
+    values = {
+        "studentFirstName": _text(row, "firstName", "first_name"),
+        "studentLastName": _text(row, "lastName", "last_name"),
+        "studentEmail": _text(row, "email"),
+        "studentYear": _int(row, "year"),
+        "studentAddress": _text(row, "address"),
+        "phoneNumber": _int(row, "phone"),
+        "studentPassword": _text(row, "password"),
+    }
+    for field in ("studentFirstName", "studentLastName", "studentEmail", "studentPassword"):
+        if not values[field]:
+            raise ValueError(f"{field} is required")
+    return values
+
+
+def _activity(row):
+    values = {
+        "activityName": _text(row, "name"),
+        "activityCategory": _text(row, "category"),
+        "activityLocation": _text(row, "location"),
+        "activityDetails": _text(row, "details"),
+        "activityStartDate": _date(row, "startDate", "start_date"),
+        "activityEndDate": _date(row, "endDate", "end_date"),
+        "activityFrequency": _text(row, "frequency"),
+        "advisorID": _int(row, "advisorID"),
+        "capacity": _int(row, "capacity"),
+    }
+    if not values["activityName"]:
+        raise ValueError("name is required")
+    return values
+
+
+def _participation(row):
+    values = {
+        "studentID": _int(row, "studentID"),
+        "activityID": _int(row, "activityID"),
+        "advisorID": _int(row, "advisorID"),
+        "applicationStatus": _text(row, "status") or "Pending",
+        "dateApplied": _date(row, "dateApplied") or date.today(),
+        "advisorFeedback": _text(row, "feedback"),
+        "achievements": _text(row, "achievements"),
+    }
+    if values["studentID"] is None or values["activityID"] is None:
+        raise ValueError("studentID and activityID are required")
+    if values["applicationStatus"] not in STATUSES:
+        raise ValueError(f"status must be one of {', '.join(sorted(STATUSES))}")
+    return values
+
+
+def _existing(column, values):
+    values = {v for v in values if v is not None}
+    if not values:
+        return set()
+    return set(db.session.execute(select(column).where(column.in_(values))).scalars())
+
+
+# ---------------- IMPORTERS ---------------- #
+
+def _prepare_students(chunk, report, pool, seen_emails):
+    taken = _existing(Students.studentEmail, (r["studentEmail"] for _, r in chunk))
+    taken |= _existing(Advisor.advisorEmail, (r["studentEmail"] for _, r in chunk))
+
+    rows = []
+    for line, values in chunk:
+        email = values["studentEmail"]
+        if email in taken or email in seen_emails:
+            report.error(line, f"email {email} already registered")
+            continue
+        seen_emails.add(email)
+        rows.append((line, values))
+
+    passwords = [v["studentPassword"] for _, v in rows]
+    if pool is None:
+        hashes = password_service().hash_many(passwords)
+    else:
+        hashes = pool.map(password_service().hasher(), passwords, chunksize=16)
+    for (_, values), hashed in zip(rows, hashes):
+        values["studentPassword"] = hashed
+    return rows
+
+
+def _prepare_activities(chunk, report, pool, seen):
+    advisors = _existing(Advisor.advisorID, (r["advisorID"] for _, r in chunk))
+    rows = []
+    for line, values in chunk:
+        if values["advisorID"] is not None and values["advisorID"] not in advisors:
+            report.error(line, f"advisor {values['advisorID']} does not exist")
+            continue
+        rows.append((line, values))
+    return rows
+
+
+def _prepare_participations(chunk, report, pool, seen):
+    students = _existing(Students.studentID, (r["studentID"] for _, r in chunk))
+    activities = _existing(Activity.activityID, (r["activityID"] for _, r in chunk))
+    advisors = _existing(Advisor.advisorID, (r["advisorID"] for _, r in chunk))
+
+    rows = []
+    for line, values in chunk:
+        if values["studentID"] not in students:
+            report.error(line, f"student {values['studentID']} does not exist")
+        elif values["activityID"] not in activities:
+            report.error(line, f"activity {values['activityID']} does not exist")
+        elif values["advisorID"] is not None and values["advisorID"] not in advisors:
+            report.error(line, f"advisor {values['advisorID']} does not exist")
+        else:
+            rows.append((line, values))
+    return rows
+
+
+def _record_participations(conn, rows):
+    # Core INSERTs skip the ORM hooks that maintain participation_summary
+    stats.record_inserts(conn, [
+        (v["studentID"], v["advisorID"], v["activityID"], v["applicationStatus"])
+        for v in rows
+    ])
+    # imported Approved rows take seats; capacity isn't enforced on import
+    record_imported_seats(conn, rows)
+
+
+ENTITIES = {
+    "students": (Students, _student, _prepare_students, None),
+    "activities": (Activity, _activity, _prepare_activities, None),
+    "participations": (Participation, _participation, _prepare_participations, _record_participations),
+}
+
+# Background jobs queued once an import has written rows
+FOLLOW_UP_JOBS = {
+    "activities": "search.optimize",
+    "participations": "stats.reconcile",
+}
+
+
+def _write(model, rows, after_insert):
+    with db.engine.begin() as conn:
+        conn.execute(insert(model), rows)
+        if after_insert:
+            after_insert(conn, rows)
+
+
+def _write_chunk(model, rows, after_insert, report):
+    if not rows:
+        return
+    try:
+        _write(model, [values for _, values in rows], after_insert)
+        report.inserted += len(rows)
+        return
+    except IntegrityError:
+        pass
+
+    # Something slipped past validation; isolate the offending rows
+    for line, values in rows:
+        try:
+            _write(model, [values], after_insert)
+            report.inserted += 1
+        except IntegrityError as e:
+            report.error(line, str(e.orig))
+
+
+def import_rows(entity, rows, chunk_size=CHUNK_SIZE, workers=None):
+    # workers: hashing processes (None = one per CPU, 0 = the password
+    # service's thread pool)
+    model, validate, prepare, after_insert = ENTITIES[entity]
+    report = ImportReport(entity)
+    seen = set()
+
+    executor = nullcontext(None) if workers == 0 else ProcessPoolExecutor(max_workers=workers)
+    with executor as pool:
+        rows = iter(rows)
+        stopped = False
+        while not stopped:
+            batch = []
+            try:
+                for item in islice(rows, chunk_size):
+                    batch.append(item)
+            except ValueError as e:
+                # malformed file (e.g. broken JSON); rows read so far are kept
+                report.error(None, f"stopped reading: {e}")
+                stopped = True
+            if not batch:
+                break
+
+            chunk = []
+            for line, row in batch:
+                try:
+                    if not isinstance(row, dict):
+                        raise ValueError("row must be an object")
+                    chunk.append((line, validate(row)))
+                except (ValueError, TypeError) as e:
+                    report.error(line, str(e))
+
+            _write_chunk(model, prepare(chunk, report, pool, seen), after_insert, report)
+
+    # Core INSERTs skip the ORM hooks that clear the catalog cache
+    if model is Activity and report.inserted:
+        invalidate_catalog()
+
+    if entity in FOLLOW_UP_JOBS and report.inserted:
+        with db.engine.begin() as conn:
+            enqueue(FOLLOW_UP_JOBS[entity], conn=conn)
+
+    report.errors.sort(key=lambda e: e[0] or 0)
+    return report
+
+
+# ---------------- QUEUED IMPORTS (admin uploads) ---------------- #
+#
+# The upload is saved as <IMPORT_FOLDER>/<id>.<fmt> (default
+# instance/imports) and an "import.file"
+# job imports it. The job writes the report to <id>.json and removes the
+# upload; the admin page shows the report once it exists.
+
+def _import_dir():
+    path = current_app.config.get("IMPORT_FOLDER") or os.path.join(current_app.instance_path, "imports")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def queue_import(entity, stream, fmt):
+    # -> import id; the job is queued in db.session, so the caller commits
+    import_id = uuid.uuid4().hex
+    with open(os.path.join(_import_dir(), f"{import_id}.{fmt}"), "wb") as f:
+        shutil.copyfileobj(stream, f)
+    enqueue("import.file", {"import_id": import_id, "entity": entity, "fmt": fmt})
+    return import_id
+
+
+def import_result(import_id):
+    # -> the finished ImportReport, or None while the job hasn't run
+    if not re.fullmatch(r"[0-9a-f]{32}", import_id or ""):
+        return None
+    try:
+        with open(os.path.join(_import_dir(), f"{import_id}.json")) as f:
+            return ImportReport.from_dict(json.load(f))
+    except FileNotFoundError:
+        return None
+
+
+@handler("import.file")
+def run_queued_import(import_id, entity, fmt):
+    source = os.path.join(_import_dir(), f"{import_id}.{fmt}")
+    if not os.path.exists(source):
+        return  # already imported
+    with open(source, "rb") as f:
+        report = import_rows(entity, read_rows(f, fmt), workers=0)
+    with open(os.path.join(_import_dir(), f"{import_id}.json"), "w") as f:
+        json.dump(report.to_dict(), f)
+    os.remove(source)
+
+
+# ---------------- CLI: flask import-data ... ---------------- #
+
+@click.command("import-data")
+@click.argument("entity", type=click.Choice(sorted(ENTITIES)))
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--format", "fmt", type=click.Choice(["csv", "json", "jsonl"]),
+              help="Defaults to the file extension.")
+@click.option("--chunk-size", default=CHUNK_SIZE, show_default=True)
+@click.option("--workers", type=int, help="Password hashing processes; 0 hashes inline.")
+def import_command(entity, path, fmt, chunk_size, workers):
+    fmt = fmt or guess_format(path)
+    if not fmt:
+        raise click.BadParameter("cannot tell the format from the extension; pass --format")
+
+    with open(path, "rb") as f:
+        report = import_rows(entity, read_rows(f, fmt), chunk_size=chunk_size, workers=workers)
+
+    for line, message in report.errors:
+        click.echo(f"line {line}: {message}" if line else message, err=True)
+    click.echo(str(report))
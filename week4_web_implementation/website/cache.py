@@ -0,0 +1,163 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from flask import current_app, request
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+
+from .models import Activity, Advisor
+
+# ---------------- CATALOG RESPONSE CACHE ---------------- #
+#
+# The activity catalog changes rarely but is read by every student, so the
+# rendered catalog table and the API's activity JSON are cached.
+#
+# The backend is an in-process LRU by default. Set CACHE_REDIS_URL to share
+# one Redis between workers; LocalCache uses redis-py's method names
+# (get/set(ex=)/delete) so either can sit behind cache().
+#
+# Invalidation: the single-activity payload lives under activity:<id> and
+# is deleted when that activity changes. Listing pages embed a catalog
+# generation in their key, and any activity (or advisor name) change
+# replaces the generation, orphaning every cached listing at once. Changes
+# are collected during the flush and applied after the commit, so a reader
+# can't re-cache the old rows in between.
+
+DEFAULTS = {
+    "CACHE_REDIS_URL": None,
+    "CACHE_SIZE": 512,
+    "CACHE_TTL": 300,
+}
+GENERATION_KEY = "catalog:generation"
+
+
+class LocalCache:
+    def __init__(self, maxsize=512):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        with self._lock:
+            entry = self._data.get(name)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires is not None and expires < time.monotonic():
+                del self._data[name]
+                return None
+            self._data.move_to_end(name)
+            return value
+
+    def set(self, name, value, ex=None):
+        with self._lock:
+            self._data[name] = (time.monotonic() + ex if ex else None, value)
+            self._data.move_to_end(name)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return True
+
+    def delete(self, *names):
+        with self._lock:
+            return sum(self._data.pop(name, None) is not None for name in names)
+
+
+def init_app(app):
+    for key, value in DEFAULTS.items():
+        app.config.setdefault(key, value)
+    if app.config["CACHE_REDIS_URL"]:
+        import redis  # optional dependency, only needed for a shared cache
+        backend = redis.Redis.from_url(app.config["CACHE_REDIS_URL"])
+    else:
+        backend = LocalCache(maxsize=app.config["CACHE_SIZE"])
+    app.extensions["response_cache"] = backend
+
+
+def cache():
+    return current_app.extensions["response_cache"]
+
+
+def _text(value):
+    # redis-py hands back bytes
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def _generation():
+    generation = _text(cache().get(GENERATION_KEY))
+    if generation is None:
+        generation = uuid.uuid4().hex
+        cache().set(GENERATION_KEY, generation)
+    return generation
+
+
+def catalog_key(kind, params=None):
+    # Listing key: catalog generation + endpoint kind + query string.
+    # params: (name, value) pairs, defaulting to the Flask request's
+    if params is None:
+        params = request.args.items(multi=True)
+    args = "&".join(f"{k}={v}" for k, v in sorted(params))
+    return f"catalog:{_generation()}:{kind}:{args}"
+
+
+def activity_key(activity_id):
+    return f"activity:{activity_id}"
+
+
+def lookup(key):
+    return _text(cache().get(key))
+
+
+def store(key, value):
+    cache().set(key, value, ex=current_app.config["CACHE_TTL"])
+    return value
+
+
+def cached(key, build):
+    # build() returns the str to cache (rendered HTML or JSON text)
+    value = lookup(key)
+    if value is None:
+        value = store(key, build())
+    return value
+
+
+def invalidate_catalog(activity_ids=()):
+    backend = cache()
+    backend.set(GENERATION_KEY, uuid.uuid4().hex)
+    if activity_ids:
+        backend.delete(*(activity_key(i) for i in activity_ids))
+
+
+# ---------------- ORM HOOKS ---------------- #
+
+def _changed(target, activity_id=None):
+    db_session = object_session(target)
+    if db_session is not None:
+        db_session.info.setdefault("catalog_changes", set()).add(activity_id)
+
+
+@event.listens_for(Activity, "after_insert")
+@event.listens_for(Activity, "after_update")
+@event.listens_for(Activity, "after_delete")
+def _activity_changed(mapper, conn, target):
+    _changed(target, target.activityID)
+
+
+@event.listens_for(Advisor, "after_update")
+def _advisor_changed(mapper, conn, target):
+    # advisor names are shown in the catalog
+    if inspect(target).attrs.advisorName.history.has_changes():
+        _changed(target)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_changes(db_session):
+    changes = db_session.info.pop("catalog_changes", None)
+    if changes:
+        invalidate_catalog([i for i in changes if i is not None])
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(db_session):
+    db_session.info.pop("catalog_changes", None)
@@ -0,0 +1,344 @@
+import json
+import time
+from datetime import datetime, timedelta
+
+import click
+from flask import Response, current_app, render_template, stream_with_context
+from flask.cli import AppGroup
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.orm import joinedload
+
+from . import db, serializers
+from .models import Activity, Advisor, ChangeLog, Participation, Students
+from .notifications import Broker
+from .stats import counts_for
+
+# ---------------- CHANGE LOG ---------------- #
+#
+# change_log gets a row for every INSERT, UPDATE and DELETE on the tables in
+# LOGGED. Database triggers write it, as they do for activity_fts, so the
+# ORM, Core bulk statements and the importer are all covered. seq is
+# AUTOINCREMENT, so it only grows and works as a cursor: the advisor
+# dashboard stream and the incremental sync API (sync() below) both read
+# "everything after seq N".
+#
+# That only works if seq order is commit order: a transaction that took seq
+# N and commits after N+1 has been served would never be delivered. SQLite
+# has one writer at a time, so it holds there. On PostgreSQL the trigger
+# takes a transaction-level advisory lock (SEQ_LOCK) before it draws a seq,
+# so transactions that write to logged tables commit one at a time, from
+# their first logged write, just as every write does on SQLite.
+#
+# Each row carries the studentID / advisorID of the row that changed, so a
+# feed is an index range scan on (advisorID, seq). An update that moves a
+# row to another advisor is logged for the old advisor too, so their feed
+# can drop it.
+#
+# Tables only read by sync() log an UPDATE only when it sets a column the
+# sync serializer sends (UPDATE_OF below), so seatsTaken bumps and password
+# rehashes don't push an upsert to every client.
+#
+# Readers wake up through `feed` when a connection in this process commits
+# a write to a logged table. Writes from other processes are picked up by
+# re-checking every FEED_POLL seconds.
+
+DEFAULTS = {
+    "FEED_POLL": 5,
+    "FEED_STREAM_SECONDS": 60,
+}
+
+# table -> (primary key, {change_log column: column of the table})
+LOGGED = {
+    "participation": ("participationID", {"studentID": "studentID", "advisorID": "advisorID"}),
+    "activity": ("activityID", {}),
+    "students": ("studentID", {"studentID": "studentID"}),
+    "advisor": ("advisorID", {"advisorID": "advisorID"}),
+}
+AUDIENCE = ("studentID", "advisorID")
+
+log = ChangeLog.__table__
+SEQ_LOCK = 0x6368616E67656C6F  # pg_advisory_xact_lock key
+feed = Broker()
+FEED = "changes"
+
+
+# ---------------- TRIGGERS ---------------- #
+
+def _values(conn, table, ref, op):
+    # column list and VALUES for one change_log row; op is an SQL expression
+    q = conn.dialect.identifier_preparer.quote
+    pk, audience = LOGGED[table]
+    now = "CURRENT_TIMESTAMP" if conn.dialect.name == "sqlite" else "(now() AT TIME ZONE 'utc')"
+    cols = ", ".join(q(c) for c in ("entity", "entityID", "op") + AUDIENCE + ("changedAt",))
+    refs = ", ".join(f"{ref}.{q(audience[c])}" if c in audience else "NULL" for c in AUDIENCE)
+    return cols, f"'{table}', {ref}.{q(pk)}, {op}, {refs}, {now}"
+
+
+def _moved(conn, table, old="old", new="new"):
+    # the row's student / advisor changed in this UPDATE
+    q = conn.dialect.identifier_preparer.quote
+    distinct = "IS NOT" if conn.dialect.name == "sqlite" else "IS DISTINCT FROM"
+    return " OR ".join(f"{old}.{q(c)} {distinct} {new}.{q(c)}" for c in LOGGED[table][1].values())
+
+
+def _update_event(conn, table):
+    # "UPDATE", or "UPDATE OF <columns>" for tables in UPDATE_OF
+    q = conn.dialect.identifier_preparer.quote
+    columns = UPDATE_OF.get(table)
+    return f"UPDATE OF {', '.join(q(c) for c in columns)}" if columns else "UPDATE"
+
+
+def _sqlite_triggers(conn, table, replace=False):
+    q = conn.dialect.identifier_preparer.quote
+    target = q(log.name)
+    for suffix, when, ref, op in (("ai", "INSERT", "new", "'insert'"),
+                                  ("au", _update_event(conn, table), "new", "'update'"),
+                                  ("ad", "DELETE", "old", "'delete'")):
+        cols, values = _values(conn, table, ref, op)
+        body = f"INSERT INTO {target} ({cols}) VALUES ({values}); "
+        moved = _moved(conn, table) if suffix == "au" else None
+        if moved:
+            _, old_values = _values(conn, table, "old", op)
+            body += f"INSERT INTO {target} ({cols}) SELECT {old_values} WHERE {moved}; "
+        if replace:
+            conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS change_log_{table}_{suffix}")
+        conn.exec_driver_sql(
+            f"CREATE TRIGGER IF NOT EXISTS change_log_{table}_{suffix} "
+            f"AFTER {when} ON {q(table)} BEGIN {body}END"
+        )
+
+
+def _postgresql_triggers(conn, table, replace=False):
+    # the function and trigger are always replaced
+    q = conn.dialect.identifier_preparer.quote
+    target = q(log.name)
+    cols, new_values = _values(conn, table, "NEW", "lower(TG_OP)")
+    _, old_values = _values(conn, table, "OLD", "lower(TG_OP)")
+    moved = _moved(conn, table, "OLD", "NEW")
+    moved_sql = (
+        f"IF TG_OP = 'UPDATE' AND ({moved}) THEN INSERT INTO {target} ({cols}) VALUES ({old_values}); END IF; "
+        if moved else ""
+    )
+    conn.exec_driver_sql(
+        f"CREATE OR REPLACE FUNCTION change_log_{table}() RETURNS trigger AS $$ BEGIN "
+        f"PERFORM pg_advisory_xact_lock({SEQ_LOCK}); "
+        f"IF TG_OP = 'DELETE' THEN INSERT INTO {target} ({cols}) VALUES ({old_values}); RETURN OLD; END IF; "
+        f"INSERT INTO {target} ({cols}) VALUES ({new_values}); "
+        f"{moved_sql}RETURN NEW; END $$ LANGUAGE plpgsql"
+    )
+    conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS change_log_{table} ON {q(table)}")
+    conn.exec_driver_sql(
+        f"CREATE TRIGGER change_log_{table} AFTER INSERT OR {_update_event(conn, table)} OR DELETE ON {q(table)} "
+        f"FOR EACH ROW EXECUTE FUNCTION change_log_{table}()"
+    )
+
+
+def create_triggers(conn, replace=False):
+    # Idempotent; called by migrations when LOGGED grows. replace=True drops
+    # existing triggers first, for when their definition changes.
+    install = _postgresql_triggers if conn.dialect.name == "postgresql" else _sqlite_triggers
+    for table in LOGGED:
+        install(conn, table, replace)
+
+
+# ---------------- WAKING READERS ---------------- #
+
+def _written(conn, clauseelement, multiparams, params, execution_options, result):
+    table = getattr(clauseelement, "table", None) if getattr(clauseelement, "is_dml", False) else None
+    if getattr(table, "name", None) in LOGGED:
+        conn.info["changes"] = "pending"
+
+
+def _committed(conn):
+    if conn.info.get("changes") == "pending":
+        conn.info["changes"] = "committed"
+
+
+def _rolled_back(conn):
+    conn.info.pop("changes", None)
+
+
+def _checked_in(dbapi_connection, record):
+    # after the commit has actually happened, unlike the "commit" event
+    if record.info.pop("changes", None) == "committed":
+        feed.publish([FEED])
+
+
+def watch(engine):
+    if not event.contains(engine, "after_execute", _written):
+        event.listen(engine, "after_execute", _written)
+        event.listen(engine, "commit", _committed)
+        event.listen(engine, "rollback", _rolled_back)
+        event.listen(engine.pool, "checkin", _checked_in)
+
+
+def init_app(app):
+    for key, value in DEFAULTS.items():
+        app.config.setdefault(key, value)
+    with app.app_context():
+        for engine in db.engines.values():
+            watch(engine)
+
+
+# ---------------- READS ---------------- #
+
+def latest_seq():
+    return db.session.execute(select(func.max(log.c.seq))).scalar() or 0
+
+
+def advisor_changes(advisor_id, after_seq):
+    # -> (last seq seen, participation ids changed since after_seq, in order)
+    rows = db.session.execute(
+        select(log.c.seq, log.c.entityID)
+        .where(log.c.advisorID == advisor_id, log.c.seq > after_seq, log.c.entity == "participation")
+        .order_by(log.c.seq)
+    ).all()
+    ids = list(dict.fromkeys(entity_id for _, entity_id in rows))
+    return (rows[-1].seq if rows else after_seq), ids
+
+
+# ---------------- INCREMENTAL SYNC ---------------- #
+#
+# Mobile clients keep a local copy of the catalog, the advisors, their own
+# participations and their own profile. sync() returns what changed after
+# their cursor: an upsert with the current row, or a tombstone when the row
+# is gone. Several changes to one row collapse into one entry.
+
+# entity -> (model, serializer, visible to every student?)
+SYNCED = {
+    "activity": (Activity, serializers.activity_detail, True),
+    "advisor": (Advisor, serializers.advisor, True),
+    "participation": (Participation, serializers.participation, False),
+    "students": (Students, serializers.student, False),
+}
+
+
+# Tables whose change_log rows sync() is the only reader of; participation
+# also feeds the advisor dashboard, which shows more than its serializer
+UPDATE_OF = {
+    entity: sorted({path.split(".")[0] for path in serializer.fields.values()} | set(LOGGED[entity][1].values()))
+    for entity, (_, serializer, _) in SYNCED.items()
+    if entity != "participation"
+}
+
+
+class CursorExpired(ValueError):
+    pass
+
+
+def sync(student_id, since, limit):
+    # -> {"changes": [...], "next": seq, "more": bool}; raises CursorExpired
+    # if entries after `since` have been purged. since=None only returns
+    # the current seq: clients read it before loading the full lists.
+    if since is None:
+        return {"changes": [], "next": latest_seq(), "more": False}
+
+    oldest = db.session.execute(select(func.min(log.c.seq))).scalar()
+    if oldest is not None and since < oldest - 1:
+        raise CursorExpired("Cursor expired")
+
+    public = [entity for entity, (_, _, shared) in SYNCED.items() if shared]
+    rows = db.session.execute(
+        select(log.c.seq, log.c.entity, log.c.entityID)
+        .where(log.c.seq > since, (log.c.entity.in_(public)) | (log.c.studentID == student_id))
+        .order_by(log.c.seq)
+        .limit(limit + 1)
+    ).all()
+    more = len(rows) > limit
+    rows = rows[:limit]
+
+    # latest seq per row, then one query per entity for the current state
+    latest = {}
+    for seq, entity, entity_id in rows:
+        latest.pop((entity, entity_id), None)
+        latest[entity, entity_id] = seq
+    current = {}
+    for entity, (model, _, _) in SYNCED.items():
+        ids = [entity_id for e, entity_id in latest if e == entity]
+        if ids:
+            pk = inspect(model).primary_key[0]
+            current[entity] = {getattr(obj, pk.key): obj for obj in model.query.filter(pk.in_(ids))}
+
+    changes = []
+    for (entity, entity_id), seq in latest.items():
+        _, serializer, shared = SYNCED[entity]
+        obj = current[entity].get(entity_id)
+        if obj is not None and not shared and obj.studentID != student_id:
+            obj = None  # no longer theirs
+        if obj is None:
+            changes.append({"seq": seq, "entity": entity, "id": entity_id, "op": "delete"})
+        else:
+            changes.append({"seq": seq, "entity": entity, "id": entity_id, "op": "upsert",
+                            "data": serializer(obj)})
+
+    return {
+        "changes": changes,
+        "next": rows[-1].seq if rows else since,
+        "more": more,
+    }
+
+
+# ---------------- ADVISOR QUEUE STREAM ---------------- #
+
+def _event(name, data, event_id):
+    return f"id: {event_id}\nevent: {name}\ndata: {json.dumps(data)}\n\n"
+
+
+def advisor_stream(advisor_id, since):
+    # Server-Sent Events for the advisor dashboard: each changed request as
+    # a rendered table row ("participation"), requests that left the queue
+    # ("removed"), and fresh status counts ("counts"). The dashboard renders
+    # the full list once and passes its seq as `since`.
+    app = current_app._get_current_object()
+    poll = app.config["FEED_POLL"]
+
+    def events():
+        after_seq = since
+        deadline = time.monotonic() + app.config["FEED_STREAM_SECONDS"]
+        seen = feed.version(FEED)
+        yield "retry: 3000\n\n"
+        while True:
+            after_seq, ids = advisor_changes(advisor_id, after_seq)
+            if ids:
+                rows = {
+                    p.participationID: p
+                    for p in Participation.query.options(
+                        joinedload(Participation.student), joinedload(Participation.activity)
+                    ).filter(Participation.participationID.in_(ids))
+                }
+                for pid in ids:
+                    p = rows.get(pid)
+                    if p is None or p.advisorID != advisor_id:
+                        yield _event("removed", {"id": pid}, after_seq)
+                    else:
+                        html = render_template("_advisor_row.html", p=p)
+                        yield _event("participation", {"id": pid, "html": html}, after_seq)
+                yield _event("counts", counts_for("advisor", advisor_id), after_seq)
+            else:
+                yield ": keep-alive\n\n"
+            # don't hold a pooled connection while waiting
+            db.session.remove()
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            seen = feed.wait(FEED, seen, min(poll, remaining))
+
+    return Response(stream_with_context(events()), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+    })
+
+
+# ---------------- CLI: flask changes ... ---------------- #
+
+changes_cli = AppGroup("changes", help="Change log.")
+
+
+@changes_cli.command("purge")
+@click.option("--days", default=30, show_default=True, help="Delete entries older than this.")
+def purge_command(days):
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    with db.engine.begin() as conn:
+        count = conn.execute(log.delete().where(log.c.changedAt < cutoff)).rowcount
+    click.echo(f"Deleted {count} change log entries.")
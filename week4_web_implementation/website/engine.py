@@ -0,0 +1,79 @@
+import os
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+# ---------------- DATABASE ENGINE ---------------- #
+#
+# The database URL comes from DATABASE_URL (falling back to the bundled
+# SQLite file), so the same code can run against PostgreSQL.
+#
+# SQLite connections get the pragmas in SQLITE_PRAGMAS on connect. WAL lets
+# readers keep reading while a writer commits, and busy_timeout makes a
+# second writer wait for the lock instead of failing straight away with
+# "database is locked". Server databases get a sized, pre-pinged pool
+# instead.
+
+DEFAULT_URI = "sqlite:///student_activities.db"
+
+DEFAULTS = {
+    "SQLITE_PRAGMAS": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": 5000,  # ms
+        "cache_size": -64000,  # negative = KiB, so 64 MB
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY",
+    },
+    "DB_POOL_SIZE": 10,
+    "DB_MAX_OVERFLOW": 20,
+    "DB_POOL_TIMEOUT": 30,
+    "DB_POOL_RECYCLE": 1800,
+}
+
+
+def database_uri():
+    uri = os.environ.get("DATABASE_URL", DEFAULT_URI)
+    # Heroku-style URLs still use the scheme SQLAlchemy dropped in 1.4
+    if uri.startswith("postgres://"):
+        uri = "postgresql://" + uri[len("postgres://"):]
+    return uri
+
+
+def engine_options(config):
+    url = make_url(config["SQLALCHEMY_DATABASE_URI"])
+    options = {"pool_size": config["DB_POOL_SIZE"], "max_overflow": config["DB_MAX_OVERFLOW"],
+               "pool_timeout": config["DB_POOL_TIMEOUT"]}
+
+    if url.get_backend_name() == "sqlite":
+        if url.database in (None, "", ":memory:"):
+            # in-memory databases live in a single connection
+            return {}
+        # Python-level lock wait; busy_timeout covers the rest
+        options["connect_args"] = {"timeout": config["SQLITE_PRAGMAS"].get("busy_timeout", 5000) / 1000}
+        return options
+
+    options["pool_pre_ping"] = True
+    options["pool_recycle"] = config["DB_POOL_RECYCLE"]
+    return options
+
+
+def init_app(app):
+    # Runs before db.init_app(), which reads SQLALCHEMY_ENGINE_OPTIONS
+    for key, value in DEFAULTS.items():
+        app.config.setdefault(key, value)
+    options = engine_options(app.config)
+    options.update(app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {}))
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = options
+
+
+def install_pragmas(engine, pragmas):
+    if engine.dialect.name != "sqlite" or not pragmas:
+        return
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_conn, record):
+        cursor = dbapi_conn.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
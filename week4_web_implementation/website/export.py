@@ -0,0 +1,112 @@
+import csv
+import io
+import json
+from datetime import date
+
+import click
+from sqlalchemy import select
+
+from . import db
+from .models import Students, Activity, Participation
+
+# ---------------- PARTICIPATION EXPORT ---------------- #
+#
+# Rows are pulled from the database in batches of YIELD_PER and written out
+# as they arrive, so an export of any size runs in constant memory and the
+# first bytes leave before the query has finished.
+
+YIELD_PER = 1000
+FLUSH_EVERY = 500
+
+COLUMNS = [
+    Participation.participationID,
+    Participation.dateApplied,
+    Participation.applicationStatus,
+    Participation.approvalDate,
+    Participation.advisorFeedback,
+    Participation.achievements,
+    Participation.advisorID,
+    Students.studentID,
+    Students.studentFirstName,
+    Students.studentLastName,
+    Students.studentEmail,
+    Students.studentYear,
+    Activity.activityID,
+    Activity.activityName,
+    Activity.activityCategory,
+    Activity.activityLocation,
+    Activity.activityStartDate,
+    Activity.activityEndDate,
+]
+HEADER = [c.key for c in COLUMNS]
+
+FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "jsonl": ("application/x-ndjson", "jsonl"),
+}
+
+
+def export_query(status=None):
+    stmt = (
+        select(*COLUMNS)
+        .select_from(Participation)
+        .outerjoin(Students, Participation.studentID == Students.studentID)
+        .outerjoin(Activity, Participation.activityID == Activity.activityID)
+        .order_by(Participation.participationID)
+    )
+    if status:
+        stmt = stmt.where(Participation.applicationStatus == status)
+    return stmt.execution_options(yield_per=YIELD_PER)
+
+
+def _rows(status):
+    return db.session.execute(export_query(status))
+
+
+def _plain(value):
+    return value.isoformat() if isinstance(value, date) else value
+
+
+def iter_csv(status=None):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(HEADER)
+
+    for i, row in enumerate(_rows(status), start=1):
+        writer.writerow([_plain(v) for v in row])
+        if i % FLUSH_EVERY == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+
+    yield buf.getvalue()
+
+
+def iter_jsonl(status=None):
+    lines = []
+    for row in _rows(status):
+        record = {k: _plain(v) for k, v in zip(HEADER, row)}
+        lines.append(json.dumps(record))
+        if len(lines) >= FLUSH_EVERY:
+            yield "\n".join(lines) + "\n"
+            lines = []
+
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+def iter_export(fmt, status=None):
+    if fmt == "jsonl":
+        return iter_jsonl(status)
+    return iter_csv(status)
+
+
+# ---------------- CLI: flask export-participations ---------------- #
+
+@click.command("export-participations")
+@click.option("--format", "fmt", type=click.Choice(sorted(FORMATS)), default="csv", show_default=True)
+@click.option("--status", help="Only export one application status.")
+@click.option("--output", "-o", type=click.File("w"), default="-", help="Defaults to stdout.")
+def export_command(fmt, status, output):
+    for chunk in iter_export(fmt, status):
+        output.write(chunk)
@@ -0,0 +1,140 @@
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached, object_session
+
+from . import db
+from .models import Students, Advisor
+
+# ---------------- IDENTITY CACHE FOR flask-login ---------------- #
+#
+# load_user() runs on every authenticated request. Instead of a SELECT each
+# time we keep a small TTL + LRU cache of each user's column values and
+# re-attach a copy to the current session with merge(load=False), which
+# costs no SQL. Edits made through the ORM (profile pages, admin status
+# changes, API updates) drop the entry via the mapper events below; the TTL
+# bounds staleness for changes made by other processes. As in cache.py,
+# changed keys are collected during the flush and dropped after the commit,
+# so a concurrent request can't re-cache the old row in between.
+
+USER_MODELS = {"s": Students, "a": Advisor}
+
+
+class IdentityCache:
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self.misses += 1
+                if entry is not None:
+                    del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            if self._data.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+def init_app(app):
+    app.extensions["identity_cache"] = IdentityCache(
+        maxsize=app.config.setdefault("IDENTITY_CACHE_SIZE", 1024),
+        ttl=app.config.setdefault("IDENTITY_CACHE_TTL", 60),
+    )
+
+
+def _cache():
+    return current_app.extensions["identity_cache"]
+
+
+def _snapshot(user):
+    return {attr.key: getattr(user, attr.key) for attr in inspect(type(user)).column_attrs}
+
+
+def load_user(user_id):
+    if not user_id or user_id[0] not in USER_MODELS:
+        return None
+    model = USER_MODELS[user_id[0]]
+    try:
+        pk = int(user_id[1:])
+    except ValueError:
+        return None
+
+    cache = _cache()
+    values = cache.get(user_id)
+    if values is not None:
+        user = model(**values)
+        make_transient_to_detached(user)
+        return db.session.merge(user, load=False)
+
+    user = db.session.get(model, pk)
+    if user is not None:
+        cache.put(user_id, _snapshot(user))
+    return user
+
+
+def stats():
+    return _cache().stats()
+
+
+@event.listens_for(Students, "after_update")
+@event.listens_for(Students, "after_delete")
+@event.listens_for(Advisor, "after_update")
+@event.listens_for(Advisor, "after_delete")
+def _user_changed(mapper, conn, target):
+    db_session = object_session(target)
+    if db_session is not None:
+        db_session.info.setdefault("identity_changes", set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_changes(db_session):
+    keys = db_session.info.pop("identity_changes", None)
+    if keys and has_app_context():
+        cache = _cache()
+        for key in keys:
+            cache.invalidate(key)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(db_session):
+    db_session.info.pop("identity_changes", None)
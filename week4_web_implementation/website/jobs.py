@@ -0,0 +1,268 @@
+import json
+import threading
+import traceback
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app, has_app_context
+from flask.cli import AppGroup
+from sqlalchemy import event, func, insert, or_, select
+from sqlalchemy.orm import Session, scoped_session
+
+from . import db
+from .models import Job
+
+# ---------------- BACKGROUND JOBS ---------------- #
+#
+# Slow side effects (mail, index maintenance, statistics checks) are queued
+# in the job table instead of running on the request thread. enqueue()
+# writes the row through the caller's session or connection, so a job only
+# exists if the request's transaction commits.
+#
+# Each web process runs JOBS_WORKERS daemon threads, started by its first
+# request (CLI commands and scripts never start them). A worker looks for a
+# due job with a plain SELECT, so an idle poll never takes SQLite's write
+# lock, then claims it with a conditional UPDATE, so several workers and
+# processes can share the table. A job that raises is retried with
+# exponential backoff, and after maxAttempts it is marked "dead"
+# (dead-lettered) for a human to look at: `flask jobs list --status dead`,
+# then `flask jobs retry`. A job left "running" by a crashed process is
+# picked up again after JOBS_LOCK_TIMEOUT.
+#
+# Handlers are plain functions registered with @handler("name") and called
+# with the payload as keyword arguments inside an app context. They may run
+# more than once, so they should be idempotent.
+
+DEFAULTS = {
+    "JOBS_RUNNER": True,
+    "JOBS_WORKERS": 2,
+    "JOBS_POLL_SECONDS": 2.0,
+    "JOBS_MAX_ATTEMPTS": 5,
+    "JOBS_RETRY_SECONDS": 10,  # doubled after every failed attempt
+    "JOBS_LOCK_TIMEOUT": 300,
+}
+STATUSES = ("queued", "running", "done", "dead")
+
+table = Job.__table__
+HANDLERS = {}
+
+
+def handler(name):
+    def register(fn):
+        HANDLERS[name] = fn
+        return fn
+    return register
+
+
+def enqueue(name, payload=None, conn=None, delay=0):
+    # conn: db.session (default), another Session, or a Connection
+    conn = conn if conn is not None else db.session
+    if isinstance(conn, (Session, scoped_session)):
+        conn.info["jobs_queued"] = True
+    now = datetime.utcnow()
+    conn.execute(insert(table).values(
+        name=name,
+        payload=json.dumps(payload or {}),
+        status="queued",
+        attempts=0,
+        maxAttempts=current_app.config["JOBS_MAX_ATTEMPTS"],
+        runAt=now + timedelta(seconds=delay),
+        createdAt=now,
+    ))
+
+
+# ---------------- RUNNING JOBS ---------------- #
+
+def _claimable(now):
+    stale = now - timedelta(seconds=current_app.config["JOBS_LOCK_TIMEOUT"])
+    return or_(
+        (table.c.status == "queued") & (table.c.runAt <= now),
+        (table.c.status == "running") & (table.c.lockedAt < stale),
+    )
+
+
+def _claim():
+    now = datetime.utcnow()
+    due = select(table.c.jobID).where(_claimable(now)).order_by(table.c.runAt, table.c.jobID).limit(1)
+    while True:
+        with db.engine.connect() as conn:
+            job_id = conn.execute(due).scalar()
+        if job_id is None:
+            return None
+        with db.engine.begin() as conn:
+            # re-checked in the UPDATE so only one worker wins the row
+            job = conn.execute(
+                table.update()
+                .where(table.c.jobID == job_id, _claimable(now))
+                .values(status="running", lockedAt=now, attempts=table.c.attempts + 1)
+                .returning(table.c.jobID, table.c.name, table.c.payload, table.c.attempts, table.c.maxAttempts)
+            ).first()
+        if job is not None:
+            return job
+        # another worker took it; look again
+
+
+def _finish(job_id, **values):
+    with db.engine.begin() as conn:
+        conn.execute(table.update().where(table.c.jobID == job_id).values(lockedAt=None, **values))
+
+
+def run_next():
+    # Runs one due job; returns its row, or None if nothing was due
+    job = _claim()
+    if job is None:
+        return None
+
+    try:
+        fn = HANDLERS.get(job.name)
+        if fn is None:
+            raise LookupError(f"No handler registered for {job.name!r}")
+        fn(**json.loads(job.payload or "{}"))
+    except Exception:
+        db.session.rollback()
+        error = traceback.format_exc()
+        if job.attempts >= job.maxAttempts:
+            current_app.logger.error("Job %s (%s) dead after %d attempts", job.jobID, job.name, job.attempts)
+            _finish(job.jobID, status="dead", lastError=error, finishedAt=datetime.utcnow())
+        else:
+            delay = current_app.config["JOBS_RETRY_SECONDS"] * 2 ** (job.attempts - 1)
+            current_app.logger.warning("Job %s (%s) failed, retrying in %ss", job.jobID, job.name, delay)
+            _finish(job.jobID, status="queued", lastError=error,
+                    runAt=datetime.utcnow() + timedelta(seconds=delay))
+    else:
+        _finish(job.jobID, status="done", finishedAt=datetime.utcnow())
+    finally:
+        db.session.remove()
+    return job
+
+
+class Runner:
+    def __init__(self, app):
+        self.app = app
+        self.started = False
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self.started:
+                return
+            self.started = True
+        for n in range(self.app.config["JOBS_WORKERS"]):
+            threading.Thread(target=self._work, name=f"job-worker-{n}", daemon=True).start()
+
+    def wake(self):
+        self._wake.set()
+
+    def _work(self):
+        poll = self.app.config["JOBS_POLL_SECONDS"]
+        while True:
+            try:
+                with self.app.app_context():
+                    ran = run_next()
+            except Exception:
+                # e.g. the database is locked for longer than busy_timeout
+                self.app.logger.exception("Job worker error")
+                ran = None
+            if ran is None:
+                self._wake.wait(poll)
+                self._wake.clear()
+
+
+def init_app(app):
+    for key, value in DEFAULTS.items():
+        app.config.setdefault(key, value)
+    runner = app.extensions["job_runner"] = Runner(app)
+
+    if app.config["JOBS_RUNNER"]:
+        @app.before_request
+        def _start_runner():
+            if not runner.started:
+                runner.start()
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_runner(db_session):
+    # jobs queued through a session start right after its commit
+    if db_session.info.pop("jobs_queued", False) and has_app_context():
+        runner = current_app.extensions.get("job_runner")
+        if runner is not None and runner.started:
+            runner.wake()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_queued(db_session):
+    db_session.info.pop("jobs_queued", None)
+
+
+# ---------------- CLI: flask jobs ... ---------------- #
+
+jobs_cli = AppGroup("jobs", help="Background job queue.")
+
+
+@jobs_cli.command("list")
+@click.option("--status", type=click.Choice(STATUSES), help="Only jobs with this status.")
+@click.option("--limit", default=50, show_default=True)
+def list_command(status, limit):
+    counts = dict(db.session.execute(select(table.c.status, func.count()).group_by(table.c.status)).all())
+    click.echo("  ".join(f"{s}: {counts.get(s, 0)}" for s in STATUSES))
+
+    query = select(Job).order_by(Job.jobID.desc()).limit(limit)
+    if status:
+        query = query.where(Job.status == status)
+    for job in db.session.scalars(query):
+        click.echo(f"#{job.jobID:<6} {job.status:<8} {job.name:<28} attempts={job.attempts}/{job.maxAttempts} "
+                   f"run_at={job.runAt:%Y-%m-%d %H:%M:%S} payload={job.payload}")
+        if job.lastError and job.status in ("dead", "queued"):
+            click.echo("        " + job.lastError.strip().splitlines()[-1])
+
+
+@jobs_cli.command("drain")
+@click.option("--max", "limit", type=int, help="Stop after this many jobs.")
+def drain_command(limit):
+    # Runs due jobs in the foreground until none are left
+    ran = failed = 0
+    while limit is None or ran < limit:
+        job = run_next()
+        if job is None:
+            break
+        ran += 1
+        status = db.session.get(Job, job.jobID).status
+        if status != "done":
+            failed += 1
+            click.echo(f"#{job.jobID} {job.name}: {status}")
+    click.echo(f"Ran {ran} job(s), {failed} failed.")
+
+
+@jobs_cli.command("retry")
+@click.argument("job_ids", nargs=-1, type=int)
+def retry_command(job_ids):
+    # Requeues the given dead jobs, or all of them
+    query = table.update().where(table.c.status == "dead")
+    if job_ids:
+        query = query.where(table.c.jobID.in_(job_ids))
+    with db.engine.begin() as conn:
+        count = conn.execute(query.values(status="queued", attempts=0, runAt=datetime.utcnow())).rowcount
+    click.echo(f"Requeued {count} job(s).")
+
+
+@jobs_cli.command("enqueue")
+@click.argument("name")
+@click.option("--payload", default="{}", help="JSON object of keyword arguments.")
+def enqueue_command(name, payload):
+    if name not in HANDLERS:
+        raise click.ClickException(f"Unknown job {name!r}; known: {', '.join(sorted(HANDLERS))}")
+    enqueue(name, json.loads(payload))
+    db.session.commit()
+    click.echo(f"Queued {name}.")
+
+
+@jobs_cli.command("purge")
+@click.option("--days", default=7, show_default=True, help="Delete finished jobs older than this.")
+def purge_command(days):
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    with db.engine.begin() as conn:
+        count = conn.execute(
+            table.delete().where(table.c.status == "done", table.c.finishedAt < cutoff)
+        ).rowcount
+    click.echo(f"Deleted {count} finished job(s).")
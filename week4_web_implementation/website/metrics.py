@@ -0,0 +1,253 @@
+import hmac
+import threading
+import time
+from collections import Counter, deque
+
+from flask import Response, abort, before_render_template, current_app, g, has_request_context, request, template_rendered
+from flask_login import current_user
+from sqlalchemy import event
+
+# ---------------- REQUEST INSTRUMENTATION ---------------- #
+#
+# Opt-in (METRICS_ENABLED). For every request we record wall time, the
+# number of SQL statements and the time spent in them (engine cursor
+# events), and the time spent rendering templates (Flask's template
+# signals). The last METRICS_WINDOW samples per endpoint are kept in memory
+# for percentiles; counts and sums are kept for the process lifetime.
+#
+# N+1 detection: a request that runs the same SQL string at least
+# METRICS_N_PLUS_ONE times (e.g. a lazy relationship loaded once per row)
+# is logged and counted against its endpoint.
+#
+# The numbers are per process. /admin/metrics shows them to admins and
+# /metrics serves them in the Prometheus text format to a logged-in admin
+# or to a scraper sending "Authorization: Bearer <METRICS_TOKEN>". Anyone
+# else gets a 401: route names and query timings are not public.
+
+DEFAULTS = {
+    "METRICS_ENABLED": False,
+    "METRICS_WINDOW": 1000,
+    "METRICS_N_PLUS_ONE": 10,
+    "METRICS_TOKEN": None,
+}
+QUANTILES = (0.5, 0.95, 0.99)
+IGNORED_ENDPOINTS = ("static", "metrics", "admin.metrics")
+FIELDS = ("wall", "queries", "sql", "template")
+
+
+def percentile(values, q):
+    # nearest-rank on a sorted list
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+class EndpointStats:
+    def __init__(self, window):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.sums = dict.fromkeys(FIELDS, 0.0)
+        self.statuses = Counter()
+        self.n_plus_one = 0
+        self.last_n_plus_one = None
+
+    def add(self, sample, status):
+        self.samples.append(sample)
+        self.count += 1
+        for field, value in zip(FIELDS, sample):
+            self.sums[field] += value
+        self.statuses[status] += 1
+
+    def summary(self):
+        columns = dict(zip(FIELDS, map(sorted, zip(*self.samples)))) if self.samples else {}
+        return {
+            "count": self.count,
+            "sums": dict(self.sums),
+            "statuses": dict(self.statuses),
+            "n_plus_one": self.n_plus_one,
+            "last_n_plus_one": self.last_n_plus_one,
+            "quantiles": {
+                field: {q: percentile(columns.get(field, []), q) for q in QUANTILES}
+                for field in FIELDS
+            },
+        }
+
+
+class Registry:
+    def __init__(self, window=1000):
+        self.window = window
+        self.started = time.time()
+        self._endpoints = {}
+        self._lock = threading.Lock()
+
+    def _endpoint(self, name):
+        stats = self._endpoints.get(name)
+        if stats is None:
+            stats = self._endpoints[name] = EndpointStats(self.window)
+        return stats
+
+    def record(self, name, sample, status):
+        with self._lock:
+            self._endpoint(name).add(sample, status)
+
+    def record_n_plus_one(self, name, count, statement):
+        with self._lock:
+            stats = self._endpoint(name)
+            stats.n_plus_one += 1
+            stats.last_n_plus_one = (count, statement)
+
+    def snapshot(self):
+        with self._lock:
+            return {name: stats.summary() for name, stats in self._endpoints.items()}
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+            self.started = time.time()
+
+
+def registry():
+    return current_app.extensions.get("metrics")
+
+
+def _current():
+    # Per-request counters, or None outside an instrumented request
+    return g.get("_metrics") if has_request_context() else None
+
+
+def init_app(app):
+    # Runs after db.init_app(): hooks every engine, replicas included
+    for key, value in DEFAULTS.items():
+        app.config.setdefault(key, value)
+    app.add_url_rule("/metrics", "metrics", prometheus_view)
+    if not app.config["METRICS_ENABLED"]:
+        app.extensions["metrics"] = None
+        return
+    app.extensions["metrics"] = Registry(window=app.config["METRICS_WINDOW"])
+
+    from . import db
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_after_render, app)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+
+
+# ---------------- HOOKS ---------------- #
+
+def _start_request():
+    g._metrics = {
+        "start": time.perf_counter(),
+        "queries": 0,
+        "sql": 0.0,
+        "template": 0.0,
+        "renders": [],
+        "statements": Counter(),
+    }
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current() is not None:
+        conn.info.setdefault("metrics_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    current = _current()
+    starts = conn.info.get("metrics_start")
+    if current is None or not starts:
+        return
+    current["queries"] += 1
+    current["sql"] += time.perf_counter() - starts.pop()
+    current["statements"][statement] += 1
+
+
+def _before_render(sender, template, context, **extra):
+    current = _current()
+    if current is not None:
+        current["renders"].append(time.perf_counter())
+
+
+def _after_render(sender, template, context, **extra):
+    current = _current()
+    if current is not None and current["renders"]:
+        elapsed = time.perf_counter() - current["renders"].pop()
+        # only the outermost render counts; nested ones are inside it
+        if not current["renders"]:
+            current["template"] += elapsed
+
+
+def _finish_request(response):
+    current = g.pop("_metrics", None)
+    endpoint = request.endpoint or "<unmatched>"
+    if current is None or endpoint in IGNORED_ENDPOINTS:
+        return response
+
+    wall = time.perf_counter() - current["start"]
+    metrics = registry()
+    metrics.record(endpoint, (wall, current["queries"], current["sql"], current["template"]),
+                   response.status_code)
+
+    if current["statements"]:
+        statement, count = current["statements"].most_common(1)[0]
+        if count >= current_app.config["METRICS_N_PLUS_ONE"]:
+            metrics.record_n_plus_one(endpoint, count, statement)
+            current_app.logger.warning("Possible N+1 in %s: %d x %s", endpoint, count, " ".join(statement.split()))
+    return response
+
+
+# ---------------- PROMETHEUS TEXT FORMAT ---------------- #
+
+SUMMARIES = (
+    ("wall", "http_request_duration_seconds", "Request wall time"),
+    ("queries", "http_request_sql_queries", "SQL statements per request"),
+    ("sql", "http_request_sql_seconds", "Time spent in SQL per request"),
+    ("template", "http_request_template_seconds", "Template render time per request"),
+)
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_text(snapshot):
+    lines = []
+    for field, name, help_text in SUMMARIES:
+        lines += [f"# HELP {name} {help_text}.", f"# TYPE {name} summary"]
+        for endpoint, stats in sorted(snapshot.items()):
+            labels = f'endpoint="{_label(endpoint)}"'
+            for q, value in stats["quantiles"][field].items():
+                lines.append(f'{name}{{{labels},quantile="{q}"}} {value:.6g}')
+            lines.append(f"{name}_sum{{{labels}}} {stats['sums'][field]:.6g}")
+            lines.append(f"{name}_count{{{labels}}} {stats['count']}")
+
+    lines += ["# HELP http_responses_total Responses by endpoint and status code.",
+              "# TYPE http_responses_total counter"]
+    for endpoint, stats in sorted(snapshot.items()):
+        for status, count in sorted(stats["statuses"].items()):
+            lines.append(f'http_responses_total{{endpoint="{_label(endpoint)}",status="{status}"}} {count}')
+
+    lines += ["# HELP http_n_plus_one_total Requests flagged as possible N+1 query patterns.",
+              "# TYPE http_n_plus_one_total counter"]
+    for endpoint, stats in sorted(snapshot.items()):
+        lines.append(f'http_n_plus_one_total{{endpoint="{_label(endpoint)}"}} {stats["n_plus_one"]}')
+    return "\n".join(lines) + "\n"
+
+
+def _allowed():
+    token = current_app.config["METRICS_TOKEN"]
+    if token and hmac.compare_digest(request.headers.get("Authorization", "").encode(), f"Bearer {token}".encode()):
+        return True
+    return current_user.is_authenticated and getattr(current_user, "is_admin", False)
+
+
+def prometheus_view():
+    if not _allowed():
+        abort(401)
+    metrics = registry()
+    if metrics is None:
+        abort(404)
+    return Response(prometheus_text(metrics.snapshot()), mimetype="text/plain; version=0.0.4")
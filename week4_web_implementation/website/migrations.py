@@ -0,0 +1,360 @@
+from datetime import datetime
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import (
+    Column, DateTime, MetaData, String, Table, func, inspect, select,
+)
+
+from . import db
+from .models import Students, Advisor, Participation, ACTIVE_APPLICATION
+from .search import create_search_index, create_search_triggers
+from .stats import rebuild as rebuild_stats
+from .applications import recount_seats
+from .changes import create_triggers as create_change_log_triggers
+
+# ---------------- SCHEMA MIGRATIONS ---------------- #
+#
+# db.create_all() only creates missing tables, so databases created by an
+# older version of the app never pick up new indexes or columns. Each
+# migration below runs once per database and is recorded in
+# schema_migrations; every step is written to be a no-op on a fresh
+# database that create_all() already built from models.py.
+
+# Indexes that must really be unique; `flask db status` checks them
+UNIQUE_INDEXES = [
+    ("ix_students_studentEmail", "students", ["studentEmail"]),
+    ("ix_advisor_advisorEmail", "advisor", ["advisorEmail"]),
+]
+
+
+class MigrationError(RuntimeError):
+    pass
+
+
+schema_migrations = Table(
+    "schema_migrations",
+    MetaData(),
+    Column("name", String(100), primary_key=True),
+    Column("appliedAt", DateTime),
+)
+
+
+def _quote(conn, name):
+    return conn.dialect.identifier_preparer.quote(name)
+
+
+def _duplicates(conn, table, columns, limit=5):
+    # -> up to `limit` value tuples that occur more than once
+    cols = ", ".join(_quote(conn, c) for c in columns)
+    stmt = (
+        f"SELECT {cols} FROM {_quote(conn, table)} "
+        f"WHERE {' AND '.join(_quote(conn, c) + ' IS NOT NULL' for c in columns)} "
+        f"GROUP BY {cols} HAVING COUNT(*) > 1 LIMIT {int(limit)}"
+    )
+    return [tuple(row) for row in conn.exec_driver_sql(stmt)]
+
+
+def _require_no_duplicates(conn, name, table, columns):
+    duplicates = _duplicates(conn, table, columns)
+    if duplicates:
+        examples = ", ".join(str(d[0] if len(d) == 1 else d) for d in duplicates)
+        raise MigrationError(
+            f"Cannot create unique index {name}: {table}({', '.join(columns)}) has duplicate "
+            f"values, e.g. {examples}. Remove or rename the duplicates and run `flask db upgrade` again."
+        )
+
+
+def create_index(conn, name, table, columns, unique=False, where=None):
+    insp = inspect(conn)
+    if name in {ix["name"] for ix in insp.get_indexes(table)}:
+        return
+
+    # An old UNIQUE(...) table constraint already gives us the index
+    if unique and any(
+        uc["column_names"] == list(columns)
+        for uc in insp.get_unique_constraints(table)
+    ):
+        return
+
+    if unique and not where:
+        _require_no_duplicates(conn, name, table, columns)
+
+    conn.exec_driver_sql(
+        f"CREATE {'UNIQUE ' if unique else ''}INDEX {_quote(conn, name)} "
+        f"ON {_quote(conn, table)} ({', '.join(_quote(conn, c) for c in columns)})"
+        + (f" WHERE {where}" if where else "")
+    )
+
+
+def _index(conn, name, table):
+    return next((ix for ix in inspect(conn).get_indexes(table) if ix["name"] == name), None)
+
+
+def _enforced_unique(conn, name, table, columns):
+    # by the named unique index or an old UNIQUE(...) table constraint
+    index = _index(conn, name, table)
+    return (index is not None and index["unique"]) or any(
+        uc["column_names"] == list(columns) for uc in inspect(conn).get_unique_constraints(table)
+    )
+
+
+def make_unique(conn, name, table, columns):
+    # Rebuilds an existing non-unique index as a unique one
+    if _enforced_unique(conn, name, table, columns):
+        return
+    _require_no_duplicates(conn, name, table, columns)
+    conn.exec_driver_sql(f"DROP INDEX IF EXISTS {_quote(conn, name)}")
+    create_index(conn, name, table, columns, unique=True)
+
+
+def add_column(conn, table, column, ddl_type):
+    if column in {c["name"] for c in inspect(conn).get_columns(table)}:
+        return
+    conn.exec_driver_sql(
+        f"ALTER TABLE {_quote(conn, table)} ADD COLUMN {_quote(conn, column)} {ddl_type}"
+    )
+
+
+def _0001_hot_lookup_indexes(conn):
+    create_index(conn, "ix_students_studentEmail", "students", ["studentEmail"], unique=True)
+    create_index(conn, "ix_advisor_advisorEmail", "advisor", ["advisorEmail"], unique=True)
+    create_index(
+        conn, "ix_participation_student_activity", "participation",
+        ["studentID", "activityID"],
+    )
+    create_index(
+        conn, "ix_participation_advisor_status", "participation",
+        ["advisorID", "applicationStatus"],
+    )
+
+
+def _0002_activity_search_index(conn):
+    create_search_index(conn)
+
+
+def _0003_participation_summary(conn):
+    # Table itself comes from create_all(); seed it from existing rows
+    rebuild_stats(conn)
+
+
+def _0004_advisor_office_location(conn):
+    add_column(conn, "advisor", "officeLocation", "VARCHAR(50)")
+
+
+def _0005_unique_active_application(conn):
+    # Older code could store the same active application twice. Keep one per
+    # (student, activity) -- an Approved one if any, else the earliest --
+    # and close the rest so the partial unique index can be built.
+    rows = conn.exec_driver_sql(
+        'SELECT "participationID", "studentID", "activityID", "applicationStatus" '
+        f"FROM participation WHERE {ACTIVE_APPLICATION} "
+        'ORDER BY "studentID", "activityID", '
+        "CASE \"applicationStatus\" WHEN 'Approved' THEN 0 ELSE 1 END, \"participationID\""
+    ).fetchall()
+    seen = set()
+    duplicates = []
+    for pid, student_id, activity_id, _ in rows:
+        if (student_id, activity_id) in seen:
+            duplicates.append(pid)
+        seen.add((student_id, activity_id))
+
+    if duplicates:
+        conn.execute(
+            Participation.__table__.update()
+            .where(Participation.participationID.in_(duplicates))
+            .values(applicationStatus="Rejected", advisorFeedback="Duplicate application closed automatically.")
+        )
+        rebuild_stats(conn)
+        print(f"Closed {len(duplicates)} duplicate active applications.")
+
+    create_index(
+        conn, "uq_participation_active", "participation",
+        ["studentID", "activityID"], unique=True, where=ACTIVE_APPLICATION,
+    )
+
+
+def _0006_activity_capacity(conn):
+    add_column(conn, "activity", "capacity", "INTEGER")
+    add_column(conn, "activity", "seatsTaken", "INTEGER NOT NULL DEFAULT 0")
+    add_column(conn, "participation", "waitlistedAt", "TIMESTAMP")
+    recount_seats(conn)
+
+    # Waitlisted now counts as active, so rebuild the partial index
+    conn.exec_driver_sql("DROP INDEX IF EXISTS uq_participation_active")
+    create_index(
+        conn, "uq_participation_active", "participation",
+        ["studentID", "activityID"], unique=True, where=ACTIVE_APPLICATION,
+    )
+    create_index(
+        conn, "ix_participation_waitlist", "participation",
+        ["activityID", "applicationStatus", "waitlistedAt"],
+    )
+
+
+def _0007_change_log(conn):
+    # Table comes from create_all(); the triggers that fill it don't
+    create_change_log_triggers(conn)
+
+
+def _0008_change_log_all_entities(conn):
+    # activity, students and advisor joined LOGGED for the sync API
+    create_change_log_triggers(conn)
+
+
+def _0009_enforce_unique_emails(conn):
+    # 0001 used to fall back to a non-unique index when it found duplicate
+    # emails; those databases must be cleaned up before this one applies
+    for name, table, columns in UNIQUE_INDEXES:
+        make_unique(conn, name, table, columns)
+
+
+def _0010_update_triggers_on_synced_columns(conn):
+    # activity's change_log and FTS triggers fired on every UPDATE, seatsTaken
+    # bumps included; recreate them as UPDATE OF the columns they care about
+    create_change_log_triggers(conn, replace=True)
+    if conn.dialect.name == "sqlite" and conn.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'activity_fts'"
+    ).first():
+        create_search_triggers(conn, replace=True)
+
+
+def _0011_change_log_commit_order(conn):
+    # PostgreSQL triggers take SEQ_LOCK so seq follows commit order; the
+    # SQLite triggers are unchanged
+    if conn.dialect.name == "postgresql":
+        create_change_log_triggers(conn, replace=True)
+
+
+MIGRATIONS = [
+    ("0001_hot_lookup_indexes", _0001_hot_lookup_indexes),
+    ("0002_activity_search_index", _0002_activity_search_index),
+    ("0003_participation_summary", _0003_participation_summary),
+    ("0004_advisor_office_location", _0004_advisor_office_location),
+    ("0005_unique_active_application", _0005_unique_active_application),
+    ("0006_activity_capacity", _0006_activity_capacity),
+    ("0007_change_log", _0007_change_log),
+    ("0008_change_log_all_entities", _0008_change_log_all_entities),
+    ("0009_enforce_unique_emails", _0009_enforce_unique_emails),
+    ("0010_update_triggers_on_synced_columns", _0010_update_triggers_on_synced_columns),
+    ("0011_change_log_commit_order", _0011_change_log_commit_order),
+]
+
+
+def applied_migrations(conn):
+    schema_migrations.create(conn, checkfirst=True)
+    return set(conn.execute(select(schema_migrations.c.name)).scalars())
+
+
+def upgrade(engine):
+    with engine.begin() as conn:
+        done = applied_migrations(conn)
+
+    applied = []
+    for name, migrate in MIGRATIONS:
+        if name in done:
+            continue
+        with engine.begin() as conn:
+            migrate(conn)
+            conn.execute(
+                schema_migrations.insert().values(name=name, appliedAt=datetime.utcnow())
+            )
+        applied.append(name)
+    return applied
+
+
+def unique_index_problems(conn):
+    # -> messages for UNIQUE_INDEXES that don't enforce uniqueness
+    problems = []
+    for name, table, columns in UNIQUE_INDEXES:
+        if _enforced_unique(conn, name, table, columns):
+            continue
+        state = "missing" if _index(conn, name, table) is None else "not unique"
+        duplicates = _duplicates(conn, table, columns)
+        detail = f"; duplicate values, e.g. {', '.join(str(d[0]) for d in duplicates)}" if duplicates else ""
+        problems.append(f"{name} is {state}{detail}")
+    return problems
+
+
+# ---------------- QUERY PLAN CHECK ---------------- #
+
+def hot_queries():
+    return [
+        ("login: student by email",
+         select(Students).where(Students.studentEmail == "someone@example.com")),
+        ("login: advisor by email",
+         select(Advisor).where(Advisor.advisorEmail == "someone@example.com")),
+        ("student dashboard",
+         select(Participation).where(Participation.studentID == 1)),
+        ("duplicate application check",
+         select(Participation).where(
+             Participation.studentID == 1, Participation.activityID == 1
+         )),
+        ("advisor dashboard",
+         select(Participation).where(Participation.advisorID == 1)),
+        ("advisor pending queue",
+         select(func.count()).select_from(Participation).where(
+             Participation.advisorID == 1,
+             Participation.applicationStatus == "Pending",
+         )),
+    ]
+
+
+def explain(conn, stmt):
+    # SQLite only: returns the plan lines and whether every table access
+    # is served by an index rather than a full scan
+    sql = str(stmt.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+    details = [row[-1] for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + sql)]
+    uses_index = all(
+        "USING" in d and ("INDEX" in d or "PRIMARY KEY" in d)
+        for d in details
+        if d.startswith(("SCAN", "SEARCH"))
+    )
+    return details, uses_index
+
+
+# ---------------- CLI: flask db ... ---------------- #
+
+migrate_cli = AppGroup("db", help="Database schema management.")
+
+
+@migrate_cli.command("upgrade")
+def upgrade_command():
+    db.create_all(bind_key=None)
+    try:
+        applied = upgrade(db.engine)
+    except MigrationError as e:
+        raise click.ClickException(str(e))
+    for name in applied:
+        click.echo(f"Applied {name}")
+    if not applied:
+        click.echo("Database is up to date.")
+
+
+@migrate_cli.command("status")
+def status_command():
+    with db.engine.begin() as conn:
+        done = applied_migrations(conn)
+        problems = unique_index_problems(conn)
+    for name, _ in MIGRATIONS:
+        click.echo(f"[{'x' if name in done else ' '}] {name}")
+    for problem in problems:
+        click.echo(f"WARNING: {problem}; emails are not enforced unique")
+
+
+@migrate_cli.command("explain")
+def explain_command():
+    if db.engine.dialect.name != "sqlite":
+        raise click.ClickException("EXPLAIN QUERY PLAN check only runs on SQLite.")
+
+    failed = False
+    with db.engine.connect() as conn:
+        for label, stmt in hot_queries():
+            details, uses_index = explain(conn, stmt)
+            failed = failed or not uses_index
+            click.echo(f"{'ok  ' if uses_index else 'SCAN'} {label}")
+            for d in details:
+                click.echo(f"       {d}")
+
+    if failed:
+        raise click.ClickException("Some hot queries are not using an index.")
@@ -10,7 +10,7 @@ class Students(db.Model, UserMixin):
     studentFirstName = db.Column(db.String(15))
     studentLastName = db.Column(db.String(15))
     studentYear = db.Column(db.Integer)
-    studentEmail = db.Column(db.String(25))
+    studentEmail = db.Column(db.String(25), unique=True, index=True)
     studentPassword = db.Column(db.String(15))
     studentAddress = db.Column(db.String(255))
     phoneNumber = db.Column(db.Integer)
@@ -31,8 +31,9 @@ class Advisor(db.Model, UserMixin):
 
     advisorID = db.Column(db.Integer, primary_key=True)
     advisorName = db.Column(db.String(20))
-    advisorEmail = db.Column(db.String(25))
+    advisorEmail = db.Column(db.String(25), unique=True, index=True)
     advisorRole = db.Column(db.String(15))
+    officeLocation = db.Column(db.String(50))
     advisorPassword = db.Column(db.String(15))
     availableSchedule = db.Column(db.Text)
 
@@ -62,6 +63,10 @@ class Activity(db.Model):
     activityStartDate = db.Column(db.Date)
     activityEndDate = db.Column(db.Date)
     activityFrequency = db.Column(db.String(20))
+    # NULL = unlimited; seatsTaken counts Approved participations and is
+    # only changed through applications.py
+    capacity = db.Column(db.Integer)
+    seatsTaken = db.Column(db.Integer, nullable=False, default=0, server_default="0")
 
     advisorID = db.Column(db.Integer, db.ForeignKey("advisor.advisorID"))
     advisor = db.relationship("Advisor")
@@ -69,8 +74,26 @@ class Activity(db.Model):
 
 # ---------------- PARTICIPATION MODEL ---------------- #
 
+ACTIVE_APPLICATION = "\"applicationStatus\" IN ('Pending', 'Approved', 'Waitlisted')"
+
+
 class Participation(db.Model):
     __tablename__ = "participation"
+    __table_args__ = (
+        # student dashboard / history and duplicate-application checks
+        db.Index("ix_participation_student_activity", "studentID", "activityID"),
+        # advisor review queue, usually filtered by status
+        db.Index("ix_participation_advisor_status", "advisorID", "applicationStatus"),
+        # next-in-line lookup when a seat frees up
+        db.Index("ix_participation_waitlist", "activityID", "applicationStatus", "waitlistedAt"),
+        # one active (Pending/Approved/Waitlisted) application per student
+        # and activity; see applications.py
+        db.Index(
+            "uq_participation_active", "studentID", "activityID", unique=True,
+            sqlite_where=db.text(ACTIVE_APPLICATION),
+            postgresql_where=db.text(ACTIVE_APPLICATION),
+        ),
+    )
 
     participationID = db.Column(db.Integer, primary_key=True)
     dateApplied = db.Column(db.Date)
@@ -78,6 +101,7 @@ class Participation(db.Model):
     approvalDate = db.Column(db.Date)
     advisorFeedback = db.Column(db.Text)
     achievements = db.Column(db.Text)
+    waitlistedAt = db.Column(db.DateTime)
 
     studentID = db.Column(db.Integer, db.ForeignKey("students.studentID"))
     activityID = db.Column(db.Integer, db.ForeignKey("activity.activityID"))
@@ -86,3 +110,87 @@ class Participation(db.Model):
     student = db.relationship("Students")
     activity = db.relationship("Activity")
     advisor = db.relationship("Advisor")
+
+
+# ---------------- PARTICIPATION SUMMARY (DERIVED) ---------------- #
+
+class ParticipationSummary(db.Model):
+    # Running count of participations per (student | advisor | activity | all)
+    # and status, maintained by website/stats.py on every write
+    __tablename__ = "participation_summary"
+
+    scope = db.Column(db.String(10), primary_key=True)
+    scopeID = db.Column(db.Integer, primary_key=True)
+    status = db.Column(db.String(20), primary_key=True)
+    total = db.Column(db.Integer, nullable=False, default=0)
+
+
+# ---------------- BACKGROUND JOBS ---------------- #
+
+class Job(db.Model):
+    # Durable queue for website/jobs.py
+    __tablename__ = "job"
+    __table_args__ = (
+        # the runner's "next due job" lookup
+        db.Index("ix_job_status_run_at", "status", "runAt"),
+    )
+
+    jobID = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.Text)  # JSON keyword arguments
+    status = db.Column(db.String(10), nullable=False, default="queued")
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    maxAttempts = db.Column(db.Integer, nullable=False, default=5)
+    runAt = db.Column(db.DateTime, nullable=False)
+    lockedAt = db.Column(db.DateTime)
+    lastError = db.Column(db.Text)
+    createdAt = db.Column(db.DateTime)
+    finishedAt = db.Column(db.DateTime)
+
+
+# ---------------- NOTIFICATIONS ---------------- #
+
+class Notification(db.Model):
+    # One row per event a student should hear about; see notifications.py
+    __tablename__ = "notification"
+    __table_args__ = (
+        # a student's feed, newest first
+        db.Index("ix_notification_student", "studentID", "notificationID"),
+        # unread badge: COUNT(*) over this index only
+        db.Index(
+            "ix_notification_unread", "studentID",
+            sqlite_where=db.text('"readAt" IS NULL'),
+            postgresql_where=db.text('"readAt" IS NULL'),
+        ),
+    )
+
+    notificationID = db.Column(db.Integer, primary_key=True)
+    studentID = db.Column(db.Integer, db.ForeignKey("students.studentID"), nullable=False)
+    participationID = db.Column(db.Integer)
+    # copied at write time so the feed survives renames and deletes
+    activityName = db.Column(db.String(30))
+    status = db.Column(db.String(20))
+    createdAt = db.Column(db.DateTime, nullable=False)
+    readAt = db.Column(db.DateTime)
+
+
+# ---------------- CHANGE LOG ---------------- #
+
+class ChangeLog(db.Model):
+    # One row per write to a logged table, appended by the triggers in
+    # changes.py; seq only ever grows
+    __tablename__ = "change_log"
+    __table_args__ = (
+        # an advisor's feed: their participations changed after a seq
+        db.Index("ix_change_log_advisor", "advisorID", "seq"),
+        {"sqlite_autoincrement": True},
+    )
+
+    seq = db.Column(db.Integer, primary_key=True)
+    entity = db.Column(db.String(20), nullable=False)
+    entityID = db.Column(db.Integer, nullable=False)
+    op = db.Column(db.String(6), nullable=False)  # insert / update / delete
+    # who the row concerns, copied from the changed row
+    studentID = db.Column(db.Integer)
+    advisorID = db.Column(db.Integer)
+    changedAt = db.Column(db.DateTime)
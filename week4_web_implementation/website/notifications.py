@@ -0,0 +1,199 @@
+import json
+import threading
+import time
+from datetime import datetime
+
+from flask import Response, current_app, has_app_context
+from sqlalchemy import event, func, insert, select
+from sqlalchemy.orm import Session, scoped_session
+
+from . import db, serializers
+from .jobs import enqueue
+from .models import Activity, Notification
+
+# ---------------- IN-APP NOTIFICATIONS ---------------- #
+#
+# Every application status change writes a notification row for the
+# student in the same transaction (status_changed(), called from
+# applications.py and batch.py) and queues the matching email job.
+#
+# The unread badge is COUNT(*) over the partial index ix_notification_unread,
+# which only holds unread rows, so it never touches the table.
+#
+# stream() serves Server-Sent Events: the unread count, then each new
+# notification as it arrives. A commit that recorded notifications wakes the
+# streams in this process straight away; writes from other processes are
+# picked up by re-checking every NOTIFY_STREAM_POLL seconds. A stream ends
+# after NOTIFY_STREAM_SECONDS so it doesn't hold a sync worker forever; the
+# browser reconnects and resumes from Last-Event-ID. Because each open
+# stream occupies a worker, only the student dashboard subscribes; other
+# pages poll the unread count every NOTIFY_BADGE_POLL seconds.
+
+DEFAULTS = {
+    "NOTIFY_STREAM_POLL": 15,
+    "NOTIFY_STREAM_SECONDS": 60,
+    "NOTIFY_BADGE_POLL": 30,
+}
+
+# Students withdraw their own applications; no need to tell them
+QUIET_STATUSES = ("Withdrawn",)
+
+table = Notification.__table__
+
+
+class Broker:
+    # Per-student change counters; streams wait for theirs to move
+    def __init__(self):
+        self._changed = threading.Condition()
+        self._versions = {}
+
+    def version(self, student_id):
+        with self._changed:
+            return self._versions.get(student_id, 0)
+
+    def publish(self, student_ids):
+        with self._changed:
+            for student_id in student_ids:
+                self._versions[student_id] = self._versions.get(student_id, 0) + 1
+            self._changed.notify_all()
+
+    def wait(self, student_id, seen, timeout):
+        with self._changed:
+            self._changed.wait_for(lambda: self._versions.get(student_id, 0) != seen, timeout)
+            return self._versions.get(student_id, 0)
+
+
+def init_app(app):
+    for key, value in DEFAULTS.items():
+        app.config.setdefault(key, value)
+    app.extensions["notifications"] = Broker()
+
+
+def _touched(conn, student_id):
+    # remembered until commit; connections (mapper events) rely on the poll
+    if isinstance(conn, (Session, scoped_session)):
+        conn.info.setdefault("notified", set()).add(student_id)
+
+
+# ---------------- WRITES ---------------- #
+
+def status_changed(conn, participation_id, student_id, activity_id, status):
+    # Called wherever an application's status changes, in that transaction
+    if status in QUIET_STATUSES or student_id is None:
+        return
+    conn.execute(insert(table).values(
+        studentID=student_id,
+        participationID=participation_id,
+        activityName=select(Activity.activityName)
+        .where(Activity.activityID == activity_id).scalar_subquery(),
+        status=status,
+        createdAt=datetime.utcnow(),
+    ))
+    _touched(conn, student_id)
+    enqueue("notify.status", {"participation_id": participation_id, "status": status}, conn=conn)
+
+
+def mark_read(student_id, up_to=None):
+    # Marks the student's unread notifications (up to an id) as read;
+    # the caller commits
+    query = table.update().where(table.c.studentID == student_id, table.c.readAt.is_(None))
+    if up_to is not None:
+        query = query.where(table.c.notificationID <= up_to)
+    count = db.session.execute(query.values(readAt=datetime.utcnow())).rowcount
+    if count:
+        _touched(db.session, student_id)
+    return count
+
+
+@event.listens_for(Session, "after_commit")
+def _publish(db_session):
+    student_ids = db_session.info.pop("notified", None)
+    if student_ids and has_app_context():
+        current_app.extensions["notifications"].publish(student_ids)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget(db_session):
+    db_session.info.pop("notified", None)
+
+
+# ---------------- READS ---------------- #
+
+def unread_count(student_id):
+    return db.session.execute(
+        select(func.count()).select_from(table)
+        .where(table.c.studentID == student_id, table.c.readAt.is_(None))
+    ).scalar()
+
+
+def recent(student_id, limit=5):
+    return db.session.scalars(
+        select(Notification).where(Notification.studentID == student_id)
+        .order_by(Notification.notificationID.desc()).limit(limit)
+    ).all()
+
+
+def _since(student_id, after_id):
+    return db.session.scalars(
+        select(Notification)
+        .where(Notification.studentID == student_id, Notification.notificationID > after_id)
+        .order_by(Notification.notificationID)
+    ).all()
+
+
+def _latest_id(student_id):
+    return db.session.execute(
+        select(func.max(table.c.notificationID)).where(table.c.studentID == student_id)
+    ).scalar() or 0
+
+
+# ---------------- SERVER-SENT EVENTS ---------------- #
+
+def _event(name, data, event_id=None):
+    lines = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{lines}event: {name}\ndata: {json.dumps(data)}\n\n"
+
+
+def stream(student_id, last_event_id=None):
+    # text/event-stream response for one student. Each check runs in its
+    # own app context so no connection is held between them.
+    app = current_app._get_current_object()
+    broker = app.extensions["notifications"]
+    poll = app.config["NOTIFY_STREAM_POLL"]
+    try:
+        after_id = int(last_event_id)
+    except (TypeError, ValueError):
+        # fresh connection: only what happens from now on
+        after_id = _latest_id(student_id)
+
+    def events():
+        nonlocal after_id
+        deadline = time.monotonic() + app.config["NOTIFY_STREAM_SECONDS"]
+        seen = broker.version(student_id)
+        unread = None
+        yield "retry: 3000\n\n"
+        while True:
+            with app.app_context():
+                new = _since(student_id, after_id)
+                count = unread_count(student_id)
+                items = serializers.notification.many(new)
+
+            for item in items:
+                after_id = item["id"]
+                yield _event("notification", item, after_id)
+            if count != unread:
+                unread = count
+                yield _event("unread", {"count": count}, after_id)
+            elif not items:
+                yield ": keep-alive\n\n"
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            seen = broker.wait(student_id, seen, min(poll, remaining))
+
+    return Response(events(), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        # nginx would otherwise buffer the stream
+        "X-Accel-Buffering": "no",
+    })
@@ -0,0 +1,76 @@
+import smtplib
+from email.message import EmailMessage
+
+from flask import current_app
+
+from . import db
+from .jobs import handler
+from .models import Advisor, Participation
+
+# ---------------- EMAIL NOTIFICATIONS ---------------- #
+#
+# Mail goes out from background jobs (website/jobs.py), never from the
+# request that caused it; notifications.status_changed() queues them.
+# Without MAIL_SERVER messages are only logged, which is what development
+# and the benchmarks use. An SMTP failure raises, so the job is retried and
+# eventually dead-lettered.
+
+DEFAULTS = {
+    "MAIL_SERVER": None,
+    "MAIL_PORT": 587,
+    "MAIL_USE_TLS": True,
+    "MAIL_USERNAME": None,
+    "MAIL_PASSWORD": None,
+    "MAIL_SENDER": "noreply@studentactivity.local",
+}
+
+
+def init_app(app):
+    for key, value in DEFAULTS.items():
+        app.config.setdefault(key, value)
+
+
+def send(to, subject, body):
+    config = current_app.config
+    if not config["MAIL_SERVER"]:
+        current_app.logger.info("Mail to %s: %s", to, subject)
+        return
+
+    msg = EmailMessage()
+    msg["From"] = config["MAIL_SENDER"]
+    msg["To"] = to
+    msg["Subject"] = subject
+    msg.set_content(body)
+
+    with smtplib.SMTP(config["MAIL_SERVER"], config["MAIL_PORT"], timeout=30) as smtp:
+        if config["MAIL_USE_TLS"]:
+            smtp.starttls()
+        if config["MAIL_USERNAME"]:
+            smtp.login(config["MAIL_USERNAME"], config["MAIL_PASSWORD"])
+        smtp.send_message(msg)
+
+
+@handler("notify.status")
+def send_status(participation_id, status):
+    p = db.session.get(Participation, participation_id)
+    if p is None or p.applicationStatus != status or p.student is None:
+        # deleted or changed again since; that change queued its own mail
+        return
+
+    name = p.activity.activityName if p.activity else "an activity"
+    body = f"Hi {p.student.studentFirstName},\n\nYour application for {name} is now {status}."
+    if p.advisorFeedback:
+        body += f"\n\nAdvisor feedback: {p.advisorFeedback}"
+    send(p.student.studentEmail, f"Application {status}: {name}", body)
+
+
+@handler("notify.advisor_registered")
+def send_advisor_registered(advisor_id):
+    advisor = db.session.get(Advisor, advisor_id)
+    if advisor is None or advisor.status != "Pending":
+        return
+
+    body = (f"{advisor.advisorName} ({advisor.advisorEmail}) registered as an advisor "
+            f"and is waiting for approval.")
+    for admin in Advisor.query.filter_by(is_admin=True):
+        send(admin.advisorEmail, "New advisor registration", body)
@@ -0,0 +1,134 @@
+import base64
+import json
+from collections import namedtuple
+
+from sqlalchemy import and_, or_
+
+# ---------------- KEYSET (CURSOR) PAGINATION ---------------- #
+#
+# Pages are fetched with "WHERE (sort, pk) > (last_sort, last_pk)" instead of
+# OFFSET, so every page costs the same no matter how deep the client goes.
+# The cursor handed back to the client is an opaque token holding the sort
+# value and primary key of the last row it received.
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+Page = namedtuple("Page", ["items", "next_cursor"])
+
+# JSON types a cursor value may have, by the column's Python type
+CURSOR_TYPES = {int: (int,), float: (int, float), str: (str,)}
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(values):
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _fits(value, col):
+    # bool is an int to isinstance(), but never a valid key
+    if isinstance(value, bool):
+        return False
+    try:
+        allowed = CURSOR_TYPES.get(col.type.python_type)
+    except NotImplementedError:
+        allowed = None
+    return isinstance(value, allowed or (int, float, str))
+
+
+def decode_cursor(token, pk=None, sort_col=None):
+    # -> [last_sort, last_pk]. With pk (and sort_col) given, each value is
+    # checked against its column's type before it reaches the WHERE clause.
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise InvalidCursor("Malformed cursor")
+
+    if not isinstance(values, list) or len(values) != 2:
+        raise InvalidCursor("Malformed cursor")
+    last_sort, last_pk = values
+    if pk is not None and not _fits(last_pk, pk):
+        raise InvalidCursor("Malformed cursor")
+    if sort_col is not None and last_sort is not None and not _fits(last_sort, sort_col):
+        raise InvalidCursor("Malformed cursor")
+    return values
+
+
+def page_size(value):
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def parse_sort(value, allowed):
+    # "name" -> ascending, "-name" -> descending; unknown keys fall back to pk
+    if not value:
+        return None, False
+    descending = value.startswith("-")
+    key = value.lstrip("-")
+    if key not in allowed:
+        return None, False
+    return allowed[key], descending
+
+
+def _after(pk, sort_col, last_sort, last_pk, descending):
+    later = pk < last_pk if descending else pk > last_pk
+    if sort_col is None:
+        return later
+
+    # NULL sort values are always placed last
+    if last_sort is None:
+        return and_(sort_col.is_(None), later)
+
+    beyond = sort_col < last_sort if descending else sort_col > last_sort
+    return or_(
+        sort_col.is_(None),
+        beyond,
+        and_(sort_col == last_sort, later),
+    )
+
+
+def keyset_clauses(pk, cursor=None, sort_col=None, descending=False):
+    # -> (WHERE clause or None, ORDER BY list) for a Query or a select()
+    where = None
+    if cursor:
+        last_sort, last_pk = decode_cursor(cursor, pk, sort_col)
+        where = _after(pk, sort_col, last_sort, last_pk, descending)
+
+    order = []
+    if sort_col is not None:
+        order.append(sort_col.is_(None))
+        order.append(sort_col.desc() if descending else sort_col.asc())
+    order.append(pk.desc() if descending else pk.asc())
+    return where, order
+
+
+def make_page(rows, pk, limit, sort_col=None):
+    # rows were fetched with limit + 1; the extra one means another page exists
+    items = rows[:limit]
+
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        last_sort = getattr(last, sort_col.key) if sort_col is not None else None
+        next_cursor = encode_cursor([last_sort, getattr(last, pk.key)])
+
+    return Page(items, next_cursor)
+
+
+def keyset_page(query, pk, cursor=None, limit=DEFAULT_PAGE_SIZE,
+                sort_col=None, descending=False):
+    where, order = keyset_clauses(pk, cursor, sort_col, descending)
+    if where is not None:
+        query = query.filter(where)
+
+    # One extra row tells us whether another page exists
+    rows = query.order_by(*order).limit(limit + 1).all()
+    return make_page(rows, pk, limit, sort_col)
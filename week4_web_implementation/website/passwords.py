@@ -0,0 +1,144 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from flask import current_app
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, generate_password_hash, check_password_hash
+
+# ---------------- PASSWORD SERVICE ---------------- #
+#
+# Every password hash in the app goes through here so the algorithm and
+# cost live in one place (PASSWORD_HASH_METHOD / PASSWORD_SALT_LENGTH).
+#
+# pbkdf2 is deliberately slow, so hashing runs on a small dedicated thread
+# pool (hashlib releases the GIL while it works). At most
+# PASSWORD_HASH_QUEUE hash/verify jobs may be in flight; beyond that callers
+# wait up to PASSWORD_HASH_TIMEOUT seconds for a slot and then get
+# PasswordServiceBusy, so a login spike sheds load instead of tying up
+# every request worker.
+#
+# The calling thread still blocks on the result, so the pool doesn't make a
+# single hash faster or free the request worker while it runs; what it adds
+# is the bound on concurrent hashing and the fast PasswordServiceBusy.
+#
+# hash_many() is for background work (bulk imports): it uses the same pool
+# and slots but waits for them instead of giving up, and takes at most one
+# slot per pool thread, so logins keep getting through while it runs.
+
+DEFAULTS = {
+    "PASSWORD_HASH_METHOD": "pbkdf2:sha256:600000",
+    "PASSWORD_SALT_LENGTH": 16,
+    "PASSWORD_HASH_WORKERS": os.cpu_count() or 2,
+    "PASSWORD_HASH_QUEUE": None,  # defaults to 4 x workers
+    "PASSWORD_HASH_TIMEOUT": 5.0,
+}
+
+
+class PasswordServiceBusy(RuntimeError):
+    pass
+
+
+def stored_method(method):
+    # The method prefix werkzeug writes into the hash for `method`, with the
+    # default parameters filled in ("scrypt" -> "scrypt:32768:8:1")
+    name, *args = method.split(":")
+    if name == "scrypt":
+        n, r, p = args or (2**15, 8, 1)
+        return f"scrypt:{int(n)}:{int(r)}:{int(p)}"
+    if name == "pbkdf2":
+        hash_name = args[0] if args else "sha256"
+        iterations = int(args[1]) if len(args) > 1 else DEFAULT_PBKDF2_ITERATIONS
+        return f"pbkdf2:{hash_name}:{iterations}"
+    return method
+
+
+class PasswordService:
+    def __init__(self, method, salt_length, workers, queue, timeout):
+        self.method = method
+        self.stored_method = stored_method(method)
+        self.salt_length = salt_length
+        self.timeout = timeout
+        self.workers = workers
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pwhash")
+        self._slots = threading.BoundedSemaphore(queue or workers * 4)
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            method=config["PASSWORD_HASH_METHOD"],
+            salt_length=config["PASSWORD_SALT_LENGTH"],
+            workers=config["PASSWORD_HASH_WORKERS"],
+            queue=config["PASSWORD_HASH_QUEUE"],
+            timeout=config["PASSWORD_HASH_TIMEOUT"],
+        )
+
+    def hasher(self):
+        # Picklable hash function for process pools (bulk import)
+        return partial(generate_password_hash, method=self.method, salt_length=self.salt_length)
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PasswordServiceBusy("Password service is overloaded")
+        try:
+            return self._pool.submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method, self.salt_length)
+
+    def hash_many(self, passwords):
+        hashed = []
+        for start in range(0, len(passwords), self.workers):
+            futures = []
+            try:
+                for password in passwords[start:start + self.workers]:
+                    self._slots.acquire()
+                    futures.append(self._pool.submit(generate_password_hash, password, self.method, self.salt_length))
+                hashed.extend(f.result() for f in futures)
+            finally:
+                for f in futures:
+                    if not f.cancel():
+                        f.exception()  # still running: keep its slot until it ends
+                    self._slots.release()
+        return hashed
+
+    def verify(self, stored, password):
+        if not stored or password is None:
+            return False
+        return self._run(check_password_hash, stored, password)
+
+    def needs_rehash(self, stored):
+        return stored.split("$", 1)[0] != self.stored_method
+
+
+def init_app(app):
+    for key, value in DEFAULTS.items():
+        app.config.setdefault(key, value)
+    app.extensions["passwords"] = PasswordService.from_config(app.config)
+
+
+def service():
+    return current_app.extensions["passwords"]
+
+
+def hash_password(password):
+    return service().hash(password)
+
+
+def verify_password(stored, password):
+    return service().verify(stored, password)
+
+
+def verify_and_upgrade(user, field, password):
+    # Checks `password` against user.<field>. On success, re-hashes it with
+    # the current parameters if the stored hash is outdated; the caller
+    # commits the session.
+    svc = service()
+    stored = getattr(user, field)
+    if not svc.verify(stored, password):
+        return False
+    if svc.needs_rehash(stored):
+        setattr(user, field, svc.hash(password))
+    return True
@@ -0,0 +1,128 @@
+import math
+import random
+import sqlite3
+import time
+
+import click
+import sqlalchemy as sa
+from flask import current_app, g, has_request_context, request, session
+from flask.cli import with_appcontext
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+# ---------------- READ REPLICA ROUTING ---------------- #
+#
+# With SQLALCHEMY_REPLICAS set (a list of database URLs), db.session sends
+# the queries of GET/HEAD requests to a replica and everything else to the
+# primary: flushes, INSERT/UPDATE/DELETE statements, non-GET requests, CLI
+# commands and startup code.
+#
+# Read-your-writes: once a request has written, the rest of that request
+# reads from the primary. After the commit, the user is pinned to the
+# primary for REPLICA_STICKY_SECONDS, which should cover the replicas' lag.
+# Browser users are pinned in their (cookie) session. API clients send a
+# bearer token and usually drop cookies, so they are pinned by token
+# subject in the response cache (cache.py; shared between workers when it
+# is Redis). The pin is only seen by requests that check the token, and an
+# LRU eviction can end it early.
+#
+# Locally, two SQLite files can stand in for primary and replica:
+# `flask db replicate` copies the primary over each replica file.
+
+DEFAULTS = {
+    "SQLALCHEMY_REPLICAS": [],
+    "REPLICA_STICKY_SECONDS": 5,
+}
+READ_METHODS = ("GET", "HEAD")
+STICKY_KEY = "_primary_until"
+TOKEN_STICKY_KEY = "primary:{role}:{sub}"
+
+
+def init_app(app):
+    # Runs before db.init_app(): replicas become extra Flask-SQLAlchemy binds
+    for key, value in DEFAULTS.items():
+        app.config.setdefault(key, value)
+    binds = dict(app.config.get("SQLALCHEMY_BINDS") or {})
+    keys = []
+    for n, uri in enumerate(app.config["SQLALCHEMY_REPLICAS"], start=1):
+        keys.append(f"replica{n}")
+        binds[keys[-1]] = uri
+    app.config["SQLALCHEMY_BINDS"] = binds
+    app.extensions["replicas"] = keys
+
+
+def _token_key():
+    # set once tokens.token_required has verified the request's token
+    claims = g.get("token_claims")
+    if claims is None:
+        return None
+    return TOKEN_STICKY_KEY.format(role=claims.get("role", "student"), sub=claims["sub"])
+
+
+def _read_only_request():
+    if not has_request_context() or request.method not in READ_METHODS:
+        return False
+    if g.get("wrote_primary"):
+        return False
+    key = _token_key()
+    if key is not None:
+        from .cache import cache
+        if cache().get(key) is not None:
+            return False
+    return session.get(STICKY_KEY, 0) < time.time()
+
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and not isinstance(clause, sa.UpdateBase):
+            replicas = current_app.extensions.get("replicas")
+            if replicas and _read_only_request():
+                # one replica per session so a request sees a single snapshot
+                if getattr(self, "_replica", None) is None:
+                    self._replica = random.choice(replicas)
+                return self._db.engines[self._replica]
+
+        if has_request_context() and (self._flushing or isinstance(clause, sa.UpdateBase)):
+            g.wrote_primary = True
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _pin_to_primary(db_session):
+    if has_request_context() and g.get("wrote_primary") and current_app.extensions.get("replicas"):
+        seconds = current_app.config["REPLICA_STICKY_SECONDS"]
+        key = _token_key()
+        if key is not None:
+            from .cache import cache
+            cache().set(key, "1", ex=math.ceil(seconds))
+        else:
+            session[STICKY_KEY] = time.time() + seconds
+
+
+# ---------------- CLI: flask db replicate ---------------- #
+
+def copy_sqlite(primary_url, replica_url):
+    source = sqlite3.connect(make_url(primary_url).database)
+    target = sqlite3.connect(make_url(replica_url).database)
+    try:
+        source.backup(target)
+    finally:
+        source.close()
+        target.close()
+
+
+@click.command("replicate")
+@with_appcontext
+def replicate_command():
+    # Local stand-in for streaming replication between SQLite files
+    from . import db
+
+    primary = db.engine.url
+    if primary.get_backend_name() != "sqlite":
+        raise click.ClickException("replicate only copies SQLite files; use real replication elsewhere.")
+    for key in current_app.extensions["replicas"]:
+        replica = db.engines[key].url
+        db.engines[key].dispose()
+        copy_sqlite(primary, replica)
+        click.echo(f"Copied {primary.database} -> {replica.database}")
@@ -0,0 +1,164 @@
+import re
+
+from flask import current_app
+from markupsafe import Markup, escape
+from sqlalchemy import or_, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import joinedload
+
+from . import db
+from .jobs import handler
+from .models import Activity
+
+# ---------------- ACTIVITY FULL-TEXT SEARCH (SQLite FTS5) ---------------- #
+#
+# activity_fts is an external-content FTS5 index over the activity table.
+# Triggers keep it in sync with every INSERT/DELETE and every UPDATE of an
+# indexed column (not the seatsTaken bumps from each approval), so the
+# admin pages, the API and any bulk loader never have to touch it
+# themselves.
+# Databases without FTS5 (or non-SQLite backends) fall back to ILIKE.
+
+FTS_COLUMNS = ["activityName", "activityCategory", "activityLocation", "activityDetails"]
+
+# bm25() weights, same order as FTS_COLUMNS: a hit in the name matters most
+RANK_WEIGHTS = "10.0, 4.0, 4.0, 1.0"
+
+# Control characters never appear in activity text, so snippet() can mark
+# matches with them and we swap in <mark> after HTML-escaping
+_HL_START, _HL_END = "\x02", "\x03"
+
+
+def create_search_index(conn):
+    if conn.dialect.name != "sqlite":
+        return False
+
+    cols = ", ".join(FTS_COLUMNS)
+    try:
+        conn.exec_driver_sql(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS activity_fts USING fts5("
+            f"{cols}, content='activity', content_rowid='activityID', "
+            f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+    except OperationalError:
+        print("SQLite was built without FTS5; activity search will use LIKE.")
+        return False
+
+    create_search_triggers(conn)
+    rebuild_search_index(conn)
+    return True
+
+
+def create_search_triggers(conn, replace=False):
+    # replace=True drops existing triggers first, for when their definition
+    # changes (CREATE TRIGGER IF NOT EXISTS would keep the old one)
+    cols = ", ".join(FTS_COLUMNS)
+    new_cols = ", ".join(f"new.{c}" for c in FTS_COLUMNS)
+    old_cols = ", ".join(f"old.{c}" for c in FTS_COLUMNS)
+    if replace:
+        for suffix in ("ai", "ad", "au"):
+            conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS activity_fts_{suffix}")
+
+    conn.exec_driver_sql(
+        f"CREATE TRIGGER IF NOT EXISTS activity_fts_ai AFTER INSERT ON activity BEGIN "
+        f"INSERT INTO activity_fts(rowid, {cols}) VALUES (new.activityID, {new_cols}); "
+        f"END"
+    )
+    conn.exec_driver_sql(
+        f"CREATE TRIGGER IF NOT EXISTS activity_fts_ad AFTER DELETE ON activity BEGIN "
+        f"INSERT INTO activity_fts(activity_fts, rowid, {cols}) "
+        f"VALUES ('delete', old.activityID, {old_cols}); "
+        f"END"
+    )
+    conn.exec_driver_sql(
+        f"CREATE TRIGGER IF NOT EXISTS activity_fts_au AFTER UPDATE OF {cols} ON activity BEGIN "
+        f"INSERT INTO activity_fts(activity_fts, rowid, {cols}) "
+        f"VALUES ('delete', old.activityID, {old_cols}); "
+        f"INSERT INTO activity_fts(rowid, {cols}) VALUES (new.activityID, {new_cols}); "
+        f"END"
+    )
+
+
+def rebuild_search_index(conn):
+    conn.exec_driver_sql("INSERT INTO activity_fts(activity_fts) VALUES ('rebuild')")
+
+
+@handler("search.optimize")
+def optimize_search_index():
+    # Queued after bulk loads: merge the index's b-trees, which every
+    # trigger-driven insert adds to
+    if fts_enabled():
+        with db.engine.begin() as conn:
+            conn.exec_driver_sql("INSERT INTO activity_fts(activity_fts) VALUES ('optimize')")
+
+
+def fts_enabled():
+    enabled = current_app.extensions.get("activity_fts")
+    if enabled is None:
+        enabled = db.engine.dialect.name == "sqlite" and db.session.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'activity_fts'")
+        ).first() is not None
+        current_app.extensions["activity_fts"] = enabled
+    return enabled
+
+
+def to_match_query(q):
+    # Every word must match, each as a prefix ("bask" finds "Basketball").
+    # Quoting each token keeps FTS5 operators typed by users inert.
+    tokens = re.findall(r"\w+", q or "")
+    return " ".join(f'"{t}"*' for t in tokens)
+
+
+def highlight(raw):
+    if raw is None:
+        return None
+    html = str(escape(raw))
+    return Markup(html.replace(_HL_START, "<mark>").replace(_HL_END, "</mark>"))
+
+
+def search_activities(q, limit=50):
+    # Returns [(activity, snippet)] best match first; snippet is None on the
+    # LIKE fallback
+    match = to_match_query(q)
+    if not match:
+        return []
+
+    if not fts_enabled():
+        pattern = f"%{q}%"
+        activities = (
+            Activity.query.options(joinedload(Activity.advisor))
+            .filter(
+                or_(
+                    Activity.activityName.ilike(pattern),
+                    Activity.activityCategory.ilike(pattern),
+                    Activity.activityLocation.ilike(pattern),
+                    Activity.activityDetails.ilike(pattern),
+                )
+            )
+            .order_by(Activity.activityID)
+            .limit(limit)
+            .all()
+        )
+        return [(a, None) for a in activities]
+
+    hits = db.session.execute(
+        text(
+            f"SELECT rowid, snippet(activity_fts, -1, :hl_start, :hl_end, '…', 12) "
+            f"FROM activity_fts WHERE activity_fts MATCH :match "
+            f"ORDER BY bm25(activity_fts, {RANK_WEIGHTS}) LIMIT :limit"
+        ),
+        {"match": match, "limit": limit, "hl_start": _HL_START, "hl_end": _HL_END},
+    ).all()
+    if not hits:
+        return []
+
+    by_id = {
+        a.activityID: a
+        for a in Activity.query.options(joinedload(Activity.advisor))
+        .filter(Activity.activityID.in_([h[0] for h in hits]))
+    }
+    return [
+        (by_id[rowid], highlight(snippet))
+        for rowid, snippet in hits
+        if rowid in by_id
+    ]
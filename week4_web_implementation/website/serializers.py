@@ -0,0 +1,106 @@
+from datetime import date
+from operator import attrgetter
+
+# ---------------- JSON SERIALIZERS ---------------- #
+#
+# Each serializer is built once at import time: the output keys are fixed
+# and the attribute lookups are compiled into a single attrgetter, so
+# turning a row into a dict is one C-level call plus a zip instead of a
+# hand-written dict literal in every view.
+
+
+def _plain(value):
+    # dates go out as ISO-8601 strings rather than Flask's HTTP-date format
+    return value.isoformat() if isinstance(value, date) else value
+
+
+class Serializer:
+    def __init__(self, **fields):
+        # fields: output key -> attribute path, e.g. name="activity.activityName"
+        self.fields = fields
+        self.keys = tuple(fields)
+        getter = attrgetter(*fields.values())
+        self._get = getter if len(fields) > 1 else (lambda obj: (getter(obj),))
+
+    def __call__(self, obj):
+        return dict(zip(self.keys, map(_plain, self._get(obj))))
+
+    def many(self, objs):
+        return [self(obj) for obj in objs]
+
+    def extend(self, **fields):
+        return Serializer(**self.fields, **fields)
+
+
+# ---------------- STUDENTS ---------------- #
+
+student = Serializer(
+    studentID="studentID",
+    firstName="studentFirstName",
+    lastName="studentLastName",
+    email="studentEmail",
+)
+
+# ---------------- ADVISORS ---------------- #
+
+advisor = Serializer(
+    advisorID="advisorID",
+    name="advisorName",
+    email="advisorEmail",
+    role="advisorRole",
+    officeLocation="officeLocation",
+    schedule="availableSchedule",
+)
+
+# ---------------- ACTIVITIES ---------------- #
+
+activity_summary = Serializer(
+    activityID="activityID",
+    name="activityName",
+    category="activityCategory",
+    location="activityLocation",
+)
+
+activity_detail = activity_summary.extend(
+    details="activityDetails",
+    startDate="activityStartDate",
+    endDate="activityEndDate",
+    frequency="activityFrequency",
+    advisorID="advisorID",
+    capacity="capacity",
+)
+
+# ---------------- PARTICIPATIONS ---------------- #
+
+participation = Serializer(
+    participationID="participationID",
+    activityID="activityID",
+    status="applicationStatus",
+    feedback="advisorFeedback",
+    achievements="achievements",
+    dateApplied="dateApplied",
+    approvalDate="approvalDate",
+    advisorID="advisorID",
+)
+
+# requires Participation.activity to be loaded with the row
+history_item = Serializer(
+    participationID="participationID",
+    activityID="activityID",
+    activityName="activity.activityName",
+    category="activity.activityCategory",
+    location="activity.activityLocation",
+    dateApplied="dateApplied",
+    status="applicationStatus",
+)
+
+# ---------------- NOTIFICATIONS ---------------- #
+
+notification = Serializer(
+    id="notificationID",
+    participationID="participationID",
+    activityName="activityName",
+    status="status",
+    createdAt="createdAt",
+    readAt="readAt",
+)
@@ -0,0 +1,223 @@
+from collections import Counter
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import event, func, inspect, literal, select
+
+from . import db
+from .jobs import handler
+from .models import Participation, ParticipationSummary
+
+# ---------------- PARTICIPATION STATISTICS ---------------- #
+#
+# participation_summary holds one row per (scope, scopeID, status) with the
+# number of matching participations, so dashboards read their counters by
+# primary key instead of loading and counting every participation.
+#
+# ORM writes keep it current through the mapper events at the bottom of
+# this file. Code that writes participations with Core statements (bulk
+# UPDATE/INSERT) must call record_changes() / record_inserts() itself in the
+# same transaction.
+
+SCOPES = {
+    "student": Participation.studentID,
+    "advisor": Participation.advisorID,
+    "activity": Participation.activityID,
+}
+
+summary = ParticipationSummary.__table__
+
+
+def _bump(conn, scope, scope_id, status, delta):
+    if scope_id is None or status is None:
+        return
+
+    key = (
+        (summary.c.scope == scope)
+        & (summary.c.scopeID == scope_id)
+        & (summary.c.status == status)
+    )
+    updated = conn.execute(
+        summary.update().where(key).values(total=summary.c.total + delta)
+    )
+    if updated.rowcount == 0:
+        conn.execute(
+            summary.insert().values(
+                scope=scope, scopeID=scope_id, status=status, total=max(delta, 0)
+            )
+        )
+
+
+def _apply(conn, row, delta):
+    # row = (studentID, advisorID, activityID, status)
+    student_id, advisor_id, activity_id, status = row
+    _bump(conn, "student", student_id, status, delta)
+    _bump(conn, "advisor", advisor_id, status, delta)
+    _bump(conn, "activity", activity_id, status, delta)
+    _bump(conn, "all", 0, status, delta)
+
+
+def record_change(conn, old=None, new=None):
+    # old/new are (studentID, advisorID, activityID, status) tuples, or None
+    # for an insert/delete
+    if old == new:
+        return
+    if old is not None:
+        _apply(conn, old, -1)
+    if new is not None:
+        _apply(conn, new, +1)
+
+
+def _tally(deltas, row, delta):
+    student_id, advisor_id, activity_id, status = row
+    deltas["student", student_id, status] += delta
+    deltas["advisor", advisor_id, status] += delta
+    deltas["activity", activity_id, status] += delta
+    deltas["all", 0, status] += delta
+
+
+def _flush(conn, deltas):
+    for (scope, scope_id, status), delta in deltas.items():
+        if delta:
+            _bump(conn, scope, scope_id, status, delta)
+
+
+def record_inserts(conn, rows):
+    # Batched form of record_change(new=...) for bulk INSERTs: one UPDATE per
+    # distinct counter instead of four per row
+    deltas = Counter()
+    for row in rows:
+        _tally(deltas, row, +1)
+    _flush(conn, deltas)
+
+
+def record_changes(conn, changes):
+    # Batched form of record_change() for bulk UPDATEs; changes is a list of
+    # (old, new) row tuples
+    deltas = Counter()
+    for old, new in changes:
+        if old != new:
+            _tally(deltas, old, -1)
+            _tally(deltas, new, +1)
+    _flush(conn, deltas)
+
+
+def rebuild(conn):
+    conn.execute(summary.delete())
+
+    status = Participation.applicationStatus
+    for scope, column in SCOPES.items():
+        conn.execute(
+            summary.insert().from_select(
+                ["scope", "scopeID", "status", "total"],
+                select(literal(scope), column, status, func.count())
+                .where(column.isnot(None), status.isnot(None))
+                .group_by(column, status),
+            )
+        )
+    conn.execute(
+        summary.insert().from_select(
+            ["scope", "scopeID", "status", "total"],
+            select(literal("all"), literal(0), status, func.count())
+            .where(status.isnot(None))
+            .group_by(status),
+        )
+    )
+
+
+# ---------------- READS ---------------- #
+
+def counts_for(scope, scope_id=0):
+    # {status: count} for one student / advisor / activity (or "all")
+    rows = db.session.execute(
+        select(summary.c.status, summary.c.total).where(
+            summary.c.scope == scope, summary.c.scopeID == scope_id
+        )
+    )
+    return {status: total for status, total in rows}
+
+
+def live_counts(scope):
+    # {scopeID: {status: count}} straight from participation via GROUP BY;
+    # used to verify the summary table
+    column = SCOPES[scope]
+    result = {}
+    rows = db.session.execute(
+        select(column, Participation.applicationStatus, func.count())
+        .where(column.isnot(None), Participation.applicationStatus.isnot(None))
+        .group_by(column, Participation.applicationStatus)
+    )
+    for scope_id, status, total in rows:
+        result.setdefault(scope_id, {})[status] = total
+    return result
+
+
+def stale_rows():
+    # (scope, scopeID, summary counts, live counts) wherever they disagree
+    for scope in SCOPES:
+        for scope_id, expected in live_counts(scope).items():
+            actual = {k: v for k, v in counts_for(scope, scope_id).items() if v}
+            if actual != expected:
+                yield scope, scope_id, actual, expected
+
+
+@handler("stats.reconcile")
+def reconcile():
+    # Queued after bulk loads: rebuild the summary only if it has drifted
+    if next(stale_rows(), None) is not None:
+        db.session.remove()
+        with db.engine.begin() as conn:
+            rebuild(conn)
+
+
+# ---------------- ORM HOOKS ---------------- #
+
+def _current(target):
+    return (target.studentID, target.advisorID, target.activityID, target.applicationStatus)
+
+
+def _previous(target):
+    state = inspect(target)
+    values = []
+    for attr in ("studentID", "advisorID", "activityID", "applicationStatus"):
+        history = state.attrs[attr].history
+        values.append(history.deleted[0] if history.deleted else getattr(target, attr))
+    return tuple(values)
+
+
+@event.listens_for(Participation, "after_insert")
+def _participation_inserted(mapper, conn, target):
+    record_change(conn, new=_current(target))
+
+
+@event.listens_for(Participation, "after_update")
+def _participation_updated(mapper, conn, target):
+    record_change(conn, old=_previous(target), new=_current(target))
+
+
+@event.listens_for(Participation, "after_delete")
+def _participation_deleted(mapper, conn, target):
+    record_change(conn, old=_previous(target))
+
+
+# ---------------- CLI: flask stats ... ---------------- #
+
+stats_cli = AppGroup("stats", help="Participation statistics.")
+
+
+@stats_cli.command("rebuild")
+def rebuild_command():
+    with db.engine.begin() as conn:
+        rebuild(conn)
+    click.echo("Participation summary rebuilt.")
+
+
+@stats_cli.command("check")
+def check_command():
+    stale = 0
+    for scope, scope_id, actual, expected in stale_rows():
+        stale += 1
+        click.echo(f"{scope} {scope_id}: summary {actual} != live {expected}")
+    if stale:
+        raise click.ClickException(f"{stale} stale summary rows; run 'flask stats rebuild'.")
+    click.echo("Participation summary matches live counts.")
@@ -0,0 +1,157 @@
+import hashlib
+import time
+from datetime import datetime, timedelta
+from functools import wraps
+
+import jwt
+from flask import current_app, g, jsonify, request
+
+from .identity import IdentityCache, load_user
+
+# ---------------- API TOKENS ---------------- #
+#
+# Tokens are HS256 JWTs signed with one of JWT_KEYS ({kid: secret}). New
+# tokens use JWT_ACTIVE_KID and name it in the header, so a key can be
+# rotated by adding a new kid, making it active, and dropping the old one
+# once its tokens have expired. Tokens without a kid (issued before
+# rotation existed) are checked against SECRET_KEY.
+#
+# A verified token is cached under its sha256 until its own exp, so repeat
+# calls skip the signature check. Entries remember their kid and are
+# ignored once that key is no longer configured.
+#
+# Students and advisors both get tokens. "sub" is the studentID or the
+# advisorID, and the "role" claim (student / advisor / admin) says which;
+# routes check it with roles_required(). Tokens from before advisors could
+# log in have no role and belong to students.
+#
+# Staff rights can be withdrawn while a token is still valid, so for
+# advisor/admin tokens the role is re-read from the advisor row through the
+# identity cache on every request (no SQL on a hit; the entry is dropped
+# after any commit that changes the row, and expires after
+# IDENTITY_CACHE_TTL for changes made by other processes). An advisor who is
+# no longer Approved gets 401; one whose is_admin was revoked is an advisor.
+
+DEFAULTS = {
+    "JWT_KEYS": None,  # defaults to {"default": SECRET_KEY}
+    "JWT_ACTIVE_KID": "default",
+    "JWT_EXPIRES": timedelta(hours=2),
+    "JWT_EMBED_CLAIMS": True,
+    "JWT_CACHE_SIZE": 4096,
+}
+
+
+def init_app(app):
+    for key, value in DEFAULTS.items():
+        app.config.setdefault(key, value)
+    if not app.config["JWT_KEYS"]:
+        app.config["JWT_KEYS"] = {"default": app.config["SECRET_KEY"]}
+    if app.config["JWT_ACTIVE_KID"] not in app.config["JWT_KEYS"]:
+        raise RuntimeError(f"JWT_ACTIVE_KID {app.config['JWT_ACTIVE_KID']!r} is not in JWT_KEYS")
+    app.extensions["token_cache"] = IdentityCache(maxsize=app.config["JWT_CACHE_SIZE"])
+
+
+def _cache():
+    return current_app.extensions["token_cache"]
+
+
+def _key(kid):
+    if kid is None:
+        return current_app.config["SECRET_KEY"]
+    return current_app.config["JWT_KEYS"].get(kid)
+
+
+def identity(user):
+    # -> (id, email, role, display name) of a Students or Advisor row
+    if user.role_type == "advisor":
+        return user.advisorID, user.advisorEmail, "admin" if user.is_admin else "advisor", user.advisorName
+    return user.studentID, user.studentEmail, "student", f"{user.studentFirstName} {user.studentLastName}"
+
+
+def token_role(claims):
+    return claims.get("role", "student")
+
+
+def current_role(user_id, role):
+    # -> the role the token's user has now, or None if it was revoked
+    if role == "student":
+        return role
+    advisor = load_user(f"a{user_id}")
+    if advisor is None or advisor.status != "Approved":
+        return None
+    return identity(advisor)[2]
+
+
+def create_token(user):
+    kid = current_app.config["JWT_ACTIVE_KID"]
+    user_id, email, role, name = identity(user)
+    payload = {
+        # PyJWT >= 2.10 rejects non-string subjects
+        "sub": str(user_id),
+        "email": email,
+        "role": role,
+        "exp": datetime.utcnow() + current_app.config["JWT_EXPIRES"],
+    }
+    if current_app.config["JWT_EMBED_CLAIMS"]:
+        payload["name"] = name
+    return jwt.encode(payload, _key(kid), algorithm="HS256", headers={"kid": kid})
+
+
+def decode_token(token):
+    # Returns the verified claims; raises jwt.InvalidTokenError otherwise
+    digest = hashlib.sha256(token.encode()).digest()
+    cache = _cache()
+    entry = cache.get(digest)
+    if entry is not None:
+        kid, claims = entry
+        if _key(kid) is not None:
+            return claims
+        cache.invalidate(digest)
+
+    kid = jwt.get_unverified_header(token).get("kid")
+    key = _key(kid)
+    if key is None:
+        raise jwt.InvalidTokenError(f"Unknown signing key {kid!r}")
+    claims = jwt.decode(token, key, algorithms=["HS256"], options={"require": ["exp", "sub"]})
+
+    cache.put(digest, (kid, claims), ttl=claims["exp"] - time.time())
+    return claims
+
+
+def token_required(f):
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        auth_header = request.headers.get("Authorization", "")
+        parts = auth_header.split()
+
+        if len(parts) != 2 or parts[0].lower() != "bearer":
+            return jsonify({"error": "Missing or invalid token"}), 401
+
+        try:
+            claims = decode_token(parts[1])
+            user_id = int(claims["sub"])
+        except Exception:
+            return jsonify({"error": "Token invalid"}), 401
+
+        role = current_role(user_id, token_role(claims))
+        if role is None:
+            return jsonify({"error": "Token revoked"}), 401
+
+        # Embedded role/name are available to handlers without a query
+        g.token_claims = claims
+        g.token_role = role
+        return f(user_id, *args, **kwargs)
+
+    return wrapper
+
+
+def roles_required(*roles):
+    # Goes below @token_required
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            if g.token_role not in roles:
+                return jsonify({"error": "Not allowed for this account"}), 403
+            return f(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -1,15 +1,37 @@
-from flask import Blueprint, render_template, redirect, url_for, request, flash
+from flask import Blueprint, render_template, redirect, url_for, request, flash, jsonify
 from flask_login import login_required, current_user
-from werkzeug.security import generate_password_hash
-from datetime import date
-from sqlalchemy import or_  # <--- Added for search logic
+from markupsafe import Markup
+from functools import wraps
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload, contains_eager
 
 from .models import Activity, Participation, Advisor
-from . import db
+from .search import search_activities
+from .cache import cached, catalog_key
+from .applications import apply, active_status, withdraw, ACTIVE_STATUSES
+from .stats import counts_for
+from .passwords import hash_password
+from . import db, notifications
 
 views = Blueprint("views", __name__)
 
 
+def student_required(f):
+    # Students only; advisors/admins are sent to their own dashboards.
+    # role_type is resolved once per request instead of in every view.
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        role = getattr(current_user, "role_type", None)
+        if role != "student":
+            if role == "advisor":
+                if getattr(current_user, "is_admin", False):
+                    return redirect(url_for("admin.index"))
+                return redirect(url_for("advisor.dashboard"))
+            return redirect(url_for("auth.login"))
+        return f(*args, **kwargs)
+    return wrapper
+
+
 @views.route("/")
 def home():
     return render_template("home.html")
@@ -19,15 +41,8 @@ def home():
 
 @views.route("/dashboard")
 @login_required
+@student_required
 def dashboard():
-    # Only students
-    if getattr(current_user, "role_type", None) != "student":
-        if getattr(current_user, "role_type", None) == "advisor":
-            if getattr(current_user, "is_admin", False):
-                return redirect(url_for("admin.index"))
-            return redirect(url_for("advisor.dashboard"))
-        return redirect(url_for("auth.login"))
-
     # FIX: Joined activities = approved participation requests
     joined = (
         Activity.query.join(Participation)
@@ -38,104 +53,122 @@ def dashboard():
         .all()
     )
 
-    participations = Participation.query.filter_by(
-        studentID=current_user.studentID
-    ).all()
+    # Only the five most recent requests are shown
+    participations = (
+        Participation.query
+        .options(joinedload(Participation.activity))
+        .filter_by(studentID=current_user.studentID)
+        .order_by(Participation.participationID.desc())
+        .limit(5)
+        .all()
+    )
 
     return render_template(
         "dashboard.html",
         joined=joined,
-        participations=participations
+        participations=participations,
+        counts=counts_for("student", current_user.studentID),
+        notifications=notifications.recent(current_user.studentID),
+        live_notifications=True,
     )
 
 
+# ---------------- NOTIFICATIONS ---------------- #
+# The dashboard subscribes to the stream instead of reloading the page to
+# see status changes; on other pages the navbar badge polls the count.
+
+@views.route("/notifications/unread-count")
+@login_required
+@student_required
+def notifications_unread_count():
+    return jsonify({"count": notifications.unread_count(current_user.studentID)})
+
+
+@views.route("/notifications/stream")
+@login_required
+@student_required
+def notifications_stream():
+    return notifications.stream(current_user.studentID, request.headers.get("Last-Event-ID"))
+
+
+@views.route("/notifications/read", methods=["POST"])
+@login_required
+@student_required
+def notifications_read():
+    notifications.mark_read(current_user.studentID, request.form.get("up_to", type=int))
+    db.session.commit()
+    if request.accept_mimetypes.best == "application/json":
+        return jsonify({"count": notifications.unread_count(current_user.studentID)})
+    return redirect(url_for("views.dashboard"))
+
+
 
 # ---------------- ACTIVITY LIST (STUDENTS) ---------------- #
 
 @views.route("/activities")
 @login_required
+@student_required
 def activities():
-    # Students only; advisors/admins shouldn't use this page
-    if getattr(current_user, "role_type", None) != "student":
-        if getattr(current_user, "role_type", None) == "advisor":
-            if getattr(current_user, "is_admin", False):
-                return redirect(url_for("admin.index"))
-            return redirect(url_for("advisor.dashboard"))
-        return redirect(url_for("auth.login"))
-
     # --- SEARCH LOGIC START ---
     search_query = request.args.get('q')
 
-    if search_query:
-        # Filter by Name OR Category OR Location
-        activities = Activity.query.filter(
-            or_(
-                Activity.activityName.ilike(f'%{search_query}%'),
-                Activity.activityCategory.ilike(f'%{search_query}%'),
-                Activity.activityLocation.ilike(f'%{search_query}%')
-            )
-        ).all()
-    else:
-        activities = Activity.query.all()
+    def render_catalog():
+        snippets = {}
+        if search_query:
+            # Ranked full-text search over name, category, location and details
+            results = search_activities(search_query)
+            activities = [a for a, _ in results]
+            snippets = {a.activityID: snippet for a, snippet in results if snippet}
+        else:
+            activities = Activity.query.options(
+                joinedload(Activity.advisor)
+            ).all()
+        return render_template(
+            "_activity_table.html",
+            activities=activities,
+            snippets=snippets
+        )
     # --- SEARCH LOGIC END ---
 
-    return render_template("activities.html", activities=activities)
+    # The table is the same for every student; cache it per query string
+    catalog_table = cached(catalog_key("html"), render_catalog)
+    return render_template("activities.html", catalog_table=Markup(catalog_table))
 
 
 # ---------------- PARTICIPATION REQUEST ---------------- #
 
 @views.route("/participate/<int:activity_id>", methods=["GET", "POST"])
 @login_required
+@student_required
 def participate(activity_id):
-    # 1. Role Check: Students only
-    if getattr(current_user, "role_type", None) != "student":
-        if getattr(current_user, "role_type", None) == "advisor":
-            if getattr(current_user, "is_admin", False):
-                return redirect(url_for("admin.index"))
-            return redirect(url_for("advisor.dashboard"))
-        return redirect(url_for("auth.login"))
-
-    # 2. Check if Student is ALREADY applied or accepted
-    existing_participation = Participation.query.filter_by(
-        studentID=current_user.studentID,
-        activityID=activity_id
-    ).first()
-
-    if existing_participation:
-        if existing_participation.applicationStatus == 'Approved':
-            flash("You have already been accepted into this activity.", "info")
-            return redirect(url_for('views.dashboard'))
-        elif existing_participation.applicationStatus == 'Pending':
-            flash("You already have a pending request for this activity. Please wait for approval.", "warning")
-            return redirect(url_for('views.dashboard'))
-        # If 'Rejected', we allow them to apply again (optional)
-
     activity = Activity.query.get_or_404(activity_id)
-    
-    # Show only Approved advisors
-    advisors = Advisor.query.filter_by(status="Approved").all()
 
     if request.method == "POST":
-        advisor_id = request.form.get("advisor_id")
+        advisor_id = request.form.get("advisor_id", type=int)
 
         if not advisor_id:
             flash("Please select an advisor.", "warning")
             return redirect(url_for("views.participate", activity_id=activity_id))
 
-        participation = Participation(
-            studentID=current_user.studentID,
-            activityID=activity_id,
-            advisorID=int(advisor_id),
-            applicationStatus="Pending",
-            dateApplied=date.today(),
-        )
-
-        db.session.add(participation)
+        # One INSERT; the unique index rejects a second active application
+        participation_id = apply(current_user.studentID, activity_id, advisor_id)
         db.session.commit()
+        if participation_id is None:
+            flash_already_applied(active_status(current_user.studentID, activity_id))
+            return redirect(url_for("views.dashboard"))
 
         flash("Participation request submitted!", "success")
         return redirect(url_for("views.dashboard"))
 
+    # Don't offer the form for an activity the student is already in
+    status = active_status(current_user.studentID, activity_id)
+    if status:
+        flash_already_applied(status)
+        return redirect(url_for('views.dashboard'))
+
+    # Show only Approved advisors
+    advisors = Advisor.query.filter_by(status="Approved").all()
+
     return render_template(
         "participate.html",
         activity=activity,
@@ -143,19 +176,38 @@ def participate(activity_id):
     )
 
 
+def flash_already_applied(status):
+    if status == 'Approved':
+        flash("You have already been accepted into this activity.", "info")
+    elif status == 'Waitlisted':
+        flash("You are on the waitlist for this activity.", "info")
+    else:
+        flash("You already have a pending request for this activity. Please wait for approval.", "warning")
+
+
+@views.route("/withdraw/<int:participation_id>", methods=["POST"])
+@login_required
+@student_required
+def withdraw_participation(participation_id):
+    p = Participation.query.get_or_404(participation_id)
+    if p.studentID != current_user.studentID:
+        flash("You can only withdraw your own requests.", "danger")
+    elif p.applicationStatus not in ACTIVE_STATUSES:
+        flash("This request is no longer active.", "warning")
+    else:
+        # frees the seat (if any) and promotes the next waitlisted student
+        withdraw(participation_id)
+        db.session.commit()
+        flash("Request withdrawn.", "success")
+    return redirect(request.referrer or url_for("views.dashboard"))
+
+
 # ---------------- STUDENT PROFILE (VIEW + EDIT) ---------------- #
 
 @views.route("/profile", methods=["GET", "POST"])
 @login_required
+@student_required
 def profile():
-    # Students only
-    if getattr(current_user, "role_type", None) != "student":
-        if getattr(current_user, "role_type", None) == "advisor":
-            if getattr(current_user, "is_admin", False):
-                return redirect(url_for("admin.index"))
-            return redirect(url_for("advisor.dashboard"))
-        return redirect(url_for("auth.login"))
-
     if request.method == "POST":
         current_user.studentFirstName = request.form.get("first_name")
         current_user.studentLastName = request.form.get("last_name")
@@ -168,11 +220,14 @@ def profile():
 
         new_password = request.form.get("password")
         if new_password:
-            current_user.studentPassword = generate_password_hash(
-                new_password, method="pbkdf2:sha256", salt_length=16
-            )
-
-        db.session.commit()
+            current_user.studentPassword = hash_password(new_password)
+
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            flash("Email already registered.", "danger")
+            return redirect(url_for("views.profile"))
         flash("Profile updated successfully.", "success")
         return redirect(url_for("views.profile"))
 
@@ -181,15 +236,8 @@ def profile():
 #search activity history
 @views.route("/activity-history", methods=["GET"])
 @login_required
+@student_required
 def activity_history():
-    # Students only
-    if getattr(current_user, "role_type", None) != "student":
-        if getattr(current_user, "role_type", None) == "advisor":
-            if getattr(current_user, "is_admin", False):
-                return redirect(url_for("admin.index"))
-            return redirect(url_for("advisor.dashboard"))
-        return redirect(url_for("auth.login"))
-
     # Read search keyword from URL parameter
     search_query = request.args.get("q", "")
 
@@ -197,6 +245,10 @@ def activity_history():
     participations = (
         Participation.query
         .join(Activity)
+        .options(
+            contains_eager(Participation.activity),
+            joinedload(Participation.advisor),
+        )
         .filter(
             Participation.studentID == current_user.studentID,
             Activity.activityName.ilike(f"%{search_query}%")